@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .counters import ENTRY_COUNT_FIELDS, bump_data_version
+from .models import ArchiveRun
+from .rollups import ARCHIVE_MODELS, ENTRY_MODELS, KIND_EXPENSE, KIND_INCOME
+
+ARCHIVED_FIELDS = ("id", "user_id", "category_id", "amount", "note", "entry_date", "created_at", "updated_at")
+ARCHIVE_BATCH_SIZE = 1000
+_BOUNDARY_KEY = "archive:boundary"
+# 快取中代表「從未封存」的值（None 會被當成未命中）
+_NO_BOUNDARY = ""
+ARCHIVED_READ_ONLY = "Archived entries are read-only"
+
+
+def _cache():
+    return caches[settings.ARCHIVE_CACHE_ALIAS]
+
+
+def archive_cutoff(years: int, today: date | None = None) -> date:
+    """First day of the oldest year kept in the hot tables: whole years older than ``years`` are closed."""
+    today = today or date.today()
+    return date(today.year - years, 1, 1)
+
+
+def archive_boundary() -> date | None:
+    """Entries dated before this may be in the archive tables; None when nothing was ever archived."""
+    boundary = _cache().get(_BOUNDARY_KEY)
+    if boundary is None:
+        boundary = ArchiveRun.objects.aggregate(before=Max("before"))["before"] or _NO_BOUNDARY
+        _cache().set(_BOUNDARY_KEY, boundary, settings.ARCHIVE_BOUNDARY_TTL)
+    return boundary or None
+
+
+async def aarchive_boundary() -> date | None:
+    return await sync_to_async(archive_boundary)()
+
+
+def spans_archive(start: date | None, boundary: date | None) -> bool:
+    """Whether a date range starting at ``start`` (None: unbounded) can reach archived entries."""
+    return boundary is not None and (start is None or start < boundary)
+
+
+def is_archived(kind: str, user, entry_id: int) -> bool:
+    """Whether the user's entry ``entry_id`` of ``kind`` was moved to the archive (and is read-only)."""
+    return ARCHIVE_MODELS[kind].objects.filter(user=user, id=entry_id).exists()
+
+
+def archived_in_range(user, start: date, end: date) -> bool:
+    """Whether any of the user's archived entries is dated within [start, end]."""
+    if not spans_archive(start, archive_boundary()):
+        return False
+    return any(
+        model.objects.filter(user=user, entry_date__gte=start, entry_date__lte=end).exists()
+        for model in ARCHIVE_MODELS.values()
+    )
+
+
+def _forget_boundary() -> None:
+    _cache().delete(_BOUNDARY_KEY)
+    transaction.on_commit(lambda: _cache().delete(_BOUNDARY_KEY))
+
+
+@dataclass
+class ArchiveResult:
+    before: date
+    moved: Dict[str, int] = field(default_factory=dict)
+
+
+def archive_entries(before: date, batch_size: int = ARCHIVE_BATCH_SIZE) -> ArchiveResult:
+    """Move entries dated before ``before`` from the hot tables to the archive tables.
+
+    The boundary is published first, so readers already include the archive
+    tables while rows move; each batch is copied and deleted in one
+    transaction. The monthly rollups keep counting archived entries (the
+    delete bypasses the model signals), while the quota counters only count
+    the hot tables, so archiving frees room under ENTRY_LIMIT_PER_KIND.
+    """
+    run = ArchiveRun.objects.create(before=before)
+    _forget_boundary()
+    result = ArchiveResult(before)
+    for kind, model in ENTRY_MODELS.items():
+        archive_model = ARCHIVE_MODELS[kind]
+        result.moved[kind] = 0
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    model.objects.select_for_update()
+                    .filter(entry_date__lt=before)
+                    .order_by("id")
+                    .values(*ARCHIVED_FIELDS)[:batch_size]
+                )
+                if not rows:
+                    break
+                archive_model.objects.bulk_create([archive_model(**row) for row in rows])
+                # 直接刪除、不送出 post_delete：彙總與摘要快取維持不變
+                model.objects.filter(id__in=[row["id"] for row in rows])._raw_delete(model.objects.db)
+                for user_id, moved in Counter(row["user_id"] for row in rows).items():
+                    bump_data_version(user_id, create=False, **{ENTRY_COUNT_FIELDS[kind]: -moved})
+            result.moved[kind] += len(rows)
+
+    run.finished_at = timezone.now()
+    run.expense_entries = result.moved[KIND_EXPENSE]
+    run.income_entries = result.moved[KIND_INCOME]
+    run.save(update_fields=["finished_at", "expense_entries", "income_entries"])
+    return result
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user, get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+
+_PREFIX = "auth:user"
+
+
+def _cache():
+    return caches[settings.FAST_AUTH_CACHE_ALIAS]
+
+
+def _key(user_id) -> str:
+    return f"{_PREFIX}:{user_id}"
+
+
+def get_cached_user(request):
+    """django.contrib.auth.get_user, with the user row served from the cache for a short TTL.
+
+    The cached user is only returned when the session's auth hash still matches
+    it, so a password change logs other sessions out exactly as before; every
+    other case (no session, unknown backend, hash fallback) goes through
+    get_user() unchanged.
+    """
+    session = request.session
+    user_id = session.get(SESSION_KEY)
+    backend_path = session.get(BACKEND_SESSION_KEY)
+    session_hash = session.get(HASH_SESSION_KEY)
+    if user_id is None or not session_hash or backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return get_user(request)
+    user = _cache().get(_key(user_id))
+    if user is not None and constant_time_compare(session_hash, user.get_session_auth_hash()):
+        return user
+    user = get_user(request)
+    if user.is_authenticated:
+        _cache().set(_key(user_id), user, settings.FAST_AUTH_USER_TTL)
+    return user
+
+
+async def aget_cached_user(request):
+    if not hasattr(request, "_acached_user"):
+        request._acached_user = await sync_to_async(get_cached_user)(request)
+    return request._acached_user
+
+
+def forget_user(user_id) -> None:
+    key = _key(user_id)
+    _cache().delete(key)
+    # 提交前其他請求仍可能讀到舊資料並寫回快取，提交後再清一次
+    transaction.on_commit(lambda: _cache().delete(key))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def _forget_changed_user(sender, instance, **kwargs):
+    forget_user(get_user_model()._meta.pk.value_to_string(instance))
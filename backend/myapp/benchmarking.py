@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import json
+import math
+import multiprocessing
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, List, Sequence
+
+import django
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import OperationalError, connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+from .rollups import KIND_EXPENSE
+from .seeding import category_names
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+@contextmanager
+def throwaway_database():
+    """Run the block against a fresh test database of the configured engine, dropped afterwards.
+
+    SQLite gets a temporary file rather than the in-memory test database,
+    which locks whole tables as soon as several threads write.
+    """
+    setup_test_environment()
+    sqlite_file = None
+    if connection.vendor == "sqlite":
+        handle, sqlite_file = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        connection.settings_dict.setdefault("TEST", {})["NAME"] = sqlite_file
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        if sqlite_file and os.path.exists(sqlite_file):
+            os.remove(sqlite_file)
+
+
+def session_key_for(user) -> str:
+    """Key of a new session logged in as the user, for clients that cannot call force_login."""
+    session = SessionStore()
+    session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+@dataclass
+class BenchUser:
+    username: str
+    password: str
+    expense_types: List[str]
+    month: date
+
+
+@dataclass
+class Scenario:
+    name: str
+    send: Callable[[Client, BenchUser, int], object]
+    login: bool = True
+
+
+def _post_json(client: Client, path: str, payload: dict):
+    return client.post(path, json.dumps(payload), content_type="application/json")
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in [
+        Scenario("ledger", lambda client, user, i: client.get("/ledger/?kind=all")),
+        Scenario(
+            "report_overview",
+            lambda client, user, i: client.get(f"/report/overview/?month={user.month:%Y-%m-%d}"),
+        ),
+        Scenario(
+            "create_expense",
+            lambda client, user, i: _post_json(client, "/expense/", {
+                "type": user.expense_types[i % len(user.expense_types)],
+                "amount": f"{i % 900 + 1}.50",
+                "entry_date": f"{user.month:%Y-%m}-{i % 28 + 1:02d}",
+            }),
+        ),
+        Scenario(
+            "expense_type_total",
+            lambda client, user, i: client.get(
+                f"/expense/types/{user.expense_types[i % len(user.expense_types)]}/"
+            ),
+        ),
+        Scenario("purpose", lambda client, user, i: client.get(f"/purpose/?month={user.month:%Y-%m-%d}")),
+        Scenario(
+            "signin",
+            lambda client, user, i: _post_json(
+                client, "/signin/", {"username": user.username, "password": user.password}
+            ),
+            login=False,
+        ),
+    ]
+}
+
+
+@dataclass
+class _Samples:
+    latencies: List[float] = field(default_factory=list)
+    queries: List[int] = field(default_factory=list)
+    errors: int = 0
+    first_error: str = ""
+
+
+def run_scenario(
+    scenario: Scenario, users: Sequence, bench_users: Sequence[BenchUser], requests: int, concurrency: int
+) -> dict:
+    """Send ``requests`` requests from ``concurrency`` threads, each with its own client and connection."""
+    samples = _Samples()
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker(slot: int):
+        client = Client()
+        user, bench_user = users[slot % len(users)], bench_users[slot % len(bench_users)]
+        if scenario.login:
+            client.force_login(user)
+        try:
+            while True:
+                with lock:
+                    index = next(counter, None)
+                if index is None:
+                    return
+                started = time.perf_counter()
+                error = ""
+                with CaptureQueriesContext(connection) as captured:
+                    try:
+                        response = scenario.send(client, bench_user, index)
+                        if response.status_code >= 400:
+                            error = f"HTTP {response.status_code}"
+                    except Exception as exc:  # 例如 SQLite 的 database is locked
+                        error = f"{type(exc).__name__}: {exc}"
+                elapsed = time.perf_counter() - started
+                with lock:
+                    samples.latencies.append(elapsed)
+                    samples.queries.append(len(captured))
+                    if error:
+                        samples.errors += 1
+                        samples.first_error = samples.first_error or error
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(slot,)) for slot in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(samples.latencies)
+    return {
+        "requests": len(latencies),
+        "errors": samples.errors,
+        "first_error": samples.first_error,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+        "queries": {
+            "mean": round(sum(samples.queries) / len(samples.queries), 2) if samples.queries else 0.0,
+            "max": max(samples.queries, default=0),
+        },
+    }
+
+
+def bench_users_for(users: Sequence, password: str, categories_per_kind: int, month: date) -> List[BenchUser]:
+    expense_types = category_names(KIND_EXPENSE, categories_per_kind)
+    return [BenchUser(user.username, password, expense_types, month) for user in users]
+
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def environment() -> Dict[str, str | None]:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "database": connection.vendor,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+    }
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    return {
+        "p50": round(percentile(latencies, 50) * 1000, 3),
+        "p95": round(percentile(latencies, 95) * 1000, 3),
+        "p99": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def _contention_worker(job) -> dict:
+    role, session_key, bench_user, requests = job
+    client = Client()
+    client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+    scenario = SCENARIOS["create_expense" if role == "writer" else "ledger"]
+    latencies, locked, failed = [], 0, 0
+    for index in range(requests):
+        started = time.perf_counter()
+        try:
+            if scenario.send(client, bench_user, index).status_code >= 400:
+                failed += 1
+        except OperationalError as exc:
+            if "locked" in str(exc):
+                locked += 1
+            else:
+                failed += 1
+        latencies.append(time.perf_counter() - started)
+    connections.close_all()
+    return {"role": role, "latencies": latencies, "locked": locked, "failed": failed}
+
+
+def run_write_contention(
+    users: Sequence, bench_users: Sequence[BenchUser], writers: int, readers: int, requests: int
+) -> dict:
+    """create_expense from ``writers`` processes (one user each) while ``readers`` processes read the ledger.
+
+    Separate processes, like gunicorn workers, so each holds its own SQLite
+    connection and file locks.
+    """
+    session_keys = [session_key_for(user) for user in users]
+    jobs = [
+        (role, session_keys[slot % len(users)], bench_users[slot % len(users)], requests)
+        for role, count in (("writer", writers), ("reader", readers))
+        for slot in range(count)
+    ]
+    # 子行程不能共用父行程的連線
+    connections.close_all()
+    started = time.perf_counter()
+    with multiprocessing.get_context("fork").Pool(len(jobs)) as pool:
+        outcomes = pool.map(_contention_worker, jobs)
+    elapsed = time.perf_counter() - started
+
+    result = {"seconds": round(elapsed, 3)}
+    for role in ("writer", "reader"):
+        mine = [outcome for outcome in outcomes if outcome["role"] == role]
+        if not mine:
+            continue
+        latencies = [latency for outcome in mine for latency in outcome["latencies"]]
+        locked = sum(outcome["locked"] for outcome in mine)
+        failed = sum(outcome["failed"] for outcome in mine)
+        result[f"{role}s"] = {
+            "requests": len(latencies),
+            "ok": len(latencies) - locked - failed,
+            "locked": locked,
+            "failed": failed,
+            "lock_error_rate": round(locked / len(latencies), 4) if latencies else 0.0,
+            "ok_per_second": round((len(latencies) - locked - failed) / elapsed, 2),
+            "latency_ms": _latency_summary(latencies),
+        }
+    return result
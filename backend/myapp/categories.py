@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from typing import Dict, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import ExpenseCategory, IncomeCategory
+from .rollups import KIND_EXPENSE, KIND_INCOME
+
+CATEGORY_MODELS = {
+    KIND_EXPENSE: ExpenseCategory,
+    KIND_INCOME: IncomeCategory,
+}
+
+CacheKey = Tuple[str, int]
+
+_PREFIX = "categories"
+_REQUEST_ATTR = "_category_index"
+
+
+class CategoryCache:
+    """Name → id maps of users' categories in the Django cache, one per (kind, user).
+
+    Renames and deletes clear the map through the cache, so every worker
+    sharing it (see CATEGORY_CACHE_ALIAS) stops using the old names at once.
+    With CATEGORY_CACHE_TTL at 0 every lookup reads the database.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.CATEGORY_CACHE_ALIAS]
+
+    @staticmethod
+    def _key(key: CacheKey) -> str:
+        kind, user_id = key
+        return f"{_PREFIX}:{kind}:{user_id}"
+
+    def get(self, key: CacheKey) -> Dict[str, int] | None:
+        if settings.CATEGORY_CACHE_TTL <= 0:
+            return None
+        return self.cache.get(self._key(key))
+
+    def load(self, key: CacheKey) -> Dict[str, int]:
+        kind, user_id = key
+        ids = dict(CATEGORY_MODELS[kind].objects.filter(user_id=user_id).values_list("name", "id"))
+        if settings.CATEGORY_CACHE_TTL > 0:
+            self.cache.set(self._key(key), ids, settings.CATEGORY_CACHE_TTL)
+        return ids
+
+    def invalidate(self, key: CacheKey) -> None:
+        self.cache.delete(self._key(key))
+
+
+category_cache = CategoryCache()
+
+
+def _request_indexes(request) -> Dict[CacheKey, Dict[str, int]]:
+    # DRF 的 Request 只是包裝，快取掛在底層的 HttpRequest 上，兩種視圖共用
+    request = getattr(request, "_request", request)
+    indexes = getattr(request, _REQUEST_ATTR, None)
+    if indexes is None:
+        indexes = {}
+        setattr(request, _REQUEST_ATTR, indexes)
+    return indexes
+
+
+def resolve_category_id(kind: str, user, name: str, request=None) -> int | None:
+    """Id of the user's category called ``name``, or None if it does not exist.
+
+    Lookups go through the request (if given), then the shared cache (when
+    enabled), then the database. A name missing from a cached map is re-read once, so categories
+    created since the map was cached are still found.
+    """
+    if not isinstance(name, str):
+        return None
+    key = (kind, user.pk)
+    indexes = _request_indexes(request) if request is not None else {}
+    ids = indexes.get(key)
+    fresh = False
+    if ids is None:
+        ids = category_cache.get(key)
+        if ids is None:
+            ids, fresh = category_cache.load(key), True
+    if name not in ids and not fresh:
+        ids = category_cache.load(key)
+    indexes[key] = ids
+    return ids.get(name)
+
+
+def invalidate_categories(kind: str, user_id: int) -> None:
+    category_cache.invalidate((kind, user_id))
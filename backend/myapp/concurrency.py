@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Callable, List, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def _on_own_connection(func: Callable) -> Callable:
+    def run(*args):
+        # 執行緒池裡的執行緒沒有請求生命週期，比照請求開始/結束處理連線
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+
+    return run
+
+
+async def run_concurrently(*calls: Tuple) -> List[Any]:
+    """Run independent blocking ORM calls, given as ``(func, *args)``, at the same time.
+
+    Django's async ORM runs every query on one shared thread per request, so two
+    awaited aggregates still execute one after the other. Each call here gets its
+    own worker thread and therefore its own database connection.
+    """
+    return list(
+        await asyncio.gather(
+            *(
+                sync_to_async(_on_own_connection(func), thread_sensitive=False)(*args)
+                for func, *args in calls
+            )
+        )
+    )
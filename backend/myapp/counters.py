@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import ExpenseCategory, ExpenseEntry, IncomeCategory, IncomeEntry, UserCounters
+from .rollups import KIND_EXPENSE, KIND_INCOME
+
+ENTRY_COUNT_FIELDS = {KIND_EXPENSE: "expense_entries", KIND_INCOME: "income_entries"}
+CATEGORY_COUNT_FIELDS = {KIND_EXPENSE: "expense_categories", KIND_INCOME: "income_categories"}
+
+# 計數欄位 -> 被計數的模型
+COUNTED_MODELS = {
+    "expense_entries": ExpenseEntry,
+    "income_entries": IncomeEntry,
+    "expense_categories": ExpenseCategory,
+    "income_categories": IncomeCategory,
+}
+COUNT_FIELDS = {model: field for field, model in COUNTED_MODELS.items()}
+
+
+def bump_data_version(user_id: int, create: bool = True, **count_deltas: int) -> None:
+    """Mark the user's data as changed; call inside the writing transaction.
+
+    ``count_deltas`` (e.g. ``expense_entries=1``) adjust the quota counters in
+    the same UPDATE. Deletes pass ``create=False``: a cascade from the user row
+    may already have removed the counters, and must not recreate them for a
+    deleted user.
+    """
+    rows = UserCounters.objects.filter(user_id=user_id)
+    changes = {field: F(field) + delta for field, delta in count_deltas.items()}
+    if rows.update(data_version=F("data_version") + 1, **changes) or not create:
+        return
+    try:
+        with transaction.atomic():
+            UserCounters.objects.create(user_id=user_id, data_version=1, **count_deltas)
+    except IntegrityError:
+        # 另一個請求同時建立了同一列，改用累加
+        rows.update(data_version=F("data_version") + 1, **changes)
+
+
+def data_version(user_id: int) -> int:
+    version = (
+        UserCounters.objects.filter(user_id=user_id)
+        .values_list("data_version", flat=True)
+        .first()
+    )
+    return version or 0
+
+
+async def adata_version(user_id: int) -> int:
+    version = await (
+        UserCounters.objects.filter(user_id=user_id)
+        .values_list("data_version", flat=True)
+        .afirst()
+    )
+    return version or 0
+
+
+def _count(user_id: int, field: str) -> int:
+    value = UserCounters.objects.filter(user_id=user_id).values_list(field, flat=True).first()
+    return value or 0
+
+
+def entry_count(kind: str, user_id: int) -> int:
+    """Entries of a kind the user has, read from the counters row."""
+    return _count(user_id, ENTRY_COUNT_FIELDS[kind])
+
+
+def category_count(kind: str, user_id: int) -> int:
+    """Categories of a kind the user has, read from the counters row."""
+    return _count(user_id, CATEGORY_COUNT_FIELDS[kind])
+
+
+def entries_remaining(kind: str, user_id: int) -> int | None:
+    """Entries of a kind the user may still add under ENTRY_LIMIT_PER_KIND; None when unlimited.
+
+    Only the hot table counts: archived entries free their room.
+    """
+    limit = settings.ENTRY_LIMIT_PER_KIND
+    if limit <= 0:
+        return None
+    return max(0, limit - entry_count(kind, user_id))
+
+
+@dataclass
+class CounterDrift:
+    user_id: int
+    field: str
+    expected: int
+    actual: int | None
+
+
+def reconcile_counters(
+    user_ids: Iterable[int] | None = None, fix: bool = True
+) -> List[CounterDrift]:
+    """Compare the quota counters with COUNT(*) of the tables, optionally repairing any drift.
+
+    ``actual`` is None when the user has no counters row at all.
+    """
+    user_ids = list(user_ids) if user_ids is not None else None
+    users = get_user_model().objects.all()
+    counters = UserCounters.objects.all()
+    if user_ids is not None:
+        users = users.filter(id__in=user_ids)
+        counters = counters.filter(user_id__in=user_ids)
+
+    expected: Dict[int, Dict[str, int]] = {
+        user_id: dict.fromkeys(COUNTED_MODELS, 0) for user_id in users.values_list("id", flat=True)
+    }
+    for field, model in COUNTED_MODELS.items():
+        qs = model.objects.all()
+        if user_ids is not None:
+            qs = qs.filter(user_id__in=user_ids)
+        for row in qs.values("user_id").annotate(total=Count("id")).order_by():
+            expected[row["user_id"]][field] = row["total"]
+    actual = {row["user_id"]: row for row in counters.values("user_id", *COUNTED_MODELS)}
+
+    drifts: List[CounterDrift] = []
+    for user_id, counts in sorted(expected.items()):
+        row = actual.get(user_id)
+        for field, value in counts.items():
+            found = row[field] if row else None
+            if found != value:
+                drifts.append(CounterDrift(user_id, field, value, found))
+
+    if fix and drifts:
+        with transaction.atomic():
+            for user_id in {drift.user_id for drift in drifts}:
+                values = expected[user_id]
+                if not UserCounters.objects.filter(user_id=user_id).update(**values):
+                    UserCounters.objects.create(user_id=user_id, **values)
+    return drifts
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.db.models import Sum
+
+from .models import FinancialGoal
+from .rollups import DECIMAL_ZERO, KIND_EXPENSE, KIND_INCOME, ROLLUP_MODELS
+
+# (user_id, month) -> 該月的類型總額
+MonthTotals = Dict[Tuple[int, date], Decimal]
+
+
+def goal_progress_item(goal: FinancialGoal, progress_amount: Decimal) -> dict:
+    percentage = (
+        (progress_amount / goal.target_amount * Decimal("100"))
+        if goal.target_amount
+        else Decimal("0")
+    )
+    return {
+        "name": goal.name,
+        "type": goal.goal_type,
+        "target": float(goal.target_amount),
+        "target_month": goal.target_month.strftime("%Y-%m-%d"),
+        "progress": float(progress_amount),
+        "percentage": float(round(percentage, 2)),
+    }
+
+
+def _goal_kind(goal: FinancialGoal) -> str:
+    # 與 summarize_month 一致：非收入目標都以支出計算
+    if goal.goal_type == FinancialGoal.GOAL_TYPE_INCOME:
+        return KIND_INCOME
+    return KIND_EXPENSE
+
+
+def _month_totals(kind: str, user_ids: Set[int], months: Set[date]) -> MonthTotals:
+    rows = (
+        ROLLUP_MODELS[kind]
+        .objects.filter(user_id__in=user_ids, month__in=months, entry_count__gt=0)
+        .values("user_id", "month")
+        .annotate(sum_total=Sum("total"))
+        .order_by()
+    )
+    return {(row["user_id"], row["month"]): row["sum_total"] or DECIMAL_ZERO for row in rows}
+
+
+def evaluate_goals(goals: Iterable[FinancialGoal]) -> List[dict]:
+    """Progress of every goal, in input order.
+
+    A goal only needs the total of its own kind in its own month, so the totals
+    are read with one grouped query per goal type present, whatever the number
+    of goals, users or months.
+    """
+    goals = list(goals)
+    needed: Dict[str, Tuple[Set[int], Set[date]]] = {}
+    for goal in goals:
+        user_ids, months = needed.setdefault(_goal_kind(goal), (set(), set()))
+        user_ids.add(goal.user_id)
+        months.add(goal.target_month)
+    totals = {kind: _month_totals(kind, *keys) for kind, keys in needed.items()}
+    return [
+        goal_progress_item(
+            goal, totals[_goal_kind(goal)].get((goal.user_id, goal.target_month), DECIMAL_ZERO)
+        )
+        for goal in goals
+    ]
+
+
+def goals_progress(user, start: date, end: date | None = None) -> List[dict]:
+    """Progress of the user's goals targeting months from start to end (inclusive)."""
+    goals = FinancialGoal.objects.filter(
+        user=user, target_month__gte=start, target_month__lte=end or start
+    ).order_by("target_month", "name", "goal_type")
+    return evaluate_goals(goals)
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from .counters import ENTRY_COUNT_FIELDS, bump_data_version, entries_remaining
+from .rollups import ENTRY_MODELS, KIND_EXPENSE, KIND_INCOME, ROLLUP_MODELS, record_entries_created
+from .services import parse_decimal, parse_entry_date
+from .summary_cache import summary_cache
+
+IMPORT_FORMATS = ("csv", "json")
+
+_JSON_READ_SIZE = 64 * 1024
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    errors: List[Dict] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {"created": self.created, "failed": len(self.errors), "errors": self.errors}
+
+
+def iter_csv_rows(stream) -> Iterator[dict]:
+    """Rows of a UTF-8 CSV byte stream with a header line, read lazily; ValueError on malformed CSV."""
+    reader = csv.DictReader(codecs.getreader("utf-8-sig")(stream))
+    try:
+        yield from reader
+    except csv.Error as exc:
+        # 例如欄位超過 csv.field_size_limit()；出錯的那一行尚未計入 line_num
+        raise ValueError(f"Invalid CSV at line {reader.line_num + 1}: {exc}") from exc
+
+
+def iter_json_rows(stream) -> Iterator:
+    """Elements of a top-level JSON array, decoded one at a time from a byte stream."""
+    reader = codecs.getreader("utf-8-sig")(stream)
+    decoder = json.JSONDecoder()
+    buffer, eof = "", False
+
+    def fill() -> bool:
+        nonlocal buffer, eof
+        chunk = reader.read(_JSON_READ_SIZE)
+        if not chunk:
+            eof = True
+            return False
+        buffer += chunk
+        return True
+
+    def skip(expected: str = "") -> str:
+        nonlocal buffer
+        while True:
+            stripped = buffer.lstrip()
+            if stripped or eof:
+                buffer = stripped
+                break
+            buffer = ""
+            fill()
+        if expected and buffer[:1] == expected:
+            buffer = buffer[1:]
+            return expected
+        return buffer[:1]
+
+    if skip("[") != "[":
+        raise ValueError("JSON body must be an array")
+    if skip() == "]":
+        return
+    while True:
+        skip()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError as exc:
+                if eof:
+                    raise ValueError(f"Invalid JSON: {exc.msg}") from exc
+                fill()
+                continue
+            # 值剛好到緩衝區結尾時可能被截斷（例如數字），多讀一段再確認
+            if end == len(buffer) and not eof and fill():
+                continue
+            break
+        buffer = buffer[end:]
+        yield item
+        token = skip()
+        if token == ",":
+            skip(",")
+            continue
+        if token == "]":
+            return
+        raise ValueError("Invalid JSON: expected ',' or ']' between array items")
+
+
+class EntryImporter:
+    """Validates rows and writes them with bulk_create, one transaction per batch."""
+
+    def __init__(self, user, kind: str | None = None, batch_size: int = 500):
+        if kind not in (None, KIND_EXPENSE, KIND_INCOME):
+            raise ValueError("kind must be 'expense' or 'income'")
+        self.user = user
+        self.kind = kind
+        self.batch_size = batch_size
+        self.result = ImportResult()
+        self._categories: Dict[Tuple[str, str], int | None] = {}
+        # 不限筆數（ENTRY_LIMIT_PER_KIND=0）時以無限大表示
+        self._remaining = {}
+        for entry_kind in ENTRY_MODELS:
+            remaining = entries_remaining(entry_kind, user.pk)
+            self._remaining[entry_kind] = math.inf if remaining is None else remaining
+
+    def run(self, rows: Iterable) -> ImportResult:
+        batch: List[Tuple[int, dict]] = []
+        rows = iter(rows)
+        number = 0
+        while True:
+            try:
+                row = next(rows)
+            except StopIteration:
+                break
+            except ValueError as exc:
+                # 資料流本身無法解析時，記在下一列，已解析的部分仍照常匯入
+                self.result.errors.append({"row": number + 1, "error": str(exc)})
+                break
+            number += 1
+            batch.append((number, row))
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch)
+                batch = []
+        if batch:
+            self._import_batch(batch)
+        self.result.errors.sort(key=lambda error: error["row"] or 0)
+        return self.result
+
+    def _resolve_categories(self, wanted: Iterable[Tuple[str, str]]) -> None:
+        missing: Dict[str, set] = {}
+        for kind, name in wanted:
+            if (kind, name) not in self._categories:
+                missing.setdefault(kind, set()).add(name)
+        for kind, names in missing.items():
+            category_model = ROLLUP_MODELS[kind]._meta.get_field("category").related_model
+            found = dict(
+                category_model.objects.filter(user=self.user, name__in=names).values_list("name", "id")
+            )
+            for name in names:
+                self._categories[(kind, name)] = found.get(name)
+
+    def _parse_row(self, row) -> Tuple[str, dict]:
+        if not isinstance(row, dict):
+            raise ValueError("Row must be an object")
+        kind = self.kind or (row.get("kind") or "").strip().lower()
+        if kind not in ENTRY_MODELS:
+            raise ValueError("'kind' must be 'expense' or 'income'")
+        name = row.get("type")
+        if not name or not isinstance(name, str):
+            raise ValueError("'type' is required")
+        amount = parse_decimal(row.get("amount"))
+        # NaN / sNaN / Infinity 無法比較大小，先排除
+        if not amount.is_finite():
+            raise ValueError("Invalid amount value.")
+        if amount <= 0:
+            raise ValueError("'amount' must be positive")
+        if amount.as_tuple().exponent < -2 or abs(amount) >= 10 ** 18:
+            raise ValueError("Invalid amount value.")
+        note = row.get("note") or ""
+        if not isinstance(note, str) or len(note) > 255:
+            raise ValueError("'note' must be at most 255 characters")
+        return kind, {
+            "name": name,
+            "amount": amount,
+            "note": note,
+            "entry_date": parse_entry_date(row.get("entry_date") or row.get("date")),
+        }
+
+    def _import_batch(self, batch: List[Tuple[int, dict]]) -> None:
+        parsed = []
+        for number, row in batch:
+            try:
+                parsed.append((number, *self._parse_row(row)))
+            except (TypeError, ValueError) as exc:
+                self.result.errors.append({"row": number, "error": str(exc)})
+        self._resolve_categories((kind, values["name"]) for _, kind, values in parsed)
+
+        entries: Dict[str, List] = {kind: [] for kind in ENTRY_MODELS}
+        for number, kind, values in parsed:
+            category_id = self._categories[(kind, values.pop("name"))]
+            if category_id is None:
+                self.result.errors.append({"row": number, "error": "Category does not exist"})
+                continue
+            if self._remaining[kind] <= 0:
+                self.result.errors.append(
+                    {"row": number, "error": f"Maximum {kind} entries limit ({settings.ENTRY_LIMIT_PER_KIND}) reached"}
+                )
+                continue
+            self._remaining[kind] -= 1
+            entries[kind].append(
+                ENTRY_MODELS[kind](user=self.user, category_id=category_id, **values)
+            )
+
+        with transaction.atomic():
+            for kind, objs in entries.items():
+                if not objs:
+                    continue
+                ENTRY_MODELS[kind].objects.bulk_create(objs)
+                record_entries_created(kind, objs)
+                self.result.created += len(objs)
+            if any(entries.values()):
+                # bulk_create 不送 post_save，配額計數在這裡一併累加
+                bump_data_version(
+                    self.user.pk,
+                    **{ENTRY_COUNT_FIELDS[kind]: len(objs) for kind, objs in entries.items() if objs},
+                )
+                summary_cache.invalidate_months(
+                    self.user.pk, {obj.entry_date for objs in entries.values() for obj in objs}
+                )
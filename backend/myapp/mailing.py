@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, List, Sequence, Tuple
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+logger = logging.getLogger(__name__)
+
+Outgoing = Tuple[Hashable, EmailMessage]
+
+
+@dataclass
+class DeliveryResult:
+    delivered: List[Hashable] = field(default_factory=list)
+    failed: Dict[Hashable, str] = field(default_factory=dict)
+
+
+def _batches(items: Sequence[Outgoing], size: int):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _send_batch(batch: Sequence[Outgoing], result: DeliveryResult) -> List[Outgoing]:
+    """Send one batch over a single connection; return the messages to retry."""
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        for key, _ in batch:
+            result.failed[key] = f"connection failed: {exc}"
+        return list(batch)
+
+    retry: List[Outgoing] = []
+    try:
+        for key, message in batch:
+            try:
+                sent = connection.send_messages([message])
+            except Exception as exc:
+                result.failed[key] = str(exc)
+                retry.append((key, message))
+                # 連線可能已中斷，重新建立後繼續送這批剩下的信
+                try:
+                    connection.close()
+                    connection.open()
+                except Exception:
+                    pass
+                continue
+            if sent:
+                result.delivered.append(key)
+                result.failed.pop(key, None)
+            else:
+                result.failed[key] = "message was not accepted"
+                retry.append((key, message))
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            logger.warning("Closing the email connection failed", exc_info=True)
+    return retry
+
+
+def deliver_messages(
+    outgoing: Sequence[Outgoing],
+    batch_size: int | None = None,
+    max_attempts: int | None = None,
+    backoff: float | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> DeliveryResult:
+    """Send keyed messages reusing one connection per batch, retrying failures with
+    exponential backoff. Only keys in ``delivered`` were accepted by the backend."""
+    batch_size = batch_size or settings.REPORT_EMAIL_BATCH_SIZE
+    max_attempts = max_attempts or settings.REPORT_EMAIL_MAX_ATTEMPTS
+    backoff = settings.REPORT_EMAIL_RETRY_BACKOFF if backoff is None else backoff
+
+    result = DeliveryResult()
+    pending = list(outgoing)
+    for attempt in range(max_attempts):
+        if attempt:
+            sleep(backoff * 2 ** (attempt - 1))
+        retry: List[Outgoing] = []
+        for batch in _batches(pending, batch_size):
+            retry.extend(_send_batch(batch, result))
+        pending = retry
+        if not pending:
+            break
+    for key, _ in pending:
+        logger.warning("Email for %s not delivered: %s", key, result.failed.get(key))
+    return result
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.archiving import archive_cutoff, archive_entries
+from myapp.rollups import ENTRY_MODELS
+
+
+class Command(BaseCommand):
+    help = (
+        "Move entries of closed years (older than ARCHIVE_AFTER_YEARS) from the hot entry tables to "
+        "the archive tables. The ledger, exports and reports keep showing archived entries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--years",
+            type=int,
+            default=settings.ARCHIVE_AFTER_YEARS,
+            help="Keep this many years before the current one in the hot tables (default: ARCHIVE_AFTER_YEARS).",
+        )
+        parser.add_argument("--before", help="Archive entries dated before this day (YYYY-MM-DD) instead.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the entries that would be archived.",
+        )
+
+    def handle(self, *args, **options):
+        if options["before"]:
+            try:
+                before = date.fromisoformat(options["before"])
+            except ValueError as exc:
+                raise CommandError("--before must be YYYY-MM-DD") from exc
+        else:
+            if options["years"] < 0:
+                raise CommandError("--years must not be negative")
+            before = archive_cutoff(options["years"])
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        if options["dry_run"]:
+            for kind, model in ENTRY_MODELS.items():
+                count = model.objects.filter(entry_date__lt=before).count()
+                self.stdout.write(f"{kind}: {count} entries dated before {before} would be archived")
+            return
+
+        result = archive_entries(before, batch_size=options["batch_size"])
+        moved = ", ".join(f"{count} {kind}" for kind, count in result.moved.items())
+        self.stdout.write(self.style.SUCCESS(f"Archived entries dated before {before}: {moved}"))
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from myapp.benchmarking import SCENARIOS, bench_users_for, environment, run_scenario, throwaway_database
+from myapp.seeding import seed_users
+
+BENCH_PASSWORD = "bench-pass"
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database (N users x M entries x K categories per kind) and drive the real "
+        "URLconf with concurrent clients, reporting p50/p95/p99 latency, throughput and query counts. "
+        "Runs against a test database of the configured engine (SQLite file or Postgres test_<name>), "
+        "never the real data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--entries", type=int, default=1000, help="Entries per user.")
+        parser.add_argument("--categories", type=int, default=8, help="Categories per kind and user.")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+        parser.add_argument("--concurrency", type=int, default=4, help="Concurrent clients.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--scenario", action="append", dest="scenarios", choices=sorted(SCENARIOS),
+            help="Scenario to run (repeatable); all by default.",
+        )
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+        parser.add_argument("--baseline", help="JSON results of an earlier run to compare against.")
+
+    def handle(self, *args, **options):
+        if min(options["users"], options["requests"], options["concurrency"], options["categories"]) < 1:
+            raise CommandError("--users, --requests, --concurrency and --categories must be positive")
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as fh:
+                baseline = json.load(fh)
+
+        results = self._run(options)
+        self._report(results, baseline)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                json.dump(results, fh, ensure_ascii=False, indent=2)
+            self.stdout.write(f"results written to {options['output']}")
+
+    def _run(self, options) -> dict:
+        with throwaway_database():
+            month = date.today().replace(day=1)
+            self.stdout.write(
+                f"seeding {options['users']} users x {options['entries']} entries x "
+                f"{options['categories']} categories ({connection.vendor})"
+            )
+            users = seed_users(
+                options["users"], options["entries"], options["categories"],
+                seed=options["seed"], password=BENCH_PASSWORD, end=month,
+            )
+            bench_users = bench_users_for(users, BENCH_PASSWORD, options["categories"], month)
+            scenarios = {}
+            for name in options["scenarios"] or list(SCENARIOS):
+                scenarios[name] = run_scenario(
+                    SCENARIOS[name], users, bench_users, options["requests"], options["concurrency"]
+                )
+            return {
+                "environment": environment(),
+                "parameters": {
+                    key: options[key]
+                    for key in ("users", "entries", "categories", "requests", "concurrency", "seed")
+                },
+                "scenarios": scenarios,
+            }
+
+    def _report(self, results: dict, baseline: dict | None) -> None:
+        self.stdout.write(
+            f"{'scenario':<20} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'queries':>8} {'errors':>7}"
+        )
+        previous = (baseline or {}).get("scenarios", {})
+        for name, result in results["scenarios"].items():
+            latency = result["latency_ms"]
+            line = (
+                f"{name:<20} {result['throughput_rps']:>8.1f} {latency['p50']:>8.2f} {latency['p95']:>8.2f} "
+                f"{latency['p99']:>8.2f} {result['queries']['mean']:>8.1f} {result['errors']:>7}"
+            )
+            if name in previous and previous[name]["latency_ms"]["p95"]:
+                change = latency["p95"] / previous[name]["latency_ms"]["p95"] - 1
+                line += f"  p95 {change:+.0%} vs baseline"
+            self.stdout.write(line)
+            if result["first_error"]:
+                self.stdout.write(self.style.WARNING(f"  first error: {result['first_error']}"))
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from myapp.benchmarking import throwaway_database
+from myapp.seeding import seed_users
+
+PATHS = ["/me/", "/expense/types/", "/income/total/", "/ledger/"]
+AUTH_TABLES = ("django_session", "auth_user")
+
+
+def _modes():
+    standard = [
+        middleware.replace("myapp.middleware.CachedAuthenticationMiddleware",
+                           "django.contrib.auth.middleware.AuthenticationMiddleware")
+        for middleware in settings.MIDDLEWARE
+    ]
+    fast = [
+        middleware.replace("django.contrib.auth.middleware.AuthenticationMiddleware",
+                           "myapp.middleware.CachedAuthenticationMiddleware")
+        for middleware in settings.MIDDLEWARE
+    ]
+    return {
+        "standard": {"SESSION_ENGINE": "django.contrib.sessions.backends.db", "MIDDLEWARE": standard},
+        "fast": {"SESSION_ENGINE": "django.contrib.sessions.backends.cached_db", "MIDDLEWARE": fast},
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Per-request query counts (total and session/auth_user) of a few cheap endpoints with the "
+        "default DB sessions and with FAST_AUTH (cached_db sessions plus the cached user)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50, help="Requests per endpoint and mode.")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1:
+            raise CommandError("--requests must be positive")
+        self.stdout.write(f"{'mode':<10} {'endpoint':<18} {'queries':>8} {'auth q':>7} {'ms':>8}")
+        with throwaway_database():
+            user = seed_users(1, 200, 6)[0]
+            for mode, overrides in _modes().items():
+                caches[settings.FAST_AUTH_CACHE_ALIAS].clear()
+                with override_settings(**overrides):
+                    client = Client()
+                    client.force_login(user)
+                    for path in PATHS:
+                        self._measure(mode, client, path, options["requests"])
+
+    def _measure(self, mode: str, client: Client, path: str, requests: int) -> None:
+        client.get(path)  # 預熱快取
+        queries = auth_queries = 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as captured:
+                client.get(path)
+            queries += len(captured)
+            auth_queries += sum(
+                1 for query in captured.captured_queries
+                if any(table in query["sql"] for table in AUTH_TABLES)
+            )
+        elapsed = (time.perf_counter() - started) / requests * 1000
+        self.stdout.write(
+            f"{mode:<10} {path:<18} {queries / requests:>8.1f} {auth_queries / requests:>7.1f} {elapsed:>8.2f}"
+        )
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+import timeit
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from myapp import rendering
+
+
+def _ledger_payload(items: int) -> dict:
+    start = date(2025, 12, 31)
+    return {
+        "items": [
+            {
+                "id": index,
+                "kind": "expense" if index % 3 else "income",
+                "type": ("餐飲", "交通", "薪資", "娛樂")[index % 4],
+                "amount": Decimal(f"{index * 37 % 5000}.{index % 100:02d}"),
+                "date": (start - timedelta(days=index % 365)).strftime("%Y-%m-%d"),
+                "note": f"第 {index} 筆記錄",
+            }
+            for index in range(items)
+        ],
+        "page": 1,
+        "page_size": items,
+        "next": "WyIyMDI1LTEyLTAxIiwgMSwgImV4cGVuc2UiXQ",
+        "total": items * 10,
+    }
+
+
+def _report_payload() -> dict:
+    income = {name: Decimal("12345.67") for name in ("薪資", "獎助金", "投資", "其他")}
+    expense = {name: Decimal("2345.60") for name in ("食", "衣", "住", "行", "育", "樂")}
+    return {
+        "month": "2025-12",
+        "income": income,
+        "expense": expense,
+        "total_income": sum(income.values()),
+        "total_expense": sum(expense.values()),
+        "net": sum(income.values()) - sum(expense.values()),
+        "goals": [
+            {"name": f"目標{i}", "type": "expense", "target": 5000.0, "target_month": "2025-12-01",
+             "progress": 1234.5, "percentage": 24.69}
+            for i in range(5)
+        ],
+    }
+
+
+def _floats(payload):
+    """What the views do before handing data to JsonResponse: Decimal -> float by hand."""
+    if isinstance(payload, dict):
+        return {key: _floats(value) for key, value in payload.items()}
+    if isinstance(payload, list):
+        return [_floats(value) for value in payload]
+    if isinstance(payload, Decimal):
+        return float(payload)
+    return payload
+
+
+def _django_json(payload) -> bytes:
+    return json.dumps(_floats(payload), cls=DjangoJSONEncoder).encode("utf-8")
+
+
+class Command(BaseCommand):
+    help = "Compare JSON encoding time and size of a large ledger page and a report overview payload."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=1000, help="Rows in the ledger page.")
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def handle(self, *args, **options):
+        encoders = [("JsonResponse (stdlib)", _django_json), ("fast: stdlib", rendering.stdlib_dumps)]
+        if rendering.orjson is not None:
+            encoders.append(("fast: orjson", rendering.orjson_dumps))
+        else:
+            self.stdout.write(self.style.WARNING("orjson is not installed; only the stdlib paths are measured"))
+
+        payloads = [
+            (f"ledger ({options['items']} items)", _ledger_payload(options["items"])),
+            ("report_overview", _report_payload()),
+        ]
+        iterations = options["iterations"]
+        for label, payload in payloads:
+            self.stdout.write(label)
+            baseline = None
+            for name, encode in encoders:
+                seconds = min(timeit.repeat(lambda: encode(payload), number=iterations, repeat=3))
+                per_call = seconds / iterations * 1e6
+                baseline = baseline or per_call
+                self.stdout.write(
+                    f"  {name:<22} {per_call:>10.1f} µs/op  {len(encode(payload)):>9} bytes  "
+                    f"x{baseline / per_call:.1f}"
+                )
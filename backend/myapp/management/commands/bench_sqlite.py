@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from datetime import date
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from myapp.benchmarking import bench_users_for, environment, run_write_contention
+from myapp.seeding import seed_users
+
+PROFILES = ("default", "production")
+CATEGORIES = 6
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare write throughput and 'database is locked' errors of concurrent create_expense "
+        "calls from several processes (like gunicorn workers) on a fresh SQLite file, with the "
+        "default connection settings and with the SQLITE_PRODUCTION profile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=3, help="Writing processes.")
+        parser.add_argument("--readers", type=int, default=1, help="Processes reading the ledger meanwhile.")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per process.")
+        parser.add_argument("--entries", type=int, default=500, help="Entries seeded per user.")
+        parser.add_argument("--profile", action="append", dest="profiles", choices=PROFILES)
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("bench_sqlite needs the SQLite database engine")
+        if options["writers"] < 1 or options["readers"] < 0 or options["requests"] < 1:
+            raise CommandError("--writers and --requests must be positive")
+
+        results = {"environment": environment(), "parameters": {
+            key: options[key] for key in ("writers", "readers", "requests", "entries")
+        }, "profiles": {}}
+        setup_test_environment()
+        try:
+            for profile in options["profiles"] or PROFILES:
+                results["profiles"][profile] = self._run_profile(profile, options)
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"{'profile':<12} {'writes/s':>9} {'locked':>8} {'lock rate':>10} {'w p95 ms':>9} "
+            f"{'w p99 ms':>9} {'reads/s':>8}"
+        )
+        for profile, result in results["profiles"].items():
+            writers, readers = result["writers"], result.get("readers")
+            self.stdout.write(
+                f"{profile:<12} {writers['ok_per_second']:>9.1f} {writers['locked']:>8} "
+                f"{writers['lock_error_rate']:>10.1%} {writers['latency_ms']['p95']:>9.1f} "
+                f"{writers['latency_ms']['p99']:>9.1f} "
+                f"{readers['ok_per_second'] if readers else 0:>8.1f}"
+            )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                json.dump(results, fh, ensure_ascii=False, indent=2)
+            self.stdout.write(f"results written to {options['output']}")
+
+    def _run_profile(self, profile: str, options) -> dict:
+        settings_dict = connection.settings_dict
+        saved = settings_dict["NAME"], settings_dict.get("OPTIONS", {})
+        handle, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        connection.close()
+        settings_dict["NAME"] = path
+        settings_dict["OPTIONS"] = dict(settings.SQLITE_PRODUCTION_OPTIONS) if profile == "production" else {}
+        try:
+            call_command("migrate", verbosity=0, interactive=False)
+            month = date.today().replace(day=1)
+            users = seed_users(
+                options["writers"] + options["readers"], options["entries"], CATEGORIES, end=month
+            )
+            bench_users = bench_users_for(users, "bench-pass", CATEGORIES, month)
+            self.stdout.write(f"running {profile} profile ...")
+            return run_write_contention(
+                users, bench_users, options["writers"], options["readers"], options["requests"]
+            )
+        finally:
+            connection.close()
+            settings_dict["NAME"], settings_dict["OPTIONS"] = saved
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.importing import IMPORT_FORMATS, EntryImporter, iter_csv_rows, iter_json_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import income/expense entries for a user from a CSV or JSON array file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="Owner of the imported entries.")
+        parser.add_argument("path", help="CSV (with header row) or JSON array file.")
+        parser.add_argument(
+            "--format",
+            dest="fmt",
+            choices=IMPORT_FORMATS,
+            help="File format. Defaults to the file extension.",
+        )
+        parser.add_argument(
+            "--kind",
+            choices=("expense", "income"),
+            help="Treat every row as this kind instead of reading a 'kind' column.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=500,
+            help="Rows per bulk insert transaction. Defaults to 500.",
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist as exc:
+            raise CommandError(f"User {options['username']!r} does not exist") from exc
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        path = options["path"]
+        fmt = options["fmt"] or ("csv" if path.lower().endswith(".csv") else "json")
+        importer = EntryImporter(user, kind=options["kind"], batch_size=options["batch_size"])
+        with open(path, "rb") as stream:
+            rows = iter_csv_rows(stream) if fmt == "csv" else iter_json_rows(stream)
+            result = importer.run(rows)
+
+        for error in result.errors:
+            self.stderr.write(f"row {error['row']}: {error['error']}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {result.created} entries, {len(result.errors)} rows failed")
+        )
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.benchmarking import percentile, session_key_for
+
+DEFAULT_PATHS = ["/report/overview/", "/insights/", "/ledger/", "/income/total/", "/expense/totals/"]
+
+
+def _session_for(username: str) -> str:
+    try:
+        user = get_user_model().objects.get(username=username)
+    except get_user_model().DoesNotExist as exc:
+        raise CommandError(f"User '{username}' does not exist") from exc
+    return session_key_for(user)
+
+
+class Command(BaseCommand):
+    help = (
+        "Send concurrent GET requests to a running server and report throughput and latency per "
+        "concurrency level. With async views under uvicorn, throughput keeps rising past the number "
+        "of workers; with sync workers it levels off at the worker count."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="Requests are sent logged in as this user.")
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server base URL.")
+        parser.add_argument("--path", action="append", dest="paths", help="Path to request (repeatable).")
+        parser.add_argument("--concurrency", default="1,3,6,12,24", help="Comma separated client counts.")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level.")
+        parser.add_argument("--timeout", type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options["concurrency"].split(",")]
+        except ValueError as exc:
+            raise CommandError("--concurrency must be comma separated integers") from exc
+        if any(level < 1 for level in levels) or options["requests"] < 1:
+            raise CommandError("--concurrency and --requests must be positive")
+
+        cookie = f"{settings.SESSION_COOKIE_NAME}={_session_for(options['username'])}"
+        base = options["url"].rstrip("/")
+        urls = [base + path for path in options["paths"] or DEFAULT_PATHS]
+        timeout = options["timeout"]
+
+        errors = []
+        lock = threading.Lock()
+
+        def fetch(index: int) -> float:
+            request = urllib.request.Request(urls[index % len(urls)], headers={"Cookie": cookie})
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=timeout) as response:
+                    response.read()
+            except (urllib.error.URLError, OSError) as exc:
+                with lock:
+                    errors.append(exc)
+            return time.perf_counter() - started
+
+        self.stdout.write(f"{'clients':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+        for level in levels:
+            errors.clear()
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=level) as pool:
+                latencies = sorted(pool.map(fetch, range(options["requests"])))
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{level:>8} {len(latencies) / elapsed:>9.1f} {percentile(latencies, 50) * 1000:>9.1f} "
+                f"{percentile(latencies, 95) * 1000:>9.1f} {len(errors):>7}"
+            )
+            if errors:
+                self.stdout.write(self.style.WARNING(f"  first error: {errors[0]}"))
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from myapp.rollups import rebuild_rollups, reconcile_rollups
+
+
+class Command(BaseCommand):
+    help = "Reconcile (or fully rebuild) the monthly income/expense rollups against the raw entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user-id",
+            dest="user_ids",
+            type=int,
+            action="append",
+            help="Limit to this user id. May be given more than once.",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Drop and recompute the rollups instead of repairing only the drifted rows.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drift without changing anything.",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options.get("user_ids")
+        if options["rebuild"] and not options["dry_run"]:
+            created = rebuild_rollups(user_ids)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} rollup rows"))
+            return
+
+        drifts = reconcile_rollups(user_ids, fix=not options["dry_run"])
+        for drift in drifts:
+            self.stdout.write(
+                f"{drift.kind} user={drift.user_id} category={drift.category_id} "
+                f"{drift.month:%Y-%m}: expected {drift.expected_total} ({drift.expected_count}), "
+                f"found {drift.actual_total} ({drift.actual_count})"
+            )
+        action = "Found" if options["dry_run"] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(f"{action} {len(drifts)} drifted rollup rows"))
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from myapp.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Reconcile the per-user quota counters (entries and categories per kind) against the tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user-id",
+            dest="user_ids",
+            type=int,
+            action="append",
+            help="Limit to this user id. May be given more than once.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drift without changing anything.",
+        )
+
+    def handle(self, *args, **options):
+        drifts = reconcile_counters(options.get("user_ids"), fix=not options["dry_run"])
+        for drift in drifts:
+            found = "no counters row" if drift.actual is None else drift.actual
+            self.stdout.write(
+                f"user={drift.user_id} {drift.field}: expected {drift.expected}, found {found}"
+            )
+        action = "Found" if options["dry_run"] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(f"{action} {len(drifts)} drifted counters"))
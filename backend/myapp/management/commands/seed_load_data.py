@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.seeding import LoadStats, seed_load_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate production-scale data: users with realistic categories, goals, monthly reports and "
+        "income/expense entries spread over several years. Deterministic for a given --seed; written "
+        "with chunked bulk_create, one transaction per batch of users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--entries", type=int, default=1000, help="Average entries per user.")
+        parser.add_argument("--years", type=int, default=3, help="Years of history ending today.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--prefix", default="load", help="Username prefix of the generated users.")
+        parser.add_argument("--password", default="load-pass", help="Password of every generated user.")
+        parser.add_argument("--batch-users", type=int, default=200, help="Users written per transaction.")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per bulk INSERT.")
+        parser.add_argument("--no-goals", action="store_true")
+        parser.add_argument("--no-reports", action="store_true")
+
+    def handle(self, *args, **options):
+        if min(options["users"], options["years"], options["batch_users"], options["chunk_size"]) < 1:
+            raise CommandError("--users, --years, --batch-users and --chunk-size must be positive")
+        if options["entries"] < 0:
+            raise CommandError("--entries must not be negative")
+        if get_user_model().objects.filter(username__startswith=options["prefix"]).exists():
+            raise CommandError(
+                f"Users named '{options['prefix']}...' already exist; pick another --prefix"
+            )
+
+        started = time.perf_counter()
+
+        def progress(stats: LoadStats):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{stats.users}/{options['users']} users, {stats.entries} entries "
+                f"({stats.entries / elapsed:,.0f} rows/s)"
+            )
+
+        stats = seed_load_data(
+            options["users"],
+            options["entries"],
+            years=options["years"],
+            seed=options["seed"],
+            prefix=options["prefix"],
+            password=options["password"],
+            batch_users=options["batch_users"],
+            goals=not options["no_goals"],
+            reports=not options["no_reports"],
+            chunk_size=options["chunk_size"],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {stats.users} users, {stats.categories} categories, {stats.entries} entries, "
+            f"{stats.goals} goals and {stats.reports} reports in {time.perf_counter() - started:.1f}s"
+        ))
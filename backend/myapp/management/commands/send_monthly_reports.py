@@ -4,7 +4,7 @@ from datetime import date
 
 from django.core.management.base import BaseCommand, CommandError
 
-from myapp.services import generate_monthly_reports
+from myapp.services import generate_monthly_reports, generate_monthly_reports_batch
 
 
 class Command(BaseCommand):
@@ -17,6 +17,25 @@ class Command(BaseCommand):
             type=str,
             help="Report month in YYYY-MM format. Defaults to previous month.",
         )
+        parser.add_argument(
+            "--batch",
+            action="store_true",
+            help="Use the set-based batch mode (grouped queries, bulk upserts).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            dest="chunk_size",
+            type=int,
+            default=1000,
+            help="Users per batch chunk. Defaults to 1000.",
+        )
+        parser.add_argument(
+            "--workers",
+            dest="workers",
+            type=int,
+            default=1,
+            help="Worker processes for batch mode. Defaults to 1 (in-process).",
+        )
 
     def handle(self, *args, **options):
         month_str = options.get("month")
@@ -26,9 +45,23 @@ class Command(BaseCommand):
                 target_month = date.fromisoformat(f"{month_str}-01")
             except ValueError as exc:
                 raise CommandError("--month must follow YYYY-MM format") from exc
-        generate_monthly_reports(target_month)
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"Monthly reports sent for {(target_month or 'previous month')}"
+        if options["batch"]:
+            if options["chunk_size"] < 1 or options["workers"] < 1:
+                raise CommandError("--chunk-size and --workers must be positive")
+            result = generate_monthly_reports_batch(
+                target_month,
+                chunk_size=options["chunk_size"],
+                workers=options["workers"],
+            )
+        else:
+            result = generate_monthly_reports(target_month)
+        month = target_month or "previous month"
+        if result.failed:
+            self.stderr.write(
+                f"Generated {result.generated} reports for {month}; "
+                f"{result.failed} emails could not be sent and stay undelivered"
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Monthly reports sent for {month}: {result.generated} reports")
             )
-        )
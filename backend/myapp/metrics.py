@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import bisect
+import contextvars
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .summary_cache import summary_cache
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimings:
+    """What one sampled request spent, filled in by the query and serialization hooks."""
+
+    __slots__ = ("started", "queries", "db_seconds", "serialize_seconds", "_lock")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        # async 視圖的查詢可能同時在幾個執行緒上執行
+        self._lock = threading.Lock()
+
+    def add_query(self, seconds: float) -> None:
+        with self._lock:
+            self.queries += 1
+            self.db_seconds += seconds
+
+    def add_serialization(self, seconds: float) -> None:
+        with self._lock:
+            self.serialize_seconds += seconds
+
+    def server_timing(self, total: float) -> str:
+        view = max(0.0, total - self.db_seconds - self.serialize_seconds)
+        return (
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries", '
+            f"view;dur={view * 1000:.1f}, "
+            f"serialize;dur={self.serialize_seconds * 1000:.1f}, "
+            f"total;dur={total * 1000:.1f}"
+        )
+
+
+# 目前請求的計時；sync_to_async 會把 context 帶進執行緒，async 視圖的查詢也記得到
+_current: contextvars.ContextVar[RequestTimings | None] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def start_request() -> Tuple[RequestTimings, contextvars.Token]:
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+@contextmanager
+def timed_serialization():
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add_serialization(time.perf_counter() - started)
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(time.perf_counter() - started)
+
+
+@receiver(connection_created)
+def _install_query_timer(sender, connection, **kwargs):
+    # 未取樣的請求只多一次 ContextVar 讀取
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+    def state(self) -> list:
+        return [list(self.counts), self.total, self.count]
+
+    def absorb(self, state: list) -> None:
+        counts, total, count = state
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, counts)]
+        self.total += total
+        self.count += count
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+
+
+def _snapshot_files(directory: str) -> Iterator[dict]:
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        try:
+            with open(path, encoding="utf-8") as fh:
+                yield json.load(fh)
+        except (OSError, ValueError):
+            logger.warning("Skipping unreadable metrics snapshot %s", path, exc_info=True)
+
+
+class MetricsRegistry:
+    """Per-process request metrics, rendered in the Prometheus text format.
+
+    Every request is counted; latency, query-count and DB/serialization time
+    are only recorded for sampled requests (see METRICS_SAMPLE_RATE).
+
+    Each gunicorn/uvicorn worker has its own registry. With METRICS_DIR set,
+    every process writes its snapshot there (at most every
+    METRICS_FLUSH_INTERVAL seconds) and /metrics/ sums all snapshots, so any
+    worker answers for the whole server; without it a scrape only sees the
+    worker that served it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flushed_at = 0.0
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests: Dict[Tuple[str, str, int], int] = {}
+            self.latency: Dict[str, Histogram] = {}
+            self.queries: Dict[str, Histogram] = {}
+            self.db_seconds: Dict[str, float] = {}
+            self.serialize_seconds: Dict[str, float] = {}
+
+    def count_request(self, route: str, method: str, status: int) -> None:
+        key = (route, method, status)
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def observe(self, route: str, total: float, timings: RequestTimings) -> None:
+        with self._lock:
+            if route not in self.latency:
+                self.latency[route] = Histogram(LATENCY_BUCKETS)
+                self.queries[route] = Histogram(QUERY_BUCKETS)
+            self.latency[route].observe(total)
+            self.queries[route].observe(timings.queries)
+            self.db_seconds[route] = self.db_seconds.get(route, 0.0) + timings.db_seconds
+            self.serialize_seconds[route] = (
+                self.serialize_seconds.get(route, 0.0) + timings.serialize_seconds
+            )
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            snapshot = {
+                "requests": [[*key, count] for key, count in self.requests.items()],
+                "latency": {route: histogram.state() for route, histogram in self.latency.items()},
+                "queries": {route: histogram.state() for route, histogram in self.queries.items()},
+                "db_seconds": dict(self.db_seconds),
+                "serialize_seconds": dict(self.serialize_seconds),
+            }
+        snapshot["summary_cache"] = summary_cache.stats()
+        return snapshot
+
+    def absorb(self, snapshot: dict) -> None:
+        """Add another process's snapshot to this registry."""
+        with self._lock:
+            for route, method, status, count in snapshot["requests"]:
+                key = (route, method, status)
+                self.requests[key] = self.requests.get(key, 0) + count
+            for name, buckets in (("latency", LATENCY_BUCKETS), ("queries", QUERY_BUCKETS)):
+                histograms = getattr(self, name)
+                for route, state in snapshot[name].items():
+                    histograms.setdefault(route, Histogram(buckets)).absorb(state)
+            for name in ("db_seconds", "serialize_seconds"):
+                totals = getattr(self, name)
+                for route, seconds in snapshot[name].items():
+                    totals[route] = totals.get(route, 0.0) + seconds
+
+    def flush(self, force: bool = False) -> None:
+        """Write this process's snapshot to METRICS_DIR; a no-op when it is not set."""
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._flushed_at < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self._flushed_at = now
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        # 先寫暫存檔再改名，讀取端不會讀到寫到一半的檔案
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(temporary, path)
+
+    @staticmethod
+    def _histogram_lines(name: str, histograms: Dict[str, Histogram]) -> List[str]:
+        lines = []
+        for route, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{_labels(route=route, le=bound)}}} {cumulative}')
+            lines.append(f'{name}_bucket{{{_labels(route=route, le="+Inf")}}} {histogram.count}')
+            lines.append(f"{name}_sum{{{_labels(route=route)}}} {histogram.total}")
+            lines.append(f"{name}_count{{{_labels(route=route)}}} {histogram.count}")
+        return lines
+
+    def render(self) -> str:
+        """This process's metrics, or with METRICS_DIR the sum over every process's snapshot."""
+        if not settings.METRICS_DIR:
+            return self._render(summary_cache.stats())
+        self.flush(force=True)
+        combined = MetricsRegistry()
+        cache_stats = Counter()
+        for snapshot in _snapshot_files(settings.METRICS_DIR):
+            combined.absorb(snapshot)
+            cache_stats.update(snapshot["summary_cache"])
+        return combined._render({"hits": cache_stats["hits"], "misses": cache_stats["misses"]})
+
+    def _render(self, cache_stats: Dict[str, int]) -> str:
+        with self._lock:
+            lines = [
+                "# HELP myapp_requests_total Requests handled, by URL pattern, method and status.",
+                "# TYPE myapp_requests_total counter",
+            ]
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f"myapp_requests_total{{{_labels(route=route, method=method, status=status)}}} {count}"
+                )
+            lines += [
+                "# HELP myapp_request_duration_seconds Latency of sampled requests.",
+                "# TYPE myapp_request_duration_seconds histogram",
+                *self._histogram_lines("myapp_request_duration_seconds", self.latency),
+                "# HELP myapp_request_queries Database queries per sampled request.",
+                "# TYPE myapp_request_queries histogram",
+                *self._histogram_lines("myapp_request_queries", self.queries),
+                "# HELP myapp_request_db_seconds_total Database time of sampled requests.",
+                "# TYPE myapp_request_db_seconds_total counter",
+                *(
+                    f"myapp_request_db_seconds_total{{{_labels(route=route)}}} {seconds}"
+                    for route, seconds in sorted(self.db_seconds.items())
+                ),
+                "# HELP myapp_request_serialize_seconds_total Response serialization time of sampled requests.",
+                "# TYPE myapp_request_serialize_seconds_total counter",
+                *(
+                    f"myapp_request_serialize_seconds_total{{{_labels(route=route)}}} {seconds}"
+                    for route, seconds in sorted(self.serialize_seconds.items())
+                ),
+            ]
+        lines += [
+            "# HELP myapp_summary_cache_lookups_total Monthly summary cache lookups, by result.",
+            "# TYPE myapp_summary_cache_lookups_total counter",
+            f'myapp_summary_cache_lookups_total{{{_labels(result="hit")}}} {cache_stats["hits"]}',
+            f'myapp_summary_cache_lookups_total{{{_labels(result="miss")}}} {cache_stats["misses"]}',
+        ]
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import random
+import time
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from . import metrics
+from .auth_cache import aget_cached_user, get_cached_user
+
+
+class MetricsMiddleware:
+    """Count every request and time a sample of them (DB, serialization, total).
+
+    Sampled requests are added to the per-URL-pattern histograms served at
+    /metrics/; with METRICS_SERVER_TIMING every request is timed and gets a
+    Server-Timing header. Works for both sync and async views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _sampled() -> bool:
+        if settings.METRICS_SERVER_TIMING:
+            return True
+        rate = settings.METRICS_SAMPLE_RATE
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self._finish(request, self.get_response(request), None)
+        timings, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self._finish(request, response, timings)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return self._finish(request, await self.get_response(request), None)
+        timings, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self._finish(request, response, timings)
+
+    @staticmethod
+    def _finish(request, response, timings):
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match is not None else metrics.UNMATCHED_ROUTE
+        metrics.registry.count_request(route, request.method, response.status_code)
+        if timings is not None:
+            total = time.perf_counter() - timings.started
+            metrics.registry.observe(route, total, timings)
+            if settings.METRICS_SERVER_TIMING:
+                response["Server-Timing"] = timings.server_timing(total)
+        metrics.registry.flush()
+        return response
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware reading the user from a short-TTL cache (FAST_AUTH).
+
+    Together with the cached_db session engine, an authenticated request needs
+    no session or auth_user query while both are cached.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
+        request.auser = partial(aget_cached_user, request)
@@ -0,0 +1,80 @@
+# Generated by Django 6.0 on 2026-10-18 19:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_rollups(apps, schema_editor):
+    pairs = (
+        ("ExpenseEntry", "ExpenseMonthlyRollup"),
+        ("IncomeEntry", "IncomeMonthlyRollup"),
+    )
+    for entry_name, rollup_name in pairs:
+        entry_model = apps.get_model("myapp", entry_name)
+        rollup_model = apps.get_model("myapp", rollup_name)
+        rows = (
+            entry_model.objects.annotate(rollup_month=TruncMonth("entry_date"))
+            .values("user_id", "category_id", "rollup_month")
+            .annotate(sum_total=Sum("amount"), entry_count=Count("id"))
+            .order_by()
+        )
+        rollup_model.objects.bulk_create(
+            [
+                rollup_model(
+                    user_id=row["user_id"],
+                    category_id=row["category_id"],
+                    month=row["rollup_month"],
+                    total=row["sum_total"],
+                    entry_count=row["entry_count"],
+                )
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0003_alter_expenseentry_amount_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the rolled-up month.')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('entry_count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='myapp.expensecategory')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-month'],
+                'abstract': False,
+                'unique_together': {('user', 'month', 'category')},
+            },
+        ),
+        migrations.CreateModel(
+            name='IncomeMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the rolled-up month.')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('entry_count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='myapp.incomecategory')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-month'],
+                'abstract': False,
+                'unique_together': {('user', 'month', 'category')},
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 19:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0004_monthly_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expenseentry',
+            index=models.Index(fields=['user', 'entry_date', 'id'], name='myapp_expenseentry_user_date'),
+        ),
+        migrations.AddIndex(
+            model_name='expenseentry',
+            index=models.Index(fields=['user', 'category', 'entry_date'], name='myapp_expenseentry_user_cat'),
+        ),
+        migrations.AddIndex(
+            model_name='financialgoal',
+            index=models.Index(fields=['user', 'target_month', 'goal_type'], name='myapp_goal_user_month_type'),
+        ),
+        migrations.AddIndex(
+            model_name='incomeentry',
+            index=models.Index(fields=['user', 'entry_date', 'id'], name='myapp_incomeentry_user_date'),
+        ),
+        migrations.AddIndex(
+            model_name='incomeentry',
+            index=models.Index(fields=['user', 'category', 'entry_date'], name='myapp_incomeentry_user_cat'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 19:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_counters(apps, schema_editor):
+    # 既有使用者先建好一列，之後的刪除只需累加版本
+    user_model = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    counters_model = apps.get_model("myapp", "UserCounters")
+    counters_model.objects.bulk_create(
+        [counters_model(user_id=user_id) for user_id in user_model.objects.values_list("id", flat=True)],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('myapp', '0005_entry_and_goal_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCounters',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('data_version', models.PositiveBigIntegerField(default=0, help_text='Bumped on every entry, category or goal write.')),
+            ],
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
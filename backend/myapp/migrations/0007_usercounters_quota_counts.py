@@ -0,0 +1,66 @@
+# Generated by Django 6.0 on 2026-10-19 09:12
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+COUNTED_MODELS = {
+    "expense_entries": "ExpenseEntry",
+    "income_entries": "IncomeEntry",
+    "expense_categories": "ExpenseCategory",
+    "income_categories": "IncomeCategory",
+}
+
+
+def populate_quota_counts(apps, schema_editor):
+    user_model = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    counters_model = apps.get_model("myapp", "UserCounters")
+    existing = set(counters_model.objects.values_list("user_id", flat=True))
+    counters_model.objects.bulk_create(
+        [
+            counters_model(user_id=user_id)
+            for user_id in user_model.objects.values_list("id", flat=True)
+            if user_id not in existing
+        ],
+        batch_size=1000,
+    )
+    for field, model_name in COUNTED_MODELS.items():
+        rows = (
+            apps.get_model("myapp", model_name)
+            .objects.values("user_id")
+            .annotate(total=Count("id"))
+            .order_by()
+        )
+        for row in rows:
+            counters_model.objects.filter(user_id=row["user_id"]).update(**{field: row["total"]})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0006_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercounters',
+            name='expense_entries',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='usercounters',
+            name='income_entries',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='usercounters',
+            name='expense_categories',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='usercounters',
+            name='income_categories',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_quota_counts, migrations.RunPython.noop),
+    ]
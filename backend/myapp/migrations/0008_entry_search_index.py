@@ -0,0 +1,72 @@
+# Generated by Django 6.0 on 2026-10-19 14:05
+
+from django.db import migrations
+
+# (記錄表, 類別表)
+SEARCHED_TABLES = (
+    ("myapp_expenseentry", "myapp_expensecategory"),
+    ("myapp_incomeentry", "myapp_incomecategory"),
+)
+
+
+def _sqlite_statements(entry, category):
+    fts = f"{entry}_fts"
+    category_name = f"(SELECT name FROM {category} WHERE id = new.category_id)"
+    # 注意：SQLite 重建資料表（例如某些 AlterField）會連同觸發器一起刪除，
+    # 之後修改這幾張表的遷移需要重新建立觸發器
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5(note, category, tokenize='trigram')",
+        f"INSERT INTO {fts}(rowid, note, category) "
+        f"SELECT e.id, e.note, c.name FROM {entry} e JOIN {category} c ON c.id = e.category_id",
+        f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {entry} BEGIN "
+        f"INSERT INTO {fts}(rowid, note, category) VALUES (new.id, new.note, {category_name}); END",
+        f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {entry} BEGIN "
+        f"DELETE FROM {fts} WHERE rowid = old.id; END",
+        f"CREATE TRIGGER {fts}_update AFTER UPDATE OF note, category_id ON {entry} BEGIN "
+        f"UPDATE {fts} SET note = new.note, category = {category_name} WHERE rowid = old.id; END",
+        f"CREATE TRIGGER {fts}_rename AFTER UPDATE OF name ON {category} BEGIN "
+        f"UPDATE {fts} SET category = new.name "
+        f"WHERE rowid IN (SELECT id FROM {entry} WHERE category_id = new.id); END",
+    ]
+
+
+def _postgresql_statements(entry, category):
+    return [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"CREATE INDEX {entry}_note_trgm ON {entry} USING gin (note gin_trgm_ops)",
+        f"CREATE INDEX {category}_name_trgm ON {category} USING gin (name gin_trgm_ops)",
+    ]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    builders = {"sqlite": _sqlite_statements, "postgresql": _postgresql_statements}
+    if vendor not in builders:
+        return
+    for entry, category in SEARCHED_TABLES:
+        for statement in builders[vendor](entry, category):
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for entry, category in SEARCHED_TABLES:
+        if vendor == "sqlite":
+            fts = f"{entry}_fts"
+            for suffix in ("insert", "delete", "update", "rename"):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            schema_editor.execute(f"DROP TABLE IF EXISTS {fts}")
+        elif vendor == "postgresql":
+            schema_editor.execute(f"DROP INDEX IF EXISTS {entry}_note_trgm")
+            schema_editor.execute(f"DROP INDEX IF EXISTS {category}_name_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0007_usercounters_quota_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
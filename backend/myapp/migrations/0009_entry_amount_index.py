@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 16:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_entry_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expenseentry',
+            index=models.Index(fields=['user', 'amount', 'id'], name='myapp_expenseentry_user_amount'),
+        ),
+        migrations.AddIndex(
+            model_name='incomeentry',
+            index=models.Index(fields=['user', 'amount', 'id'], name='myapp_incomeentry_user_amount'),
+        ),
+    ]
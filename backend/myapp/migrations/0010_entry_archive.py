@@ -0,0 +1,113 @@
+# Generated by Django 6.0 on 2026-10-19 18:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# 與 0008 相同的搜尋索引，建在封存表上：(封存表, 類別表)
+ARCHIVE_TABLES = (
+    ("myapp_archivedexpenseentry", "myapp_expensecategory"),
+    ("myapp_archivedincomeentry", "myapp_incomecategory"),
+)
+
+
+def _sqlite_statements(entry, category):
+    fts = f"{entry}_fts"
+    # 封存的記錄不再修改，只需跟著新增、刪除與類別改名
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5(note, category, tokenize='trigram')",
+        f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {entry} BEGIN "
+        f"INSERT INTO {fts}(rowid, note, category) "
+        f"VALUES (new.id, new.note, (SELECT name FROM {category} WHERE id = new.category_id)); END",
+        f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {entry} BEGIN "
+        f"DELETE FROM {fts} WHERE rowid = old.id; END",
+        f"CREATE TRIGGER {fts}_rename AFTER UPDATE OF name ON {category} BEGIN "
+        f"UPDATE {fts} SET category = new.name "
+        f"WHERE rowid IN (SELECT id FROM {entry} WHERE category_id = new.id); END",
+    ]
+
+
+def create_archive_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for entry, category in ARCHIVE_TABLES:
+        if vendor == "sqlite":
+            for statement in _sqlite_statements(entry, category):
+                schema_editor.execute(statement)
+        elif vendor == "postgresql":
+            schema_editor.execute(f"CREATE INDEX {entry}_note_trgm ON {entry} USING gin (note gin_trgm_ops)")
+
+
+def drop_archive_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for entry, category in ARCHIVE_TABLES:
+        if vendor == "sqlite":
+            fts = f"{entry}_fts"
+            for suffix in ("insert", "delete", "rename"):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            schema_editor.execute(f"DROP TABLE IF EXISTS {fts}")
+        elif vendor == "postgresql":
+            schema_editor.execute(f"DROP INDEX IF EXISTS {entry}_note_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0009_entry_amount_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('before', models.DateField()),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('expense_entries', models.IntegerField(default=0)),
+                ('income_entries', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedExpenseEntry',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('entry_date', models.DateField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_entries', to='myapp.expensecategory')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-entry_date', '-id'],
+                'abstract': False,
+                'indexes': [models.Index(fields=['user', 'entry_date', 'id'], name='myapp_archexpense_user_date'), models.Index(fields=['user', 'category', 'entry_date'], name='myapp_archexpense_user_cat'), models.Index(fields=['user', 'amount', 'id'], name='myapp_archexpense_user_amount')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedIncomeEntry',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('entry_date', models.DateField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_entries', to='myapp.incomecategory')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-entry_date', '-id'],
+                'abstract': False,
+                'indexes': [models.Index(fields=['user', 'entry_date', 'id'], name='myapp_archincome_user_date'), models.Index(fields=['user', 'category', 'entry_date'], name='myapp_archincome_user_cat'), models.Index(fields=['user', 'amount', 'id'], name='myapp_archincome_user_amount')],
+            },
+        ),
+        migrations.RunPython(create_archive_search_index, drop_archive_search_index),
+    ]
@@ -1,7 +1,7 @@
 from datetime import date
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 
 
 class TimeStampedModel(models.Model):
@@ -47,6 +47,41 @@ class EntryBase(TimeStampedModel):
 	class Meta:
 		abstract = True
 		ordering = ["-entry_date", "-created_at"]
+		indexes = [
+			# 每位使用者依日期區間查詢與 (entry_date, id) 排序分頁
+			models.Index(
+				fields=["user", "entry_date", "id"],
+				name="%(app_label)s_%(class)s_user_date",
+			),
+			# 依類別加上日期區間的查詢
+			models.Index(
+				fields=["user", "category", "entry_date"],
+				name="%(app_label)s_%(class)s_user_cat",
+			),
+			# 金額區間篩選與依金額的排序分頁
+			models.Index(
+				fields=["user", "amount", "id"],
+				name="%(app_label)s_%(class)s_user_amount",
+			),
+		]
+
+	@classmethod
+	def from_db(cls, db, field_names, values):
+		instance = super().from_db(db, field_names, values)
+		# 記住資料庫中的原始值，更新時用來修正月度彙總
+		instance._rollup_state = instance.rollup_state()
+		return instance
+
+	def rollup_state(self):
+		deferred = self.get_deferred_fields()
+		if deferred & {"user_id", "category_id", "entry_date", "amount"}:
+			return None
+		return (self.user_id, self.category_id, self.entry_date.replace(day=1), self.amount)
+
+	def save(self, *args, **kwargs):
+		# 彙總表由 post_save 訊號維護，與記錄本身寫入同一個交易
+		with transaction.atomic(using=kwargs.get("using")):
+			super().save(*args, **kwargs)
 
 
 class ExpenseEntry(EntryBase):
@@ -67,6 +102,96 @@ class IncomeEntry(EntryBase):
 		return f"Income {self.category.name} {self.amount}"
 
 
+class ArchivedEntryBase(models.Model):
+	"""An entry moved out of the hot table by archiving.entries; keeps its id and timestamps."""
+
+	id = models.BigIntegerField(primary_key=True)
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+	amount = models.DecimalField(max_digits=20, decimal_places=2)
+	note = models.CharField(max_length=255, blank=True)
+	entry_date = models.DateField()
+	created_at = models.DateTimeField()
+	updated_at = models.DateTimeField()
+	archived_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		abstract = True
+		ordering = ["-entry_date", "-id"]
+
+
+def _archive_indexes(prefix: str):
+	# 與 EntryBase 相同的索引，ledger 的篩選與排序同樣適用（名稱長度上限 30）
+	return [
+		models.Index(fields=["user", "entry_date", "id"], name=f"{prefix}_user_date"),
+		models.Index(fields=["user", "category", "entry_date"], name=f"{prefix}_user_cat"),
+		models.Index(fields=["user", "amount", "id"], name=f"{prefix}_user_amount"),
+	]
+
+
+class ArchivedExpenseEntry(ArchivedEntryBase):
+	category = models.ForeignKey(
+		ExpenseCategory, related_name="archived_entries", on_delete=models.CASCADE
+	)
+
+	class Meta(ArchivedEntryBase.Meta):
+		indexes = _archive_indexes("myapp_archexpense")
+
+
+class ArchivedIncomeEntry(ArchivedEntryBase):
+	category = models.ForeignKey(
+		IncomeCategory, related_name="archived_entries", on_delete=models.CASCADE
+	)
+
+	class Meta(ArchivedEntryBase.Meta):
+		indexes = _archive_indexes("myapp_archincome")
+
+
+class ArchiveRun(models.Model):
+	"""One run of the archiver: entries dated before ``before`` were moved to the archive tables."""
+
+	before = models.DateField()
+	started_at = models.DateTimeField(auto_now_add=True)
+	finished_at = models.DateTimeField(null=True, blank=True)
+	expense_entries = models.IntegerField(default=0)
+	income_entries = models.IntegerField(default=0)
+
+	class Meta:
+		ordering = ["-started_at"]
+
+	def __str__(self) -> str:
+		return f"Archive before {self.before}"
+
+
+class MonthlyRollupBase(models.Model):
+	"""Per-user, per-category, per-month running totals maintained on every entry write."""
+
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+	month = models.DateField(help_text="First day of the rolled-up month.")
+	total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+	entry_count = models.IntegerField(default=0)
+
+	class Meta:
+		abstract = True
+		# 以 (user, month) 為前綴，月份區間查詢可直接使用唯一索引
+		unique_together = ("user", "month", "category")
+		ordering = ["-month"]
+
+	def __str__(self) -> str:
+		return f"{self.user_id}:{self.category_id} {self.month:%Y-%m} {self.total}"
+
+
+class ExpenseMonthlyRollup(MonthlyRollupBase):
+	category = models.ForeignKey(
+		ExpenseCategory, related_name="rollups", on_delete=models.CASCADE
+	)
+
+
+class IncomeMonthlyRollup(MonthlyRollupBase):
+	category = models.ForeignKey(
+		IncomeCategory, related_name="rollups", on_delete=models.CASCADE
+	)
+
+
 def first_day_of_current_month() -> date:
 	today = date.today()
 	return today.replace(day=1)
@@ -92,6 +217,12 @@ class FinancialGoal(TimeStampedModel):
 	class Meta:
 		unique_together = ("user", "name", "goal_type", "target_month")
 		ordering = ["-target_month", "name"]
+		indexes = [
+			models.Index(
+				fields=["user", "target_month", "goal_type"],
+				name="myapp_goal_user_month_type",
+			),
+		]
 
 	def __str__(self) -> str:
 		return f"{self.name} ({self.goal_type})"
@@ -109,3 +240,25 @@ class MonthlyReport(TimeStampedModel):
 
 	def __str__(self) -> str:
 		return f"Report {self.user.username} {self.month:%Y-%m}"
+
+
+class UserCounters(models.Model):
+	"""Per-user counters kept up to date by the write paths, one row per user."""
+
+	user = models.OneToOneField(
+		settings.AUTH_USER_MODEL,
+		primary_key=True,
+		related_name="counters",
+		on_delete=models.CASCADE,
+	)
+	data_version = models.PositiveBigIntegerField(
+		default=0, help_text="Bumped on every entry, category or goal write."
+	)
+	# 配額檢查直接讀這幾個欄位，不必每次新增前 COUNT(*)
+	expense_entries = models.IntegerField(default=0)
+	income_entries = models.IntegerField(default=0)
+	expense_categories = models.IntegerField(default=0)
+	income_categories = models.IntegerField(default=0)
+
+	def __str__(self) -> str:
+		return f"Counters {self.user_id} v{self.data_version}"
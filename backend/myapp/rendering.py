@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import datetime
+import json
+import uuid
+from decimal import Decimal
+from typing import Any, Callable
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+from .metrics import timed_serialization
+
+try:
+    import orjson
+except ImportError:  # orjson 為選用的加速套件，沒有時退回標準庫
+    orjson = None
+
+JSON_CONTENT_TYPE = "application/json"
+
+
+def _default(value: Any):
+    """Types neither encoder handles natively; amounts become numbers as the API always returned."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Promise):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (set, frozenset, tuple)) or hasattr(value, "__iter__"):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def stdlib_dumps(data: Any) -> bytes:
+    return json.dumps(
+        data, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def orjson_dumps(data: Any) -> bytes:
+    return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _select_dumps(backend: str) -> Callable[[Any], bytes]:
+    if backend == "stdlib":
+        return stdlib_dumps
+    if backend == "orjson" and orjson is None:
+        raise ImportError("JSON_BACKEND is 'orjson' but orjson is not installed")
+    return orjson_dumps if orjson is not None else stdlib_dumps
+
+
+dumps = _select_dumps(settings.JSON_BACKEND)
+
+
+class FastJsonResponse(JsonResponse):
+    """JsonResponse encoded with the configured fast encoder (Decimal and dates included)."""
+
+    def __init__(self, data: Any, **kwargs):
+        kwargs.setdefault("content_type", JSON_CONTENT_TYPE)
+        with timed_serialization():
+            content = dumps(data)
+        HttpResponse.__init__(self, content=content, **kwargs)
+
+
+class FastJSONRenderer(BaseRenderer):
+    """DRF renderer using the same encoder as FastJsonResponse."""
+
+    media_type = JSON_CONTENT_TYPE
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        with timed_serialization():
+            return dumps(data)
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import (
+    ArchivedExpenseEntry,
+    ArchivedIncomeEntry,
+    ExpenseEntry,
+    ExpenseMonthlyRollup,
+    IncomeEntry,
+    IncomeMonthlyRollup,
+)
+
+DECIMAL_ZERO = Decimal("0")
+
+KIND_EXPENSE = "expense"
+KIND_INCOME = "income"
+
+ENTRY_MODELS = {
+    KIND_EXPENSE: ExpenseEntry,
+    KIND_INCOME: IncomeEntry,
+}
+
+# 封存的記錄仍計入彙總，報表不必讀封存表
+ARCHIVE_MODELS = {
+    KIND_EXPENSE: ArchivedExpenseEntry,
+    KIND_INCOME: ArchivedIncomeEntry,
+}
+
+ROLLUP_MODELS = {
+    KIND_EXPENSE: ExpenseMonthlyRollup,
+    KIND_INCOME: IncomeMonthlyRollup,
+}
+
+RollupKey = Tuple[int, int, date]
+
+
+@dataclass
+class RollupDrift:
+    kind: str
+    user_id: int
+    category_id: int
+    month: date
+    expected_total: Decimal
+    expected_count: int
+    actual_total: Decimal
+    actual_count: int
+
+
+def kind_of(entry_model) -> str:
+    for kind, model in ENTRY_MODELS.items():
+        if issubclass(entry_model, model):
+            return kind
+    raise ValueError(f"{entry_model.__name__} is not an entry model")
+
+
+def apply_delta(
+    kind: str,
+    user_id: int,
+    category_id: int,
+    month: date,
+    amount: Decimal,
+    count: int,
+) -> None:
+    model = ROLLUP_MODELS[kind]
+    rows = model.objects.filter(user_id=user_id, category_id=category_id, month=month)
+    updated = rows.update(
+        total=F("total") + amount, entry_count=F("entry_count") + count
+    )
+    if updated or count <= 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(
+                user_id=user_id,
+                category_id=category_id,
+                month=month,
+                total=amount,
+                entry_count=count,
+            )
+    except IntegrityError:
+        # 另一個請求同時建立了同一列，改用累加
+        rows.update(total=F("total") + amount, entry_count=F("entry_count") + count)
+
+
+def record_entry_saved(entry, created: bool) -> None:
+    kind = kind_of(type(entry))
+    new_state = entry.rollup_state()
+    if new_state is None:
+        # 實例延遲了欄位（.only()/.defer()），從剛寫入的列讀回
+        saved = type(entry).objects.filter(pk=entry.pk).first()
+        new_state = saved.rollup_state() if saved else None
+    old_state = None if created else getattr(entry, "_rollup_state", None)
+    entry._rollup_state = new_state
+    if old_state == new_state or new_state is None:
+        return
+    if old_state and old_state[:3] == new_state[:3]:
+        user_id, category_id, month, amount = new_state
+        apply_delta(kind, user_id, category_id, month, amount - old_state[3], 0)
+        return
+    if old_state:
+        user_id, category_id, month, amount = old_state
+        apply_delta(kind, user_id, category_id, month, -amount, -1)
+    user_id, category_id, month, amount = new_state
+    apply_delta(kind, user_id, category_id, month, amount, 1)
+
+
+def record_entry_deleted(entry) -> None:
+    state = getattr(entry, "_rollup_state", None) or entry.rollup_state()
+    if state is None:
+        return
+    user_id, category_id, month, amount = state
+    apply_delta(kind_of(type(entry)), user_id, category_id, month, -amount, -1)
+
+
+def record_entries_created(kind: str, entries: Iterable) -> None:
+    """Apply rows written with bulk_create, which bypasses the model signals."""
+    deltas: Dict[RollupKey, List] = {}
+    for entry in entries:
+        user_id, category_id, month, amount = entry.rollup_state()
+        delta = deltas.setdefault((user_id, category_id, month), [DECIMAL_ZERO, 0])
+        delta[0] += amount
+        delta[1] += 1
+    for (user_id, category_id, month), (amount, count) in deltas.items():
+        apply_delta(kind, user_id, category_id, month, amount, count)
+
+
+def _live_rollups(kind: str, user):
+    return ROLLUP_MODELS[kind].objects.filter(user=user, entry_count__gt=0)
+
+
+def _month_range(qs, start: date | None, end: date | None):
+    if start:
+        qs = qs.filter(month__gte=start.replace(day=1))
+    if end:
+        qs = qs.filter(month__lte=end)
+    return qs
+
+
+def category_totals(
+    kind: str, user, start: date | None = None, end: date | None = None
+) -> Dict[str, Decimal]:
+    """Totals per category name for the months overlapping [start, end]."""
+    qs = _month_range(_live_rollups(kind, user), start, end)
+    data = (
+        qs.values("category__name")
+        .annotate(sum_total=Sum("total"))
+        .order_by("category__name")
+    )
+    return {row["category__name"]: row["sum_total"] or DECIMAL_ZERO for row in data}
+
+
+def _kind_total_qs(kind: str, user, start: date | None, end: date | None, category_name: str | None):
+    qs = _month_range(_live_rollups(kind, user), start, end)
+    if category_name is not None:
+        qs = qs.filter(category__name=category_name)
+    return qs
+
+
+def kind_total(
+    kind: str,
+    user,
+    start: date | None = None,
+    end: date | None = None,
+    category_name: str | None = None,
+) -> Decimal:
+    qs = _kind_total_qs(kind, user, start, end, category_name)
+    return qs.aggregate(sum_total=Sum("total")).get("sum_total") or DECIMAL_ZERO
+
+
+async def akind_total(
+    kind: str,
+    user,
+    start: date | None = None,
+    end: date | None = None,
+    category_name: str | None = None,
+) -> Decimal:
+    qs = _kind_total_qs(kind, user, start, end, category_name)
+    return (await qs.aaggregate(sum_total=Sum("total"))).get("sum_total") or DECIMAL_ZERO
+
+
+def category_breakdown(
+    kind: str, user, start: date | None = None, end: date | None = None
+) -> Dict[str, Decimal]:
+    """Like category_totals, but every category of the user is listed, empty ones as zero."""
+    category_model = ROLLUP_MODELS[kind]._meta.get_field("category").related_model
+    rollup_filter = Q(rollups__entry_count__gt=0)
+    if start:
+        rollup_filter &= Q(rollups__month__gte=start.replace(day=1))
+    if end:
+        rollup_filter &= Q(rollups__month__lte=end)
+    data = (
+        category_model.objects.filter(user=user)
+        .values("name")
+        .annotate(sum_total=Sum("rollups__total", filter=rollup_filter))
+        .order_by("name")
+    )
+    return {row["name"]: row["sum_total"] or DECIMAL_ZERO for row in data}
+
+
+def monthly_category_totals(
+    kind: str, user, start: date, end: date
+) -> Dict[str, Dict[date, Decimal]]:
+    """Totals per category name and month for [start, end], in one grouped query."""
+    qs = _month_range(_live_rollups(kind, user), start, end)
+    data = (
+        qs.values("category__name", "month")
+        .annotate(sum_total=Sum("total"))
+        .order_by("category__name", "month")
+    )
+    series: Dict[str, Dict[date, Decimal]] = {}
+    for row in data:
+        series.setdefault(row["category__name"], {})[row["month"]] = row["sum_total"] or DECIMAL_ZERO
+    return series
+
+
+def _expected_rollups(kind: str, user_ids: Iterable[int] | None) -> List[dict]:
+    """Rollup rows recomputed from the entry table and its archive."""
+    user_ids = list(user_ids) if user_ids is not None else None
+    merged: Dict[RollupKey, List] = {}
+    for model in (ENTRY_MODELS[kind], ARCHIVE_MODELS[kind]):
+        qs = model.objects.all()
+        if user_ids is not None:
+            qs = qs.filter(user_id__in=user_ids)
+        rows = (
+            qs.annotate(rollup_month=TruncMonth("entry_date"))
+            .values("user_id", "category_id", "rollup_month")
+            .annotate(sum_total=Sum("amount"), entry_count=Count("id"))
+            .order_by()
+        )
+        for row in rows:
+            key = (row["user_id"], row["category_id"], row["rollup_month"])
+            totals = merged.setdefault(key, [DECIMAL_ZERO, 0])
+            totals[0] += row["sum_total"]
+            totals[1] += row["entry_count"]
+    return [
+        {
+            "user_id": user_id,
+            "category_id": category_id,
+            "rollup_month": month,
+            "sum_total": total,
+            "entry_count": count,
+        }
+        for (user_id, category_id, month), (total, count) in merged.items()
+    ]
+
+
+def rebuild_rollups(user_ids: Iterable[int] | None = None) -> int:
+    """Drop and recompute the rollups from the raw entry tables (archived entries included)."""
+    user_ids = list(user_ids) if user_ids is not None else None
+    created = 0
+    with transaction.atomic():
+        for kind, model in ROLLUP_MODELS.items():
+            existing = model.objects.all()
+            if user_ids is not None:
+                existing = existing.filter(user_id__in=user_ids)
+            existing.delete()
+            rows = [
+                model(
+                    user_id=row["user_id"],
+                    category_id=row["category_id"],
+                    month=row["rollup_month"],
+                    total=row["sum_total"],
+                    entry_count=row["entry_count"],
+                )
+                for row in _expected_rollups(kind, user_ids)
+            ]
+            model.objects.bulk_create(rows, batch_size=1000)
+            created += len(rows)
+    return created
+
+
+def reconcile_rollups(
+    user_ids: Iterable[int] | None = None, fix: bool = True
+) -> List[RollupDrift]:
+    """Compare rollups with the raw and archive tables, optionally repairing any drift."""
+    user_ids = list(user_ids) if user_ids is not None else None
+    drifts: List[RollupDrift] = []
+    for kind, model in ROLLUP_MODELS.items():
+        expected: Dict[RollupKey, Tuple[Decimal, int]] = {
+            (row["user_id"], row["category_id"], row["rollup_month"]): (
+                row["sum_total"],
+                row["entry_count"],
+            )
+            for row in _expected_rollups(kind, user_ids)
+        }
+        actual_qs = model.objects.all()
+        if user_ids is not None:
+            actual_qs = actual_qs.filter(user_id__in=user_ids)
+        actual: Dict[RollupKey, Tuple[Decimal, int]] = {
+            (row["user_id"], row["category_id"], row["month"]): (
+                row["total"],
+                row["entry_count"],
+            )
+            for row in actual_qs.values(
+                "user_id", "category_id", "month", "total", "entry_count"
+            )
+        }
+        for key in expected.keys() | actual.keys():
+            exp_total, exp_count = expected.get(key, (DECIMAL_ZERO, 0))
+            act_total, act_count = actual.get(key, (DECIMAL_ZERO, 0))
+            if exp_total == act_total and exp_count == act_count:
+                continue
+            drifts.append(
+                RollupDrift(kind, *key, exp_total, exp_count, act_total, act_count)
+            )
+
+    if fix:
+        with transaction.atomic():
+            for drift in drifts:
+                rows = ROLLUP_MODELS[drift.kind].objects.filter(
+                    user_id=drift.user_id,
+                    category_id=drift.category_id,
+                    month=drift.month,
+                )
+                if drift.expected_count == 0:
+                    rows.delete()
+                else:
+                    rows.update_or_create(
+                        user_id=drift.user_id,
+                        category_id=drift.category_id,
+                        month=drift.month,
+                        defaults={
+                            "total": drift.expected_total,
+                            "entry_count": drift.expected_count,
+                        },
+                    )
+    return drifts
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from functools import reduce
+from operator import and_
+from typing import Sequence, Tuple
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, FloatField, Q, Subquery, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest
+from django.db.models.lookups import IContains
+
+MAX_QUERY_LENGTH = 100
+MAX_TERMS = 8
+# 索引以三字元 trigram 為單位，更短的詞無法用索引比對
+MIN_INDEXED_TERM = 3
+
+
+def parse_query(text: str | None) -> Tuple[str, ...]:
+    """Split ``q`` on whitespace into terms that must all match; ValueError when too long."""
+    text = (text or "").strip()
+    if len(text) > MAX_QUERY_LENGTH:
+        raise ValueError(f"q must be at most {MAX_QUERY_LENGTH} characters")
+    terms = tuple(dict.fromkeys(term.lower() for term in text.split()))
+    if len(terms) > MAX_TERMS:
+        raise ValueError(f"q must have at most {MAX_TERMS} words")
+    return terms
+
+
+def fts_table(model) -> str:
+    """Name of the SQLite FTS5 table indexing ``model`` (kept in sync by triggers, see migration 0008)."""
+    return f"{model._meta.db_table}_fts"
+
+
+def _scan_term(term: str) -> Q:
+    return Q(note__icontains=term) | Q(category__name__icontains=term)
+
+
+class SearchBackend:
+    """Matching and ranking of entries by note text and category name.
+
+    ``filter`` returns a Q requiring every term to match the note or the
+    category name; ``rank`` is an expression where higher means a better
+    match. This base class scans the user's rows with icontains and is used
+    for databases without a search index.
+    """
+
+    def filter(self, model, terms: Sequence[str]) -> Q:
+        return reduce(and_, (_scan_term(term) for term in terms), Q())
+
+    def rank(self, model, terms: Sequence[str]):
+        return Value(0.0, output_field=FloatField())
+
+
+class SqliteSearch(SearchBackend):
+    """FTS5 tables with the trigram tokenizer: substring matches served by the full-text index.
+
+    Terms shorter than a trigram narrow the index matches with icontains; a
+    query made only of short terms falls back to the user's rows.
+    """
+
+    # bm25 欄位權重：備註命中排在只有類別命中之前
+    WEIGHTS = (1.0, 0.5)
+
+    @staticmethod
+    def _match(terms: Sequence[str]) -> str | None:
+        phrases = ['"' + term.replace('"', '""') + '"' for term in terms if len(term) >= MIN_INDEXED_TERM]
+        return " AND ".join(phrases) or None
+
+    def filter(self, model, terms):
+        match = self._match(terms)
+        short = [term for term in terms if len(term) < MIN_INDEXED_TERM]
+        condition = super().filter(model, short)
+        if match:
+            table = fts_table(model)
+            condition &= Q(id__in=RawSQL(f'SELECT rowid FROM "{table}" WHERE "{table}" MATCH %s', [match]))
+        return condition
+
+    def rank(self, model, terms):
+        match = self._match(terms)
+        if not match:
+            return super().rank(model, terms)
+        table = fts_table(model)
+        weights = ", ".join(str(weight) for weight in self.WEIGHTS)
+        return RawSQL(
+            f'(SELECT -bm25("{table}", {weights}) FROM "{table}" '
+            f'WHERE "{table}" MATCH %s AND rowid = "{model._meta.db_table}"."id")',
+            [match],
+            output_field=FloatField(),
+        )
+
+
+class ILike(IContains):
+    """icontains compiled to ``column ILIKE %s`` on PostgreSQL.
+
+    Django's icontains compares ``UPPER(column::text)``, which a pg_trgm
+    index on the plain column cannot serve; other databases keep icontains.
+    """
+
+    def as_postgresql(self, compiler, connection):
+        lhs_sql, lhs_params = compiler.compile(self.lhs)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs_sql} ILIKE {rhs_sql}", (*lhs_params, *rhs_params)
+
+
+class PostgresSearch(SearchBackend):
+    """pg_trgm GIN indexes on the note and category name columns, matched with ILIKE (see ``ILike``)."""
+
+    def filter(self, model, terms):
+        categories = model._meta.get_field("category").related_model.objects
+        return reduce(
+            and_,
+            (
+                # 類別先由名稱索引找出，再以 (user, category) 索引取記錄
+                Q(ILike(F("note"), term))
+                | Q(category_id__in=Subquery(categories.filter(ILike(F("name"), term)).values("id")))
+                for term in terms
+            ),
+            Q(),
+        )
+
+    def rank(self, model, terms):
+        text = " ".join(terms)
+        return Greatest(
+            TrigramWordSimilarity(text, "note"),
+            TrigramWordSimilarity(text, "category__name"),
+            output_field=FloatField(),
+        )
+
+
+BACKENDS = {"sqlite": SqliteSearch(), "postgresql": PostgresSearch()}
+
+
+def search_backend() -> SearchBackend:
+    return BACKENDS.get(connection.vendor, SearchBackend())
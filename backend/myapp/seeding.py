@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List, Tuple
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from .categories import CATEGORY_MODELS
+from .counters import CATEGORY_COUNT_FIELDS, ENTRY_COUNT_FIELDS
+from .models import FinancialGoal, MonthlyReport, UserCounters
+from .rollups import DECIMAL_ZERO, ENTRY_MODELS, KIND_EXPENSE, KIND_INCOME, ROLLUP_MODELS, record_entries_created
+from .services import DEFAULT_CATEGORY_NAMES, iter_months, month_bounds
+
+# 約八成記錄是支出
+EXPENSE_SHARE = 0.8
+
+
+def category_names(kind: str, count: int) -> List[str]:
+    """The first ``count`` category names of a kind: the defaults, then numbered extras."""
+    names = DEFAULT_CATEGORY_NAMES[kind][:count]
+    names += [f"{kind}-{index:03d}" for index in range(len(names), count)]
+    return names
+
+
+def _random_amount(rng: random.Random, kind: str) -> Decimal:
+    upper = 80000 if kind == KIND_INCOME else 3000
+    return Decimal(rng.randint(100, upper * 100)) / 100
+
+
+def seed_users(
+    users: int,
+    entries_per_user: int,
+    categories_per_kind: int,
+    seed: int = 0,
+    prefix: str = "bench",
+    password: str = "bench-pass",
+    months: int = 24,
+    end: date | None = None,
+) -> List:
+    """Create users with categories and entries, the same rows for the same arguments.
+
+    Entries are written with bulk_create and their monthly rollups applied
+    afterwards, so seeding skips the per-row signals. Returns the created users.
+    """
+    rng = random.Random(seed)
+    end = end or date.today()
+    first_day = end - timedelta(days=months * 30)
+    span = (end - first_day).days
+    password_hash = make_password(password)  # 雜湊一次，所有使用者共用
+
+    user_model = get_user_model()
+    with transaction.atomic():
+        created = user_model.objects.bulk_create(
+            user_model(username=f"{prefix}{index:05d}", password=password_hash)
+            for index in range(users)
+        )
+        # SQLite 等不回傳主鍵的資料庫需重新讀取
+        created = list(
+            user_model.objects.filter(username__in=[user.username for user in created]).order_by("username")
+        )
+        categories: Dict[str, Dict[int, List[int]]] = {}
+        for kind, model in CATEGORY_MODELS.items():
+            names = category_names(kind, categories_per_kind)
+            model.objects.bulk_create(model(user=user, name=name) for user in created for name in names)
+            by_user: Dict[int, List[int]] = {}
+            for user_id, category_id in model.objects.filter(user__in=created).values_list("user_id", "id"):
+                by_user.setdefault(user_id, []).append(category_id)
+            categories[kind] = by_user
+
+        counts = {CATEGORY_COUNT_FIELDS[kind]: categories_per_kind for kind in CATEGORY_MODELS}
+        for kind, model in ENTRY_MODELS.items():
+            share = EXPENSE_SHARE if kind == KIND_EXPENSE else 1 - EXPENSE_SHARE
+            counts[ENTRY_COUNT_FIELDS[kind]] = round(entries_per_user * share)
+            entries = [
+                model(
+                    user_id=user.id,
+                    category_id=rng.choice(categories[kind][user.id]),
+                    amount=_random_amount(rng, kind),
+                    entry_date=first_day + timedelta(days=rng.randint(0, span)),
+                    note=f"seed {index}",
+                )
+                for user in created
+                for index in range(counts[ENTRY_COUNT_FIELDS[kind]])
+            ]
+            model.objects.bulk_create(entries, batch_size=1000)
+            record_entries_created(kind, entries)
+
+        UserCounters.objects.bulk_create(
+            [UserCounters(user=user, data_version=1, **counts) for user in created], batch_size=1000
+        )
+    return created
+
+
+# 產生大量資料時的類別分布：(名稱, 權重, 金額下限, 金額上限, 備註)
+EXPENSE_PROFILE = [
+    ("食", 45, 40, 600, ["早餐", "午餐", "晚餐", "飲料", "超市採買", "宵夜"]),
+    ("行", 20, 20, 1500, ["捷運", "公車", "加油", "計程車", "停車費", "高鐵"]),
+    ("樂", 12, 100, 3000, ["電影", "唱歌", "遊戲", "演唱會", "聚餐"]),
+    ("住", 8, 300, 5000, ["電費", "水費", "瓦斯", "網路", "家具"]),
+    ("衣", 8, 200, 4000, ["上衣", "褲子", "鞋子", "外套"]),
+    ("育", 7, 200, 8000, ["書籍", "線上課程", "補習", "文具"]),
+]
+OPTIONAL_EXPENSE_PROFILE = [
+    ("寵物", 4, 100, 3000, ["飼料", "獸醫", "寵物用品"]),
+    ("醫療", 3, 150, 5000, ["掛號", "藥品", "牙醫"]),
+    ("保險", 2, 1000, 8000, ["壽險", "醫療險", "車險"]),
+    ("旅遊", 3, 1000, 30000, ["機票", "住宿", "伴手禮"]),
+    ("訂閱", 4, 90, 600, ["影音串流", "音樂", "雲端空間"]),
+]
+INCOME_PROFILE = [
+    ("投資", 5, 500, 20000, ["股利", "基金贖回", "利息"]),
+    ("其他", 3, 100, 5000, ["二手拍賣", "紅包", "退款"]),
+    ("獎助金", 2, 2000, 30000, ["獎學金", "補助款"]),
+]
+SALARY = "薪資"
+RENT_NOTE = "房租"
+# 不屬於薪資、房租的隨機記錄中收入所佔比例
+OTHER_INCOME_SHARE = 0.08
+
+Profile = List[Tuple[str, int, int, int, List[str]]]
+
+
+@dataclass
+class LoadStats:
+    users: int = 0
+    categories: int = 0
+    entries: int = 0
+    goals: int = 0
+    reports: int = 0
+
+
+def _amount(rng: random.Random, low: int, high: int) -> Decimal:
+    # 小額居多的右偏分布
+    return Decimal(f"{rng.triangular(low, high, low + (high - low) * 0.15):.2f}")
+
+
+class _UserPlan:
+    """Everything generated for one user, from that user's own random stream."""
+
+    def __init__(self, seed: int, index: int, months: List[date], start: date, end: date, entries: int):
+        rng = random.Random(seed * 1_000_003 + index)
+        self.expense_profile: Profile = EXPENSE_PROFILE + rng.sample(
+            OPTIONAL_EXPENSE_PROFILE, rng.randint(0, len(OPTIONAL_EXPENSE_PROFILE))
+        )
+        self.income_profile: Profile = INCOME_PROFILE
+        self.rows: List[Tuple[str, str, Decimal, date, str]] = []
+
+        salary = Decimal(rng.randrange(28000, 120000, 500))
+        rent = Decimal(rng.randrange(6000, 30000, 500)) if rng.random() < 0.6 else None
+        for month in months:
+            if month > end:
+                break
+            payday = month.replace(day=5)
+            if start <= payday <= end:
+                self.rows.append((KIND_INCOME, SALARY, salary, payday, "月薪"))
+            if rent is not None and start <= month <= end:
+                self.rows.append((KIND_EXPENSE, "住", rent, month, RENT_NOTE))
+
+        span = (end - start).days
+        weights = {
+            KIND_EXPENSE: [weight for _, weight, *_ in self.expense_profile],
+            KIND_INCOME: [weight for _, weight, *_ in self.income_profile],
+        }
+        for _ in range(max(0, round(entries * rng.uniform(0.5, 1.5)) - len(self.rows))):
+            kind = KIND_INCOME if rng.random() < OTHER_INCOME_SHARE else KIND_EXPENSE
+            profile = self.expense_profile if kind == KIND_EXPENSE else self.income_profile
+            name, _, low, high, notes = rng.choices(profile, weights[kind])[0]
+            entry_date = start + timedelta(days=rng.randint(0, span))
+            self.rows.append((kind, name, _amount(rng, low, high), entry_date, rng.choice(notes)))
+        # 依日期寫入，主鍵順序與時間順序一致，接近真實資料
+        self.rows.sort(key=lambda row: row[3])
+
+        self.goal_months = [month for month in months[-12:] if rng.random() < 0.7]
+        self.spending_limit = Decimal(rng.randrange(15000, 60000, 1000))
+        self.saving_target = salary
+
+    def counts(self) -> Dict[str, int]:
+        """Quota counters matching the generated categories and entries."""
+        counts = {CATEGORY_COUNT_FIELDS[kind]: len(self.category_names(kind)) for kind in CATEGORY_MODELS}
+        for kind in ENTRY_COUNT_FIELDS:
+            counts[ENTRY_COUNT_FIELDS[kind]] = sum(1 for row in self.rows if row[0] == kind)
+        return counts
+
+    def category_names(self, kind: str) -> List[str]:
+        names = DEFAULT_CATEGORY_NAMES[kind]
+        profile = self.expense_profile if kind == KIND_EXPENSE else self.income_profile
+        return names + [name for name, *_ in profile if name not in names]
+
+
+def seed_load_data(
+    users: int,
+    entries_per_user: int,
+    years: int = 3,
+    seed: int = 0,
+    prefix: str = "load",
+    password: str = "load-pass",
+    batch_users: int = 200,
+    goals: bool = True,
+    reports: bool = True,
+    end: date | None = None,
+    chunk_size: int = 5000,
+    progress: Callable[[LoadStats], None] | None = None,
+) -> LoadStats:
+    """Generate production-like users, categories, entries, goals and monthly reports.
+
+    The output depends only on the arguments (each user draws from its own random
+    stream), and users are written ``batch_users`` at a time, each batch in one
+    transaction with chunked bulk_create. Rollups and counters are built from the
+    generated rows instead of per-row signals. Unique constraints hold by
+    construction: category names are distinct per user, and goals and reports are
+    generated at most once per (user, month, name/type).
+    """
+    end = end or date.today()
+    start = date(end.year - years, end.month, 1)
+    months = list(iter_months(start, end))
+    closed_months = [month for month in months if month_bounds(month)[1] < end]
+    password_hash = make_password(password)
+    user_model = get_user_model()
+    stats = LoadStats()
+
+    for first in range(0, users, batch_users):
+        indexes = range(first, min(users, first + batch_users))
+        plans = {
+            f"{prefix}{index:07d}": _UserPlan(seed, index, months, start, end, entries_per_user)
+            for index in indexes
+        }
+        with transaction.atomic():
+            user_model.objects.bulk_create(
+                [user_model(username=username, password=password_hash) for username in plans],
+                batch_size=chunk_size,
+            )
+            user_ids = dict(
+                user_model.objects.filter(username__in=list(plans)).values_list("username", "id")
+            )
+            UserCounters.objects.bulk_create(
+                [
+                    UserCounters(user_id=user_ids[username], data_version=1, **plan.counts())
+                    for username, plan in plans.items()
+                ],
+                batch_size=chunk_size,
+            )
+
+            category_ids: Dict[str, Dict[Tuple[int, str], int]] = {}
+            for kind, model in CATEGORY_MODELS.items():
+                model.objects.bulk_create(
+                    [
+                        model(user_id=user_ids[username], name=name)
+                        for username, plan in plans.items()
+                        for name in plan.category_names(kind)
+                    ],
+                    batch_size=chunk_size,
+                )
+                category_ids[kind] = {
+                    (user_id, name): category_id
+                    for user_id, name, category_id in model.objects.filter(
+                        user_id__in=user_ids.values()
+                    ).values_list("user_id", "name", "id")
+                }
+                stats.categories += len(category_ids[kind])
+
+            rollups: Dict[str, Dict[Tuple[int, int, date], List]] = {kind: {} for kind in ENTRY_MODELS}
+            month_totals: Dict[Tuple[int, date], Dict[str, Decimal]] = {}
+            for kind, model in ENTRY_MODELS.items():
+                batch = []
+                for username, plan in plans.items():
+                    user_id = user_ids[username]
+                    for row_kind, name, amount, entry_date, note in plan.rows:
+                        if row_kind != kind:
+                            continue
+                        category_id = category_ids[kind][(user_id, name)]
+                        batch.append(model(
+                            user_id=user_id, category_id=category_id,
+                            amount=amount, entry_date=entry_date, note=note,
+                        ))
+                        month = entry_date.replace(day=1)
+                        delta = rollups[kind].setdefault((user_id, category_id, month), [DECIMAL_ZERO, 0])
+                        delta[0] += amount
+                        delta[1] += 1
+                        totals = month_totals.setdefault((user_id, month), {})
+                        totals[kind] = totals.get(kind, DECIMAL_ZERO) + amount
+                        if len(batch) >= chunk_size:
+                            model.objects.bulk_create(batch)
+                            stats.entries += len(batch)
+                            batch = []
+                model.objects.bulk_create(batch)
+                stats.entries += len(batch)
+                ROLLUP_MODELS[kind].objects.bulk_create(
+                    [
+                        ROLLUP_MODELS[kind](
+                            user_id=user_id, category_id=category_id, month=month,
+                            total=total, entry_count=count,
+                        )
+                        for (user_id, category_id, month), (total, count) in rollups[kind].items()
+                    ],
+                    batch_size=chunk_size,
+                )
+
+            if goals:
+                goal_rows = [
+                    FinancialGoal(
+                        user_id=user_ids[username], name=name, goal_type=goal_type,
+                        target_amount=target, target_month=month,
+                    )
+                    for username, plan in plans.items()
+                    for month in plan.goal_months
+                    for name, goal_type, target in (
+                        ("每月支出上限", FinancialGoal.GOAL_TYPE_EXPENSE, plan.spending_limit),
+                        ("每月收入目標", FinancialGoal.GOAL_TYPE_INCOME, plan.saving_target),
+                    )
+                ]
+                FinancialGoal.objects.bulk_create(goal_rows, batch_size=chunk_size)
+                stats.goals += len(goal_rows)
+
+            if reports:
+                report_rows = []
+                for user_id in user_ids.values():
+                    for month in closed_months:
+                        totals = month_totals.get((user_id, month), {})
+                        income = totals.get(KIND_INCOME, DECIMAL_ZERO)
+                        expense = totals.get(KIND_EXPENSE, DECIMAL_ZERO)
+                        report_rows.append(MonthlyReport(
+                            user_id=user_id, month=month, delivered=True,
+                            summary={
+                                "total_income": float(income),
+                                "total_expense": float(expense),
+                                "net": float(income - expense),
+                                "goal_progress": [],
+                            },
+                        ))
+                MonthlyReport.objects.bulk_create(report_rows, batch_size=chunk_size)
+                stats.reports += len(report_rows)
+
+        stats.users += len(plans)
+        if progress is not None:
+            progress(stats)
+    return stats
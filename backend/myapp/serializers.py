@@ -12,6 +12,8 @@ from .models import (
     FinancialGoal,
     MonthlyReport,
 )
+from .categories import resolve_category_id
+from .rollups import KIND_EXPENSE, KIND_INCOME
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -79,17 +81,16 @@ class ExpenseEntrySerializer(serializers.ModelSerializer):
         return value
 
     def validate_type(self, value):
-        user = self.context['request'].user
-        if not ExpenseCategory.objects.filter(user=user, name=value).exists():
+        request = self.context['request']
+        if resolve_category_id(KIND_EXPENSE, request.user, value, request) is None:
             raise serializers.ValidationError("Category does not exist")
         return value
 
     def create(self, validated_data):
         user = self.context['request'].user
         category_name = validated_data.pop('type')
-        category = ExpenseCategory.objects.get(user=user, name=category_name)
         validated_data['user'] = user
-        validated_data['category'] = category
+        validated_data['category_id'] = resolve_category_id(KIND_EXPENSE, user, category_name, self.context['request'])
         
         # Check goal warning
         entry = ExpenseEntry(**validated_data)
@@ -105,22 +106,18 @@ class ExpenseEntrySerializer(serializers.ModelSerializer):
         user = self.context['request'].user
         if 'type' in validated_data:
             category_name = validated_data.pop('type')
-            instance.category = ExpenseCategory.objects.get(user=user, name=category_name)
+            instance.category_id = resolve_category_id(KIND_EXPENSE, user, category_name, self.context['request'])
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
         return instance
 
     def _check_goal_warning(self, user, entry):
-        from datetime import date
-        from django.db.models import Sum
+        from .rollups import kind_total
         from .services import month_bounds
         
         month_start, month_end = month_bounds(entry.entry_date.replace(day=1))
-        month_total = (
-            ExpenseEntry.objects.filter(user=user, entry_date__range=(month_start, month_end))
-            .aggregate(total=Sum("amount")).get("total") or Decimal('0')
-        )
+        month_total = kind_total(KIND_EXPENSE, user, month_start, month_end)
         goal = (
             FinancialGoal.objects.filter(
                 user=user,
@@ -157,24 +154,23 @@ class IncomeEntrySerializer(serializers.ModelSerializer):
         return value
 
     def validate_type(self, value):
-        user = self.context['request'].user
-        if not IncomeCategory.objects.filter(user=user, name=value).exists():
+        request = self.context['request']
+        if resolve_category_id(KIND_INCOME, request.user, value, request) is None:
             raise serializers.ValidationError("Category does not exist")
         return value
 
     def create(self, validated_data):
         user = self.context['request'].user
         category_name = validated_data.pop('type')
-        category = IncomeCategory.objects.get(user=user, name=category_name)
         validated_data['user'] = user
-        validated_data['category'] = category
+        validated_data['category_id'] = resolve_category_id(KIND_INCOME, user, category_name, self.context['request'])
         return super().create(validated_data)
 
     def update(self, instance, validated_data):
         user = self.context['request'].user
         if 'type' in validated_data:
             category_name = validated_data.pop('type')
-            instance.category = IncomeCategory.objects.get(user=user, name=category_name)
+            instance.category_id = resolve_category_id(KIND_INCOME, user, category_name, self.context['request'])
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
@@ -1,30 +1,47 @@
 from __future__ import annotations
 
+import multiprocessing
 from calendar import monthrange
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal, InvalidOperation
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Tuple
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
-from django.db.models import Sum
-
+from django.core.mail import EmailMessage
+from django.db import connections
+from .concurrency import run_concurrently
+from .goals import goal_progress_item
+from .mailing import deliver_messages
 from .models import (
     ExpenseCategory,
-    ExpenseEntry,
     FinancialGoal,
     IncomeCategory,
-    IncomeEntry,
     MonthlyReport,
 )
+from .rollups import (
+    KIND_EXPENSE,
+    KIND_INCOME,
+    ROLLUP_MODELS,
+    category_breakdown,
+    category_totals,
+    monthly_category_totals,
+)
+from .summary_cache import summary_cache
 
 User = get_user_model()
 
 
 DECIMAL_ZERO = Decimal("0")
 
+DEFAULT_CATEGORY_NAMES = {
+    KIND_EXPENSE: ["食", "衣", "住", "行", "育", "樂"],
+    KIND_INCOME: ["薪資", "獎助金", "投資", "其他"],
+}
+
 
 @dataclass
 class Summary:
@@ -54,6 +71,24 @@ def parse_entry_date(value: str | None) -> date:
         raise ValueError("entry_date must be YYYY-MM-DD") from exc
 
 
+def parse_month(value: str) -> date:
+    """First day of the month given as YYYY-MM or YYYY-MM-DD."""
+    try:
+        if len(value) == 7:
+            return date.fromisoformat(f"{value}-01")
+        return date.fromisoformat(value).replace(day=1)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("month must be YYYY-MM or YYYY-MM-DD") from exc
+
+
+def iter_months(start: date, end: date) -> Iterator[date]:
+    """First days of every month from start to end, inclusive."""
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield date(year, month, 1)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
 def month_bounds(target_month: date) -> Tuple[date, date]:
     last_day = monthrange(target_month.year, target_month.month)[1]
     start = target_month.replace(day=1)
@@ -61,48 +96,58 @@ def month_bounds(target_month: date) -> Tuple[date, date]:
     return start, end
 
 
-def _category_totals(model, user, start: date | None = None, end: date | None = None):
-    qs = model.objects.filter(user=user)
-    if start and end:
-        qs = qs.filter(entry_date__range=(start, end))
-    data = (
-        qs.values("category__name")
-        .annotate(total=Sum("amount"))
-        .order_by("category__name")
+def summarize_month(user, target_month: date | None = None) -> Summary:
+    """Summary of one month, served from the versioned summary cache when current."""
+    target_month = (target_month or date.today()).replace(day=1)
+    return summary_cache.get_or_compute(
+        user.pk, target_month, lambda: _summarize_month(user, target_month)
+    )
+
+
+def _summarize_month(user, target_month: date) -> Summary:
+    start, end = month_bounds(target_month)
+    income_by_category = category_totals(KIND_INCOME, user, start, end)
+    expense_by_category = category_totals(KIND_EXPENSE, user, start, end)
+    # 不在 SQL 排序，讓查詢走 (user, target_month, goal_type) 索引；每月目標很少，於此排序
+    goal_qs = FinancialGoal.objects.filter(user=user, target_month=start).order_by()
+    return _build_summary(income_by_category, expense_by_category, goal_qs)
+
+
+async def asummarize_month(user, target_month: date | None = None) -> Summary:
+    """Async summarize_month: the two category totals and the goals are read concurrently."""
+    target_month = (target_month or date.today()).replace(day=1)
+    return await summary_cache.aget_or_compute(
+        user.pk, target_month, lambda: _asummarize_month(user, target_month)
     )
-    return {row["category__name"]: row["total"] or DECIMAL_ZERO for row in data}
 
 
-def summarize_month(user, target_month: date | None = None) -> Summary:
-    target_month = target_month or date.today().replace(day=1)
+async def _asummarize_month(user, target_month: date) -> Summary:
     start, end = month_bounds(target_month)
-    income_by_category = _category_totals(IncomeEntry, user, start, end)
-    expense_by_category = _category_totals(ExpenseEntry, user, start, end)
+    goal_qs = FinancialGoal.objects.filter(user=user, target_month=start).order_by()
+    income_by_category, expense_by_category, goals = await run_concurrently(
+        (category_totals, KIND_INCOME, user, start, end),
+        (category_totals, KIND_EXPENSE, user, start, end),
+        (list, goal_qs),
+    )
+    return _build_summary(income_by_category, expense_by_category, goals)
+
+
+def _build_summary(
+    income_by_category: Dict[str, Decimal],
+    expense_by_category: Dict[str, Decimal],
+    goal_list: Iterable[FinancialGoal],
+) -> Summary:
     total_income = sum(income_by_category.values(), DECIMAL_ZERO)
     total_expense = sum(expense_by_category.values(), DECIMAL_ZERO)
     net = total_income - total_expense
-    goals = []
-    goal_qs = FinancialGoal.objects.filter(user=user, target_month=start)
-    for goal in goal_qs:
-        if goal.goal_type == FinancialGoal.GOAL_TYPE_INCOME:
-            progress_amount = sum(income_by_category.values(), DECIMAL_ZERO)
-        else:
-            progress_amount = sum(expense_by_category.values(), DECIMAL_ZERO)
-        percentage = (
-            (progress_amount / goal.target_amount * Decimal("100"))
-            if goal.target_amount
-            else Decimal("0")
-        )
-        goals.append(
-            {
-                "name": goal.name,
-                "type": goal.goal_type,
-                "target": float(goal.target_amount),
-                "target_month": goal.target_month.strftime("%Y-%m-%d"),
-                "progress": float(progress_amount),
-                "percentage": float(round(percentage, 2)),
-            }
-        )
+    kind_totals = {
+        FinancialGoal.GOAL_TYPE_INCOME: total_income,
+        FinancialGoal.GOAL_TYPE_EXPENSE: total_expense,
+    }
+    goals = [
+        goal_progress_item(goal, kind_totals.get(goal.goal_type, total_expense))
+        for goal in sorted(goal_list, key=lambda item: item.name)
+    ]
     return Summary(
         total_income=total_income,
         total_expense=total_expense,
@@ -113,6 +158,87 @@ def summarize_month(user, target_month: date | None = None) -> Summary:
     )
 
 
+def summarize_users_month(user_ids: Iterable[int], target_month: date) -> Dict[int, Summary]:
+    """summarize_month for many users at once: one query per kind plus one for goals."""
+    user_ids = list(user_ids)
+    start = target_month.replace(day=1)
+    by_kind: Dict[str, Dict[int, Dict[str, Decimal]]] = {}
+    for kind, model in ROLLUP_MODELS.items():
+        per_user: Dict[int, Dict[str, Decimal]] = defaultdict(dict)
+        rows = (
+            model.objects.filter(user_id__in=user_ids, month=start, entry_count__gt=0)
+            .values_list("user_id", "category__name", "total")
+            .order_by("user_id", "category__name")
+        )
+        for user_id, name, total in rows:
+            per_user[user_id][name] = total
+        by_kind[kind] = per_user
+    goals: Dict[int, List[FinancialGoal]] = defaultdict(list)
+    for goal in FinancialGoal.objects.filter(user_id__in=user_ids, target_month=start).order_by():
+        goals[goal.user_id].append(goal)
+    return {
+        user_id: _build_summary(
+            by_kind[KIND_INCOME].get(user_id, {}),
+            by_kind[KIND_EXPENSE].get(user_id, {}),
+            goals.get(user_id, []),
+        )
+        for user_id in user_ids
+    }
+
+
+@dataclass
+class Trend:
+    months: List[date]
+    # kind -> 類別名稱 -> 與 months 對齊的金額，沒有記錄的月份為 0
+    by_category: Dict[str, Dict[str, List[Decimal]]]
+    totals: Dict[str, List[Decimal]]
+
+
+def build_trend(user, start: date, end: date) -> Trend:
+    """Per-month, per-category series for both kinds: one grouped query per kind."""
+    months = list(iter_months(start, end))
+    _, last_day = month_bounds(months[-1])
+    by_category: Dict[str, Dict[str, List[Decimal]]] = {}
+    totals: Dict[str, List[Decimal]] = {}
+    for kind in (KIND_INCOME, KIND_EXPENSE):
+        series = monthly_category_totals(kind, user, months[0], last_day)
+        by_category[kind] = {
+            name: [per_month.get(month, DECIMAL_ZERO) for month in months]
+            for name, per_month in series.items()
+        }
+        totals[kind] = [
+            sum((values[index] for values in by_category[kind].values()), DECIMAL_ZERO)
+            for index in range(len(months))
+        ]
+    return Trend(months, by_category, totals)
+
+
+@dataclass
+class Dashboard:
+    month: date
+    summary: Summary
+    # 每個類別（含沒有記錄的）的月合計
+    breakdown: Dict[str, Dict[str, Decimal]]
+    insights: List[str]
+    latest_report: MonthlyReport | None
+
+
+def build_dashboard(user, target_month: date | None = None) -> Dashboard:
+    """Everything the dashboard shows for one month, from one summary: two category
+    breakdowns, the month's goals and the latest report."""
+    target_month = target_month or date.today().replace(day=1)
+    start, end = month_bounds(target_month)
+    breakdown = {kind: category_breakdown(kind, user, start, end) for kind in (KIND_EXPENSE, KIND_INCOME)}
+    goal_qs = FinancialGoal.objects.filter(user=user, target_month=start).order_by()
+    summary = _build_summary(
+        {name: total for name, total in breakdown[KIND_INCOME].items() if total},
+        {name: total for name, total in breakdown[KIND_EXPENSE].items() if total},
+        goal_qs,
+    )
+    latest_report = MonthlyReport.objects.filter(user=user).order_by("-month").first()
+    return Dashboard(start, summary, breakdown, build_insights(summary), latest_report)
+
+
 def build_insights(summary: Summary) -> List[str]:
     insights: List[str] = []
     if summary.total_expense > summary.total_income:
@@ -142,15 +268,13 @@ def build_insights(summary: Summary) -> List[str]:
 
 
 def ensure_default_categories(user) -> None:
-    default_expense = ["食", "衣", "住", "行", "育", "樂"]
-    default_income = ["薪資", "獎助金", "投資", "其他"]
-    for name in default_expense:
+    for name in DEFAULT_CATEGORY_NAMES[KIND_EXPENSE]:
         ExpenseCategory.objects.get_or_create(user=user, name=name)
-    for name in default_income:
+    for name in DEFAULT_CATEGORY_NAMES[KIND_INCOME]:
         IncomeCategory.objects.get_or_create(user=user, name=name)
 
 
-def send_monthly_report(user, summary: Summary, target_month: date) -> None:
+def _report_email(user, summary: Summary, target_month: date) -> Tuple[str, str, str]:
     subject = f"{target_month:%Y-%m} 財務月報"
     body_lines = [
         f"總收入：{summary.total_income:.2f}",
@@ -163,32 +287,175 @@ def send_monthly_report(user, summary: Summary, target_month: date) -> None:
         body_lines.append(
             f"- {goal['name']} ({goal['type']}): {goal['progress']:.2f}/{goal['target']:.2f} ({goal['percentage']}%)"
         )
-    send_mail(
-        subject=subject,
-        message="\n".join(body_lines),
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email or f"{user.username}@example.com"],
+    return subject, "\n".join(body_lines), user.email or f"{user.username}@example.com"
+
+
+def _report_summary_payload(summary: Summary) -> dict:
+    return {
+        "total_income": float(summary.total_income),
+        "total_expense": float(summary.total_expense),
+        "net": float(summary.net),
+        "goal_progress": summary.goal_progress,
+    }
+
+
+@dataclass
+class ReportRunResult:
+    generated: int = 0
+    failed: int = 0
+
+    def __add__(self, other: "ReportRunResult") -> "ReportRunResult":
+        return ReportRunResult(self.generated + other.generated, self.failed + other.failed)
+
+
+def _deliver_reports(users: list, summaries: Dict[int, Summary], target_month: date) -> int:
+    """Email the users' stored reports over pooled connections (see mailing.deliver_messages)
+    and mark the accepted ones delivered; returns the number of failed sends."""
+    outgoing = []
+    for user in users:
+        subject, message, recipient = _report_email(user, summaries[user.id], target_month)
+        outgoing.append(
+            (
+                user.id,
+                EmailMessage(
+                    subject=subject,
+                    body=message,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[recipient],
+                ),
+            )
+        )
+    result = deliver_messages(outgoing)
+    MonthlyReport.objects.filter(user_id__in=result.delivered, month=target_month).update(
+        delivered=True
     )
+    return len(result.failed)
+
+
+def send_monthly_report(user, summary: Summary, target_month: date) -> bool:
+    """Store and email one user's report; False when the email was not accepted."""
     MonthlyReport.objects.update_or_create(
         user=user,
         month=target_month,
         defaults={
-            "summary": {
-                "total_income": float(summary.total_income),
-                "total_expense": float(summary.total_expense),
-                "net": float(summary.net),
-                "goal_progress": summary.goal_progress,
-            },
-            "delivered": True,
+            "summary": _report_summary_payload(summary),
+            "delivered": False,
         },
     )
+    return not _deliver_reports([user], {user.id: summary}, target_month)
 
 
-def generate_monthly_reports(target_month: date | None = None) -> None:
+def generate_monthly_reports(target_month: date | None = None, chunk_size: int = 1000) -> ReportRunResult:
+    """Per-user report run; emails of each chunk of users share pooled connections."""
     target_month = target_month or _previous_month()
-    for user in User.objects.all():
-        summary = summarize_month(user, target_month)
-        send_monthly_report(user, summary, target_month)
+    result = ReportRunResult()
+    for users in _user_chunks(chunk_size):
+        summaries = {user.id: summarize_month(user, target_month) for user in users}
+        for user in users:
+            MonthlyReport.objects.update_or_create(
+                user=user,
+                month=target_month,
+                defaults={
+                    "summary": _report_summary_payload(summaries[user.id]),
+                    "delivered": False,
+                },
+            )
+        result += ReportRunResult(len(users), _deliver_reports(users, summaries, target_month))
+    return result
+
+
+def _user_chunks(chunk_size: int) -> Iterator[list]:
+    last_id = 0
+    while True:
+        users = list(
+            User.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "username", "email")[:chunk_size]
+        )
+        if not users:
+            return
+        yield users
+        last_id = users[-1].id
+
+
+def _user_id_ranges(chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """(first id, last id) of consecutive chunks of ``chunk_size`` users, streamed from the id index."""
+    ids = User.objects.order_by("id").values_list("id", flat=True).iterator(chunk_size=chunk_size)
+    first = last = None
+    count = 0
+    for user_id in ids:
+        if first is None:
+            first = user_id
+        last = user_id
+        count += 1
+        if count == chunk_size:
+            yield first, last
+            first, count = None, 0
+    if first is not None:
+        yield first, last
+
+
+def _generate_reports_range(first_id: int, last_id: int, target_month: date) -> ReportRunResult:
+    """Worker entry point: loads its own users for an id range over its own connection."""
+    users = list(
+        User.objects.filter(id__gte=first_id, id__lte=last_id)
+        .order_by("id")
+        .only("id", "username", "email")
+    )
+    return _generate_reports_chunk(users, target_month) if users else ReportRunResult()
+
+
+def _generate_reports_chunk(users: list, target_month: date) -> ReportRunResult:
+    summaries = summarize_users_month([user.id for user in users], target_month)
+    MonthlyReport.objects.bulk_create(
+        [
+            MonthlyReport(
+                user_id=user_id,
+                month=target_month,
+                summary=_report_summary_payload(summary),
+                delivered=False,
+            )
+            for user_id, summary in summaries.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["user", "month"],
+        update_fields=["summary", "delivered", "updated_at"],
+    )
+    return ReportRunResult(len(summaries), _deliver_reports(users, summaries, target_month))
+
+
+def generate_monthly_reports_batch(
+    target_month: date | None = None,
+    chunk_size: int = 1000,
+    workers: int = 1,
+) -> ReportRunResult:
+    """Set-based report run: users are streamed in id chunks, each chunk is summarized
+    with a few grouped queries and upserted in bulk. With workers > 1 the chunks are
+    spread over a process pool (fork start method, so POSIX only): workers receive
+    id ranges, load their own users and open their own database connections, and
+    at most two ranges per worker are queued at a time."""
+    target_month = (target_month or _previous_month()).replace(day=1)
+    if workers <= 1:
+        return sum(
+            (_generate_reports_chunk(users, target_month) for users in _user_chunks(chunk_size)),
+            ReportRunResult(),
+        )
+
+    # 只保留每個區段的頭尾 id（每 chunk_size 位使用者兩個整數），
+    # 並在 fork 前關閉連線：之後父行程不再查詢，子行程各自建立連線
+    ranges = list(_user_id_ranges(chunk_size))
+    connections.close_all()
+    context = multiprocessing.get_context("fork")
+    total = ReportRunResult()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = set()
+        for first_id, last_id in ranges:
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                total = sum((future.result() for future in done), total)
+            pending.add(pool.submit(_generate_reports_range, first_id, last_id, target_month))
+        total = sum((future.result() for future in pending), total)
+    return total
 
 
 def _previous_month() -> date:
@@ -0,0 +1,108 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from .categories import CATEGORY_MODELS, invalidate_categories
+from .counters import COUNT_FIELDS, bump_data_version
+from .models import ExpenseEntry, FinancialGoal, IncomeEntry
+from .rollups import record_entry_deleted, record_entry_saved
+from .summary_cache import summary_cache
+
+ENTRY_SENDERS = (ExpenseEntry, IncomeEntry)
+CATEGORY_KINDS = {model: kind for kind, model in CATEGORY_MODELS.items()}
+VERSIONED_SENDERS = ENTRY_SENDERS + tuple(CATEGORY_KINDS) + (FinancialGoal,)
+
+
+def _capture_previous_state(sender, instance, raw=False, **kwargs):
+    # 不是從資料庫載入的實例（例如以 id 直接建構），或載入時延遲了欄位（.only()/.defer()）
+    # 而沒有原值的，需要先讀回原值
+    if raw or instance._state.adding or getattr(instance, "_rollup_state", None) is not None:
+        return
+    previous = sender.objects.filter(pk=instance.pk).first()
+    instance._rollup_state = previous.rollup_state() if previous else None
+
+
+def _prepare_delete(sender, instance, **kwargs):
+    _capture_previous_state(sender, instance)
+    # post_delete 時列已刪除，延遲載入的欄位無法再讀取
+    deferred = instance.get_deferred_fields() & {"user_id", "entry_date"}
+    if deferred:
+        instance.refresh_from_db(fields=sorted(deferred))
+
+
+def _invalidate_summaries_on_save(sender, instance, created, raw=False, **kwargs):
+    # 必須在 _update_rollups_on_save 之前執行，_rollup_state 此時仍是修改前的狀態
+    if raw:
+        return
+    months = {instance.entry_date}
+    previous = None if created else getattr(instance, "_rollup_state", None)
+    if previous:
+        months.add(previous[2])
+    summary_cache.invalidate_months(instance.user_id, months)
+
+
+def _invalidate_summaries_on_delete(sender, instance, **kwargs):
+    summary_cache.invalidate_months(instance.user_id, [instance.entry_date])
+
+
+def _invalidate_goal_summaries(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    summary_cache.invalidate_months(instance.user_id, [instance.target_month])
+
+
+def _invalidate_category_summaries(sender, instance, created, raw=False, **kwargs):
+    # 新類別沒有金額；改名則影響所有月份
+    if raw or created:
+        return
+    summary_cache.invalidate_user(instance.user_id)
+
+
+def _update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    record_entry_saved(instance, created)
+
+
+def _update_rollups_on_delete(sender, instance, **kwargs):
+    record_entry_deleted(instance)
+
+
+def _invalidate_category_cache(sender, instance, **kwargs):
+    kind, user_id = CATEGORY_KINDS[sender], instance.user_id
+    invalidate_categories(kind, user_id)
+    # 交易提交前其他請求仍可能讀到舊資料並寫回快取，提交後再清一次
+    transaction.on_commit(lambda: invalidate_categories(kind, user_id))
+
+
+def _bump_version_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # 新增的記錄與類別同時累加配額計數；Model.delete() 與 QuerySet.delete()（含 cascade）都會逐筆送出 post_delete
+    counts = {COUNT_FIELDS[sender]: 1} if created and sender in COUNT_FIELDS else {}
+    bump_data_version(instance.user_id, **counts)
+
+
+def _bump_version_on_delete(sender, instance, **kwargs):
+    counts = {COUNT_FIELDS[sender]: -1} if sender in COUNT_FIELDS else {}
+    bump_data_version(instance.user_id, create=False, **counts)
+
+
+for _sender in ENTRY_SENDERS:
+    pre_save.connect(_capture_previous_state, sender=_sender)
+    pre_delete.connect(_prepare_delete, sender=_sender)
+    post_save.connect(_invalidate_summaries_on_save, sender=_sender)
+    post_save.connect(_update_rollups_on_save, sender=_sender)
+    post_delete.connect(_invalidate_summaries_on_delete, sender=_sender)
+    post_delete.connect(_update_rollups_on_delete, sender=_sender)
+
+for _sender in CATEGORY_KINDS:
+    post_save.connect(_invalidate_category_cache, sender=_sender)
+    post_save.connect(_invalidate_category_summaries, sender=_sender)
+    post_delete.connect(_invalidate_category_cache, sender=_sender)
+
+post_save.connect(_invalidate_goal_summaries, sender=FinancialGoal)
+post_delete.connect(_invalidate_goal_summaries, sender=FinancialGoal)
+
+for _sender in VERSIONED_SENDERS:
+    post_save.connect(_bump_version_on_save, sender=_sender)
+    post_delete.connect(_bump_version_on_delete, sender=_sender)
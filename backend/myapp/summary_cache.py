@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import date
+from typing import Awaitable, Callable, Dict, Iterable, List
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+_PREFIX = "summary"
+
+
+def _new_version() -> int:
+    # 版本鍵被淘汰後重新建立時不會回到舊值，舊摘要因此不會被誤讀
+    return time.time_ns()
+
+
+class SummaryCache:
+    """Month summaries in the Django cache, keyed by user, month and two versions.
+
+    Each (user, month) has its own version, bumped by writes dated in that month;
+    a per-user generation is bumped by changes that affect every month (category
+    renames). Bumping a version leaves the old entry unreachable, so a write in
+    March never evicts February.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[settings.SUMMARY_CACHE_ALIAS]
+
+    @staticmethod
+    def _generation_key(user_id: int) -> str:
+        return f"{_PREFIX}:gen:{user_id}"
+
+    @staticmethod
+    def _month_key(user_id: int, month: date) -> str:
+        return f"{_PREFIX}:ver:{user_id}:{month:%Y%m}"
+
+    def _versions(self, keys: List[str]) -> Dict[str, int]:
+        cache = self.cache
+        versions = cache.get_many(keys)
+        missing = [key for key in keys if key not in versions]
+        if missing:
+            for key in missing:
+                # add() 不會覆蓋其他請求同時建立的版本
+                cache.add(key, _new_version(), timeout=None)
+            versions.update(cache.get_many(missing))
+        return versions
+
+    def _lookup(self, user_id: int, month: date):
+        """(cache key, cached summary or None); the key is None when caching is off."""
+        if settings.SUMMARY_CACHE_TIMEOUT <= 0:
+            return None, None
+        month = month.replace(day=1)
+        generation_key, month_key = self._generation_key(user_id), self._month_key(user_id, month)
+        versions = self._versions([generation_key, month_key])
+        if len(versions) < 2:
+            # 快取無法保存版本（例如 DummyCache），直接計算
+            self._count(hit=False)
+            return None, None
+        key = f"{_PREFIX}:{user_id}:{month:%Y%m}:{versions[generation_key]}:{versions[month_key]}"
+        summary = self.cache.get(key)
+        self._count(hit=summary is not None)
+        return key, summary
+
+    def _store(self, key: str | None, summary) -> None:
+        if key is not None:
+            self.cache.set(key, summary, settings.SUMMARY_CACHE_TIMEOUT)
+
+    def get_or_compute(self, user_id: int, month: date, compute: Callable):
+        key, summary = self._lookup(user_id, month)
+        if summary is None:
+            summary = compute()
+            self._store(key, summary)
+        return summary
+
+    async def aget_or_compute(self, user_id: int, month: date, compute: Callable[[], Awaitable]):
+        key, summary = await sync_to_async(self._lookup)(user_id, month)
+        if summary is None:
+            summary = await compute()
+            await sync_to_async(self._store)(key, summary)
+        return summary
+
+    def invalidate_months(self, user_id: int, months: Iterable[date]) -> None:
+        self._bump([self._month_key(user_id, month.replace(day=1)) for month in set(months)])
+
+    def invalidate_user(self, user_id: int) -> None:
+        self._bump([self._generation_key(user_id)])
+
+    def _bump(self, keys: List[str]) -> None:
+        def bump():
+            cache = self.cache
+            for key in keys:
+                try:
+                    cache.incr(key)
+                except ValueError:
+                    # 版本不存在：下一次讀取會建立新版本
+                    pass
+
+        bump()
+        # 提交前其他請求仍可能以舊資料寫入新版本，提交後再升一次
+        transaction.on_commit(bump)
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+summary_cache = SummaryCache()
@@ -1,3 +1,1103 @@
-from django.test import TestCase
+import json
+import os
+import re
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .models import (
+    ArchivedExpenseEntry,
+    ArchiveRun,
+    ExpenseCategory,
+    ExpenseEntry,
+    ExpenseMonthlyRollup,
+    FinancialGoal,
+    IncomeCategory,
+    IncomeEntry,
+    MonthlyReport,
+    UserCounters,
+)
+from . import rendering
+from .archiving import archive_cutoff, archive_entries
+from .benchmarking import SCENARIOS, bench_users_for, percentile, run_scenario
+from .views import async_views
+from .categories import category_cache
+from .counters import reconcile_counters
+from .mailing import deliver_messages
+from .metrics import MetricsRegistry, registry as metrics_registry
+from .rollups import KIND_EXPENSE, category_totals, reconcile_rollups
+from .search import PostgresSearch, SearchBackend
+from .seeding import seed_load_data, seed_users
+from .services import (
+    _generate_reports_range,
+    _user_id_ranges,
+    ensure_default_categories,
+    generate_monthly_reports,
+    generate_monthly_reports_batch,
+    summarize_month,
+)
+from .summary_cache import summary_cache
+
+
+class FinanceFixtures:
+    def setUp(self):
+        # 測試交易回滾不會觸發 signal，清掉上一個測試留下的快取
+        cache.clear()
+        summary_cache.reset_stats()
+        self.user = User.objects.create_user(username="alice", password="s3cret-pass")
+        ensure_default_categories(self.user)
+        self.client.force_login(self.user)
+
+    def post_json(self, path, payload):
+        return self.client.post(path, json.dumps(payload), content_type="application/json")
+
+    def patch_json(self, path, payload):
+        return self.client.patch(path, json.dumps(payload), content_type="application/json")
+
+
+class FinanceTestCase(FinanceFixtures, TestCase):
+    pass
+
+
+class MonthlyRollupTests(FinanceTestCase):
+    def rollup(self, name, month):
+        return ExpenseMonthlyRollup.objects.get(
+            user=self.user, category__name=name, month=month
+        )
+
+    def test_create_update_delete_keep_rollups_in_sync(self):
+        res = self.post_json("/expense/", {"type": "食", "amount": "120", "entry_date": "2025-03-05"})
+        self.assertEqual(res.status_code, 201)
+        entry_id = res.json()["id"]
+        self.post_json("/expense/", {"type": "食", "amount": "30", "entry_date": "2025-03-20"})
+        self.assertEqual(self.rollup("食", date(2025, 3, 1)).total, Decimal("150"))
+
+        self.patch_json(f"/expense/{entry_id}/", {"type": "行", "entry_date": "2025-02-10"})
+        self.assertEqual(self.rollup("食", date(2025, 3, 1)).total, Decimal("30"))
+        self.assertEqual(self.rollup("行", date(2025, 2, 1)).total, Decimal("120"))
+
+        self.client.delete(f"/expense/{entry_id}/")
+        self.assertEqual(self.rollup("行", date(2025, 2, 1)).entry_count, 0)
+        self.assertEqual(
+            category_totals(KIND_EXPENSE, self.user, date(2025, 2, 1), date(2025, 2, 28)), {}
+        )
+        self.assertEqual(reconcile_rollups(fix=False), [])
+
+    def test_month_delete_and_summary_read_from_rollups(self):
+        self.post_json("/income/", {"type": "薪資", "amount": "1000", "entry_date": "2025-04-01"})
+        self.post_json("/expense/", {"type": "住", "amount": "400", "entry_date": "2025-04-02"})
+        summary = summarize_month(self.user, date(2025, 4, 1))
+        self.assertEqual(summary.total_income, Decimal("1000"))
+        self.assertEqual(summary.expense_by_category, {"住": Decimal("400")})
+
+        self.client.delete("/insights/?month=2025-04-01")
+        summary = summarize_month(self.user, date(2025, 4, 1))
+        self.assertEqual(summary.total_income, Decimal("0"))
+        self.assertEqual(summary.total_expense, Decimal("0"))
+
+    def test_reconcile_repairs_drift(self):
+        category = ExpenseCategory.objects.get(user=self.user, name="樂")
+        ExpenseEntry.objects.create(
+            user=self.user, category=category, amount=Decimal("50"), entry_date=date(2025, 1, 9)
+        )
+        ExpenseMonthlyRollup.objects.filter(user=self.user).update(total=Decimal("999"))
+
+        drifts = reconcile_rollups([self.user.id])
+        self.assertEqual(len(drifts), 1)
+        self.assertEqual(self.rollup("樂", date(2025, 1, 1)).total, Decimal("50"))
+        self.assertEqual(reconcile_rollups(fix=False), [])
+
+    def test_deferred_loads_keep_rollups_in_sync(self):
+        entry_id = self.post_json(
+            "/expense/", {"type": "食", "amount": "120", "entry_date": "2025-03-05"}
+        ).json()["id"]
+        entry = ExpenseEntry.objects.only("id", "note").get(id=entry_id)
+        entry.amount = Decimal("80")
+        entry.save()
+        self.assertEqual(self.rollup("食", date(2025, 3, 1)).total, Decimal("80"))
+        self.assertEqual(reconcile_rollups(fix=False), [])
+
+        ExpenseEntry.objects.defer("amount", "entry_date").get(id=entry_id).delete()
+        self.assertEqual(self.rollup("食", date(2025, 3, 1)).entry_count, 0)
+        self.assertEqual(reconcile_rollups(fix=False), [])
+
+    def test_category_delete_cascades_rollups(self):
+        category = IncomeCategory.objects.get(user=self.user, name="投資")
+        self.post_json("/income/", {"type": "投資", "amount": "10", "entry_date": "2025-05-01"})
+        category.delete()
+        self.assertEqual(reconcile_rollups(fix=False), [])
+
+
+class CategoryTotalsTests(FinanceTestCase):
+    def test_lists_every_category_with_zero_totals(self):
+        self.post_json("/expense/", {"type": "食", "amount": "80", "entry_date": "2025-06-03"})
+        self.post_json("/expense/", {"type": "食", "amount": "20", "entry_date": "2025-07-03"})
+        with self.assertNumQueries(4):  # session, user, data version, grouped totals
+            res = self.client.get("/expense/totals/?month=2025-06-01")
+        body = res.json()
+        totals = {row["name"]: row["total"] for row in body["types"]}
+        self.assertEqual(set(totals), {"食", "衣", "住", "行", "育", "樂"})
+        self.assertEqual(totals["食"], 80.0)
+        self.assertEqual(totals["樂"], 0.0)
+        self.assertEqual(body["total"], 80.0)
+
+        res = self.client.get("/income/totals/")
+        self.assertEqual(
+            {row["name"]: row["total"] for row in res.json()["types"]},
+            {"薪資": 0.0, "獎助金": 0.0, "投資": 0.0, "其他": 0.0},
+        )
+
+
+class LedgerPaginationTests(FinanceTestCase):
+    def setUp(self):
+        super().setUp()
+        for day in (1, 1, 2, 3):
+            self.post_json("/expense/", {"type": "食", "amount": "10", "entry_date": f"2025-08-0{day}"})
+            self.post_json("/income/", {"type": "薪資", "amount": "5", "entry_date": f"2025-08-0{day}"})
+
+    def test_cursor_walk_matches_page_walk(self):
+        paged = []
+        for page in (1, 2, 3):
+            body = self.client.get(f"/ledger/?page={page}&page_size=3").json()
+            self.assertEqual(body["total"], 8)
+            paged += [(item["kind"], item["id"]) for item in body["items"]]
+
+        walked, after = [], ""
+        while True:
+            body = self.client.get(f"/ledger/?page_size=3{after}").json()
+            walked += [(item["kind"], item["id"]) for item in body["items"]]
+            if not body["next"]:
+                break
+            after = f"&after={body['next']}"
+        self.assertEqual(walked, paged)
+        self.assertEqual(len(set(walked)), 8)
+        dates = [item["date"] for item in self.client.get("/ledger/?page_size=8").json()["items"]]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+    def test_same_day_entries_keep_id_order(self):
+        # 與改版前相同：日期由新到舊，同一天 id 由小到大，id 相同時支出在前
+        items = self.client.get("/ledger/?page_size=8").json()["items"]
+        keys = [(item["date"], item["id"], item["kind"]) for item in items]
+        expected = sorted(keys, key=lambda key: (key[1], key[2]))
+        expected.sort(key=lambda key: key[0], reverse=True)
+        self.assertEqual(keys, expected)
+        first_day = [(kind, entry_id) for day, entry_id, kind in keys if day == "2025-08-01"]
+        self.assertEqual([kind for kind, _ in first_day], ["expense", "income", "expense", "income"])
+
+    def test_cursor_pages_skip_total_and_filter_by_kind(self):
+        first = self.client.get("/ledger/?kind=income&page_size=2").json()
+        with self.assertNumQueries(3):  # session, user, one page query
+            second = self.client.get(f"/ledger/?kind=income&page_size=2&after={first['next']}").json()
+        self.assertNotIn("total", second)
+        self.assertTrue(all(item["kind"] == "income" for item in second["items"]))
+        self.assertEqual(self.client.get("/ledger/?after=bogus").status_code, 400)
+
+
+class QueryPlanTests(FinanceTestCase):
+    """EXPLAIN the queries issued by the hot paths and check they are index-backed (SQLite)."""
+
+    def setUp(self):
+        super().setUp()
+        if connection.vendor != "sqlite":
+            self.skipTest("query plans are checked against SQLite")
+        self.post_json("/purpose/", {"name": "budget", "type": "expense", "target_amount": "500", "target_month": "2025-09-01"})
+        for day in range(1, 6):
+            self.post_json("/expense/", {"type": "食", "amount": "10", "entry_date": f"2025-09-0{day}"})
+            self.post_json("/income/", {"type": "薪資", "amount": "10", "entry_date": f"2025-09-0{day}"})
+
+    def query_plans(self, func):
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            statements.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            func()
+        plans = {}
+        with connection.cursor() as cursor:
+            for sql, params in statements:
+                if not sql.lstrip().upper().startswith("SELECT") or "myapp_" not in sql:
+                    continue
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plans[sql] = "\n".join(row[-1] for row in cursor.fetchall())
+        return plans
+
+    def assert_indexed(self, plans, *index_names):
+        text = "\n".join(plans.values())
+        for sql, plan in plans.items():
+            full_scans = [
+                line for line in plan.splitlines()
+                if re.match(r"\s*SCAN myapp_\w+$", line.strip())
+            ]
+            self.assertEqual(full_scans, [], f"{sql}\n{plan}")
+        for name in index_names:
+            self.assertIn(name, text)
+
+    def test_summarize_month_uses_indexes(self):
+        plans = self.query_plans(lambda: summarize_month(self.user, date(2025, 9, 1)))
+        self.assert_indexed(plans, "myapp_goal_user_month_type")
+
+    def test_ledger_uses_user_date_index(self):
+        plans = self.query_plans(lambda: self.client.get("/ledger/?month=2025-09-01&page_size=3"))
+        self.assert_indexed(plans, "myapp_expenseentry_user_date", "myapp_incomeentry_user_date")
+        plans = self.query_plans(lambda: self.client.get("/ledger/?kind=expense&type=食"))
+        self.assert_indexed(plans, "myapp_expenseentry_user_cat")
+
+    def test_ledger_filters_and_sorts_use_indexes(self):
+        plans = self.query_plans(lambda: self.client.get("/ledger/?sort=-amount&amount_min=5&page_size=3"))
+        self.assert_indexed(plans, "myapp_expenseentry_user_amount", "myapp_incomeentry_user_amount")
+        plans = self.query_plans(
+            lambda: self.client.get("/ledger/?kind=expense&type=食&type=行&date_from=2025-09-02&sort=date")
+        )
+        self.assert_indexed(plans)
+
+    def test_ledger_search_uses_full_text_index(self):
+        plans = self.query_plans(lambda: self.client.get("/ledger/?q=lunch"))
+        self.assert_indexed(plans, "myapp_expenseentry_fts VIRTUAL TABLE", "myapp_incomeentry_fts VIRTUAL TABLE")
+
+    def test_create_expense_uses_indexes(self):
+        plans = self.query_plans(
+            lambda: self.post_json("/expense/", {"type": "食", "amount": "10", "entry_date": "2025-09-09"})
+        )
+        self.assert_indexed(plans, "myapp_goal_user_month_type")
+
+
+class MonthlyReportBatchTests(FinanceTestCase):
+    def test_batch_matches_per_user_summaries(self):
+        bob = User.objects.create_user(username="bob", password="s3cret-pass")
+        ensure_default_categories(bob)
+        self.post_json("/expense/", {"type": "食", "amount": "70", "entry_date": "2025-10-04"})
+        self.post_json("/income/", {"type": "薪資", "amount": "300", "entry_date": "2025-10-05"})
+        self.post_json("/purpose/", {"name": "save", "type": "income", "target_amount": "600", "target_month": "2025-10-01"})
+        MonthlyReport.objects.create(user=bob, month=date(2025, 10, 1), summary={"stale": True})
+
+        with self.assertNumQueries(7):  # users, 2 rollups, goals, upsert, delivered, end of stream
+            result = generate_monthly_reports_batch(date(2025, 10, 1), chunk_size=10)
+        self.assertEqual((result.generated, result.failed), (2, 0))
+
+        for user in (self.user, bob):
+            report = MonthlyReport.objects.get(user=user, month=date(2025, 10, 1))
+            expected = summarize_month(user, date(2025, 10, 1))
+            self.assertTrue(report.delivered)
+            self.assertEqual(report.summary["net"], float(expected.net))
+            self.assertEqual(report.summary["goal_progress"], expected.goal_progress)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_worker_ranges_cover_every_user_once(self):
+        for name in ("bob", "carol", "dave", "erin"):
+            User.objects.create_user(username=name, password="s3cret-pass")
+        ranges = list(_user_id_ranges(2))
+        self.assertEqual(len(ranges), 3)
+        generated = [_generate_reports_range(first, last, date(2025, 10, 1)).generated for first, last in ranges]
+        self.assertEqual(generated, [2, 2, 1])
+        self.assertEqual(MonthlyReport.objects.filter(month=date(2025, 10, 1)).count(), 5)
+
+
+class FlakyEmailBackend(LocmemEmailBackend):
+    """locmem backend that rejects the listed recipients a given number of times."""
+
+    failures = {}
+
+    def send_messages(self, messages):
+        for message in messages:
+            recipient = message.to[0]
+            remaining = self.failures.get(recipient, 0)
+            if remaining:
+                self.failures[recipient] = remaining - 1
+                raise ConnectionError(f"rejected {recipient}")
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND="myapp.tests.FlakyEmailBackend", REPORT_EMAIL_RETRY_BACKOFF=0)
+class ReportDeliveryTests(FinanceTestCase):
+    def setUp(self):
+        super().setUp()
+        FlakyEmailBackend.failures = {"flaky@example.com": 1, "down@example.com": 99}
+
+    def test_retries_failures_with_backoff(self):
+        outgoing = [
+            (address, mail.EmailMessage("s", "b", "from@example.com", [address]))
+            for address in ("a@example.com", "flaky@example.com", "down@example.com", "b@example.com")
+        ]
+        delays = []
+        result = deliver_messages(outgoing, batch_size=2, max_attempts=3, backoff=0.5, sleep=delays.append)
+
+        self.assertEqual(sorted(result.delivered), ["a@example.com", "b@example.com", "flaky@example.com"])
+        self.assertEqual(list(result.failed), ["down@example.com"])
+        self.assertEqual(delays, [0.5, 1.0])
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_batch_reports_only_mark_accepted_messages_delivered(self):
+        bob = User.objects.create_user(username="bob", password="s3cret-pass", email="down@example.com")
+        generate_monthly_reports_batch(date(2025, 11, 1))
+        delivered = dict(MonthlyReport.objects.values_list("user__username", "delivered"))
+        self.assertEqual(delivered, {"alice": True, "bob": False})
+
+    def test_default_run_uses_pooled_delivery_and_reports_failures(self):
+        User.objects.create_user(username="bob", password="s3cret-pass", email="down@example.com")
+        User.objects.create_user(username="carol", password="s3cret-pass", email="flaky@example.com")
+        result = generate_monthly_reports(date(2025, 11, 1))
+        self.assertEqual((result.generated, result.failed), (3, 1))
+        delivered = dict(MonthlyReport.objects.values_list("user__username", "delivered"))
+        self.assertEqual(delivered, {"alice": True, "bob": False, "carol": True})
+        self.assertEqual(len(mail.outbox), 2)
+
+        stdout, stderr = StringIO(), StringIO()
+        FlakyEmailBackend.failures["down@example.com"] = 99
+        call_command("send_monthly_reports", month="2025-11", stdout=stdout, stderr=stderr)
+        self.assertIn("1 emails could not be sent", stderr.getvalue())
+        self.assertNotIn("Monthly reports sent", stdout.getvalue())
+
+
+class BulkImportTests(FinanceTestCase):
+    def test_csv_import_reports_row_errors(self):
+        body = "\n".join([
+            "kind,type,amount,entry_date,note",
+            "expense,食,12.5,2025-12-01,lunch",
+            "income,薪資,1000,2025-12-05,",
+            "expense,不存在,5,2025-12-02,",
+            "expense,行,-3,2025-12-02,",
+            "transfer,食,1,2025-12-02,",
+            "expense,食,NaN,2025-12-02,",
+            "expense,食,sNaN,2025-12-02,",
+            "expense,食,-Infinity,2025-12-02,",
+        ])
+        res = self.client.post("/import/", body, content_type="text/csv")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.json()["created"], 2)
+        self.assertEqual([e["row"] for e in res.json()["errors"]], [3, 4, 5, 6, 7, 8])
+        self.assertEqual({e["error"] for e in res.json()["errors"][3:]}, {"Invalid amount value."})
+        self.assertEqual(category_totals(KIND_EXPENSE, self.user), {"食": Decimal("12.50")})
+        self.assertEqual(reconcile_rollups(fix=False), [])
+
+    def test_json_import_with_fixed_kind(self):
+        rows = [{"type": "薪資", "amount": 10 + i, "date": "2025-12-0%d" % (i + 1)} for i in range(5)]
+        res = self.post_json("/import/?kind=income", rows)
+        self.assertEqual(res.json(), {"created": 5, "failed": 0, "errors": []})
+        self.assertEqual(self.post_json("/import/", {"not": "an array"}).status_code, 400)
+        res = self.client.post(
+            "/import/?kind=income", '[{"type": "薪資", "amount": Infinity}, {"type": "薪資", "amount": NaN}]',
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual([e["error"] for e in res.json()["errors"]], ["Invalid amount value."] * 2)
+
+    def test_malformed_csv_reports_the_line(self):
+        body = "\n".join([
+            "kind,type,amount,entry_date,note",
+            "expense,食,12.5,2025-12-01,lunch",
+            'expense,食,1,2025-12-02,"' + "x" * 200_000 + '"',
+            "expense,食,3,2025-12-03,",
+        ])
+        res = self.client.post("/import/", body, content_type="text/csv")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.json()["created"], 1)
+        [error] = res.json()["errors"]
+        self.assertEqual(error["row"], 2)
+        self.assertIn("Invalid CSV at line 3", error["error"])
+        self.assertEqual(self.client.post("/import/", b"kind,type\n\xff\xfe", content_type="text/csv").status_code, 400)
+
+
+class LedgerExportTests(FinanceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.post_json("/expense/", {"type": "食", "amount": "10", "entry_date": "2025-08-01", "note": "a,b"})
+        self.post_json("/income/", {"type": "薪資", "amount": "5", "entry_date": "2025-08-02"})
+        self.post_json("/expense/", {"type": "行", "amount": "3", "entry_date": "2025-09-01"})
+
+    def test_csv_export_streams_filtered_rows(self):
+        res = self.client.get("/ledger/export/?month=2025-08-01")
+        self.assertTrue(res.streaming)
+        lines = b"".join(res.streaming_content).decode("utf-8-sig").splitlines()
+        self.assertEqual(lines[0], "date,kind,type,amount,note,id")
+        self.assertEqual([line.split(",")[:2] for line in lines[1:]], [["2025-08-02", "income"], ["2025-08-01", "expense"]])
+        self.assertIn('"a,b"', lines[2])
+
+    def test_ndjson_export(self):
+        res = self.client.get("/ledger/export/?format=ndjson&kind=expense")
+        self.assertEqual(res["Content-Type"], "application/x-ndjson; charset=utf-8")
+        items = [json.loads(line) for line in b"".join(res.streaming_content).splitlines()]
+        self.assertEqual([item["type"] for item in items], ["行", "食"])
+        self.assertEqual(self.client.get("/ledger/export/?format=xml").status_code, 400)
+
+
+@override_settings(CATEGORY_CACHE_TTL=300)
+class CategoryCacheTests(FinanceTestCase):
+    def test_writes_reuse_cached_category_ids(self):
+        self.post_json("/expense/", {"type": "食", "amount": "1", "entry_date": "2025-08-01"})
+        with CaptureQueriesContext(connection) as queries:
+            res = self.post_json("/expense/", {"type": "行", "amount": "2", "entry_date": "2025-08-01"})
+        self.assertEqual(res.status_code, 201)
+        self.assertFalse([q for q in queries if "myapp_expensecategory" in q["sql"]])
+        entry = ExpenseEntry.objects.get(id=res.json()["id"])
+        self.assertEqual(entry.category.name, "行")
+
+    def test_rename_and_delete_invalidate_cache(self):
+        self.assertEqual(self.post_json("/income/", {"type": "薪資", "amount": "1"}).status_code, 201)
+        category = IncomeCategory.objects.get(user=self.user, name="薪資")
+        category.name = "月薪"
+        category.save()
+        self.assertEqual(self.post_json("/income/", {"type": "薪資", "amount": "1"}).status_code, 400)
+        res = self.post_json("/income/", {"type": "月薪", "amount": "1"})
+        self.assertEqual(IncomeEntry.objects.get(id=res.json()["id"]).category_id, category.id)
+
+        ExpenseCategory.objects.filter(user=self.user, name="樂").get().delete()
+        res = self.patch_json(f"/income/{res.json()['id']}/", {"type": "其他"})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.post_json("/expense/", {"type": "樂", "amount": "1"}).status_code, 400)
+
+    def test_maps_live_in_the_shared_cache(self):
+        self.post_json("/expense/", {"type": "食", "amount": "1", "entry_date": "2025-08-01"})
+        key = (KIND_EXPENSE, self.user.pk)
+        category = ExpenseCategory.objects.get(user=self.user, name="食")
+        self.assertEqual(category_cache.get(key)["食"], category.id)
+        category.name = "餐飲"
+        category.save()
+        # 其他 worker 讀同一個快取，也看不到舊的名稱
+        self.assertIsNone(category_cache.get(key))
+
+    @override_settings(CATEGORY_CACHE_TTL=0)
+    def test_disabled_cache_reads_the_database(self):
+        self.post_json("/expense/", {"type": "食", "amount": "1", "entry_date": "2025-08-01"})
+        self.assertIsNone(category_cache.get((KIND_EXPENSE, self.user.pk)))
+        # 其他 worker 改名（不經過這個行程的 signal）後立即生效
+        ExpenseCategory.objects.filter(user=self.user, name="食").update(name="餐飲")
+        self.assertEqual(self.post_json("/expense/", {"type": "食", "amount": "1"}).status_code, 400)
+        self.assertEqual(self.post_json("/expense/", {"type": "餐飲", "amount": "1"}).status_code, 201)
+
+
+class DashboardTests(FinanceTestCase):
+    def test_dashboard_matches_individual_endpoints(self):
+        self.post_json("/expense/", {"type": "食", "amount": "80", "entry_date": "2025-06-03"})
+        self.post_json("/income/", {"type": "薪資", "amount": "100", "entry_date": "2025-06-05"})
+        self.post_json("/purpose/", {"name": "省錢", "type": "expense", "target_amount": "50", "target_month": "2025-06-01"})
+        # session, user, two category breakdowns, goals, latest report
+        with self.assertNumQueries(6):
+            body = self.client.get("/dashboard/?month=2025-06-01").json()
+        self.assertEqual(body["totals"], {"income": 100.0, "expense": 80.0, "net": 20.0})
+        self.assertEqual(body["expense"]["食"], 80.0)
+        self.assertEqual(body["expense"]["樂"], 0.0)
+        self.assertEqual(body["goals"], self.client.get("/purpose/?month=2025-06-01").json()["goals"])
+        self.assertEqual(body["insights"], self.client.get("/insights/?month=2025-06-01").json()["insights"])
+        self.assertEqual(body["report_status"], {"month": None, "delivered": False})
+
+
+class ConditionalGetTests(FinanceTestCase):
+    def test_not_modified_until_user_data_changes(self):
+        res = self.client.get("/report/overview/?month=2025-06-01")
+        etag = res["ETag"]
+        # session, user, data version; the summary is not recomputed
+        with self.assertNumQueries(3):
+            res = self.client.get("/report/overview/?month=2025-06-01", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(self.client.get("/income/types/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.post_json("/purpose/", {"name": "存錢", "type": "income", "target_amount": "10"})
+        res = self.client.get("/report/overview/?month=2025-06-01", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res["ETag"], etag)
+
+        etag = res["ETag"]
+        entry_id = self.post_json("/expense/", {"type": "食", "amount": "5"}).json()["id"]
+        self.assertEqual(self.client.get("/expense/total/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        etag = self.client.get("/expense/total/")["ETag"]
+        self.client.delete(f"/expense/{entry_id}/")
+        self.assertEqual(self.client.get("/expense/total/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_is_per_user(self):
+        etag = self.client.get("/expense/types/")["ETag"]
+        other = User.objects.create_user(username="bob", password="s3cret-pass")
+        self.client.force_login(other)
+        self.assertEqual(self.client.get("/expense/types/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(SUMMARY_CACHE_TIMEOUT=3600)
+class SummaryCacheTests(FinanceTestCase):
+    def test_writes_only_invalidate_their_month(self):
+        feb, mar = date(2025, 2, 1), date(2025, 3, 1)
+        self.post_json("/expense/", {"type": "食", "amount": "10", "entry_date": "2025-02-10"})
+        summarize_month(self.user, feb)
+        summarize_month(self.user, mar)
+        with self.assertNumQueries(0):
+            self.assertEqual(summarize_month(self.user, feb).total_expense, Decimal("10"))
+        self.assertEqual(summary_cache.stats(), {"hits": 1, "misses": 2})
+
+        self.post_json("/expense/", {"type": "食", "amount": "5", "entry_date": "2025-03-02"})
+        with self.assertNumQueries(0):
+            summarize_month(self.user, feb)
+        self.assertEqual(summarize_month(self.user, mar).total_expense, Decimal("5"))
+
+        entry = ExpenseEntry.objects.get(entry_date=date(2025, 2, 10))
+        self.patch_json(f"/expense/{entry.id}/", {"entry_date": "2025-03-10"})
+        self.assertEqual(summarize_month(self.user, feb).total_expense, Decimal("0"))
+        self.assertEqual(summarize_month(self.user, mar).total_expense, Decimal("15"))
+
+    def test_category_rename_and_goals_invalidate(self):
+        self.post_json("/income/", {"type": "薪資", "amount": "10", "entry_date": "2025-02-10"})
+        self.assertIn("薪資", summarize_month(self.user, date(2025, 2, 1)).income_by_category)
+        category = IncomeCategory.objects.get(user=self.user, name="薪資")
+        category.name = "月薪"
+        category.save()
+        self.assertIn("月薪", summarize_month(self.user, date(2025, 2, 1)).income_by_category)
+
+        self.post_json("/purpose/", {"name": "存錢", "type": "income", "target_amount": "20", "target_month": "2025-02-01"})
+        goals = summarize_month(self.user, date(2025, 2, 1)).goal_progress
+        self.assertEqual([(goal["name"], goal["percentage"]) for goal in goals], [("存錢", 50.0)])
+
+    @override_settings(SUMMARY_CACHE_TIMEOUT=0)
+    def test_disabled_cache_always_computes(self):
+        summarize_month(self.user, date(2025, 2, 1))
+        with CaptureQueriesContext(connection) as queries:
+            summarize_month(self.user, date(2025, 2, 1))
+        self.assertGreater(len(queries), 0)
+        self.assertEqual(summary_cache.stats(), {"hits": 0, "misses": 0})
+
+    def test_hits_and_misses_are_exported_as_metrics(self):
+        summarize_month(self.user, date(2025, 2, 1))
+        summarize_month(self.user, date(2025, 2, 1))
+        body = metrics_registry.render()
+        self.assertIn('myapp_summary_cache_lookups_total{result="hit"} 1', body)
+        self.assertIn('myapp_summary_cache_lookups_total{result="miss"} 1', body)
+
+
+class TrendTests(FinanceTestCase):
+    def test_series_are_zero_filled_with_constant_queries(self):
+        self.post_json("/expense/", {"type": "食", "amount": "10", "entry_date": "2024-12-05"})
+        self.post_json("/expense/", {"type": "行", "amount": "4", "entry_date": "2025-02-01"})
+        self.post_json("/income/", {"type": "薪資", "amount": "100", "entry_date": "2025-02-20"})
+        # session, user, data version, one grouped query per kind
+        with self.assertNumQueries(5):
+            body = self.client.get("/report/trend/?from=2024-11&to=2025-03").json()
+        self.assertEqual(body["months"], ["2024-11", "2024-12", "2025-01", "2025-02", "2025-03"])
+        self.assertEqual(body["expense"]["total"], [0.0, 10.0, 0.0, 4.0, 0.0])
+        self.assertEqual(body["expense"]["by_category"]["食"], [0.0, 10.0, 0.0, 0.0, 0.0])
+        self.assertEqual(body["income"]["by_category"], {"薪資": [0.0, 0.0, 0.0, 100.0, 0.0]})
+        self.assertEqual(body["net"], [0.0, -10.0, 0.0, 96.0, 0.0])
+
+    def test_default_range_and_validation(self):
+        body = self.client.get("/report/trend/?to=2025-06").json()
+        self.assertEqual((body["months"][0], len(body["months"])), ("2024-07", 12))
+        self.assertEqual(self.client.get("/report/trend/?from=2025-06&to=2025-01").status_code, 400)
+        self.assertEqual(self.client.get("/report/trend/?from=2000-01&to=2025-01").status_code, 400)
+
+
+class GoalProgressTests(FinanceTestCase):
+    def test_range_evaluates_goals_per_month_and_kind(self):
+        self.post_json("/expense/", {"type": "食", "amount": "30", "entry_date": "2025-01-05"})
+        self.post_json("/expense/", {"type": "行", "amount": "90", "entry_date": "2025-02-05"})
+        self.post_json("/income/", {"type": "薪資", "amount": "50", "entry_date": "2025-02-07"})
+        for month, goal_type, target in (("2025-01-01", "expense", "60"), ("2025-02-01", "expense", "60"), ("2025-02-01", "income", "200")):
+            self.post_json("/purpose/", {"name": "月目標", "type": goal_type, "target_amount": target, "target_month": month})
+        # session, user, data version, goals, one total per goal type
+        with self.assertNumQueries(6):
+            goals = self.client.get("/goals/?from=2025-01&to=2025-03").json()["goals"]
+        self.assertEqual(
+            [(g["target_month"], g["type"], g["progress"], g["percentage"]) for g in goals],
+            [("2025-01-01", "expense", 30.0, 50.0), ("2025-02-01", "expense", 90.0, 150.0), ("2025-02-01", "income", 50.0, 25.0)],
+        )
+        detail = self.client.get("/purpose/月目標/?type=income&month=2025-02-01").json()
+        self.assertEqual(detail, goals[2])
+        self.assertEqual(self.client.get("/purpose/?month=2025-02-01").json()["goals"], goals[1:])
+        self.assertEqual(self.client.get("/goals/?from=2025-03&to=2025-01").status_code, 400)
+
+
+class JsonRenderingTests(FinanceTestCase):
+    def test_encoders_agree_on_decimals_and_dates(self):
+        payload = {"amount": Decimal("12.50"), "day": date(2025, 1, 2), "name": "餐飲", "ids": (1, 2)}
+        expected = {"amount": 12.5, "day": "2025-01-02", "name": "餐飲", "ids": [1, 2]}
+        self.assertEqual(json.loads(rendering.stdlib_dumps(payload)), expected)
+        if rendering.orjson is not None:
+            self.assertEqual(json.loads(rendering.orjson_dumps(payload)), expected)
+
+    def test_drf_and_plain_views_use_fast_renderer(self):
+        self.post_json("/expense/", {"type": "食", "amount": "12.5"})
+        for path in ("/expense/total/", "/income/total/"):
+            res = self.client.get(path)
+            self.assertEqual(res["Content-Type"], "application/json")
+            self.assertIn(res.json()["total"], (12.5, 0.0))
+
+
+class AsyncViewTests(FinanceFixtures, TransactionTestCase):
+    # async 視圖把查詢交給其他執行緒，需要已提交的資料
+    def call_async(self, view, path, user=None, **kwargs):
+        request = AsyncRequestFactory().get(path)
+
+        async def auser():
+            return user or self.user
+
+        request.auser = auser
+        return async_to_sync(view)(request, **kwargs)
+
+    def test_async_views_match_sync_views(self):
+        self.post_json("/income/", {"type": "薪資", "amount": "3000", "entry_date": "2025-05-01"})
+        self.post_json("/expense/", {"type": "食", "amount": "120.5", "entry_date": "2025-05-03"})
+        self.post_json("/expense/", {"type": "行", "amount": "80", "entry_date": "2025-04-20"})
+        cases = [
+            (async_views.report_overview, "/report/overview/?month=2025-05-01"),
+            (async_views.insights, "/insights/?month=2025-05-01"),
+            (async_views.ledger, "/ledger/?kind=all&page_size=2&with_total=1"),
+            (async_views.expense_total, "/expense/total/"),
+            (async_views.income_total, "/income/total/?month=2025-05-01"),
+            (async_views.expense_type_totals, "/expense/totals/?month=2025-05-01"),
+            (async_views.income_type_totals, "/income/totals/"),
+            (async_views.expense_type_total, "/expense/types/食/", {"name": "食"}),
+            (async_views.income_type_total, "/income/types/薪資/?month=2025-05-01", {"name": "薪資"}),
+        ]
+        for view, path, *kwargs in cases:
+            with self.subTest(path=path):
+                expected = self.client.get(path)
+                res = self.call_async(view, path, **(kwargs[0] if kwargs else {}))
+                self.assertEqual(res.status_code, 200)
+                self.assertEqual(json.loads(res.content), expected.json())
+                if expected.has_header("ETag"):
+                    self.assertEqual(res["ETag"], expected["ETag"])
+
+    def test_async_views_reject_anonymous_users_like_sync_views(self):
+        self.client.logout()
+        cases = [
+            (async_views.report_overview, "/report/overview/", {}),
+            (async_views.insights, "/insights/", {}),
+            (async_views.ledger, "/ledger/", {}),
+            (async_views.expense_total, "/expense/total/", {}),
+            (async_views.income_total, "/income/total/", {}),
+            (async_views.expense_type_totals, "/expense/totals/", {}),
+            (async_views.income_type_totals, "/income/totals/", {}),
+            (async_views.expense_type_total, "/expense/types/食/", {"name": "食"}),
+            (async_views.income_type_total, "/income/types/薪資/", {"name": "薪資"}),
+        ]
+        for view, path, kwargs in cases:
+            with self.subTest(path=path):
+                expected = self.client.get(path)
+                res = self.call_async(view, path, user=AnonymousUser(), **kwargs)
+                self.assertEqual(res.status_code, expected.status_code)
+                self.assertEqual(json.loads(res.content), expected.json())
+
+    def test_async_report_rejects_bad_month(self):
+        res = self.call_async(async_views.report_overview, "/report/overview/?month=May")
+        self.assertEqual(res.status_code, 400)
+
+
+class MetricsTests(FinanceTestCase):
+    def setUp(self):
+        super().setUp()
+        metrics_registry.reset()
+
+    @override_settings(METRICS_SERVER_TIMING=True)
+    def test_server_timing_header_reports_queries(self):
+        self.post_json("/expense/", {"type": "食", "amount": "50", "entry_date": "2025-05-03"})
+        res = self.client.get("/ledger/?kind=all")
+        match = re.search(r'db;dur=[\d.]+;desc="(\d+) queries", view;dur=[\d.]+, '
+                          r'serialize;dur=[\d.]+, total;dur=[\d.]+', res["Server-Timing"])
+        self.assertIsNotNone(match)
+        self.assertGreater(int(match.group(1)), 0)
+
+    @override_settings(METRICS_SAMPLE_RATE=1.0, METRICS_TOKEN="scrape-me")
+    def test_metrics_endpoint_aggregates_per_route(self):
+        self.client.get("/ledger/")
+        self.client.get("/ledger/?page=2")
+        self.client.get("/expense/999/")
+        self.assertFalse(self.client.get("/ledger/").has_header("Server-Timing"))
+
+        self.assertEqual(self.client.get("/metrics/").status_code, 403)
+        body = self.client.get("/metrics/", HTTP_AUTHORIZATION="Bearer scrape-me").content.decode()
+        self.assertIn('myapp_requests_total{route="ledger/",method="GET",status="200"} 3', body)
+        self.assertIn('myapp_request_duration_seconds_count{route="ledger/"} 3', body)
+        self.assertIn('myapp_request_queries_bucket{route="expense/<int:entry_id>/",le="+Inf"} 1', body)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_only_counted(self):
+        self.client.get("/ledger/")
+        body = metrics_registry.render()
+        self.assertIn('myapp_requests_total{route="ledger/",method="GET",status="200"} 1', body)
+        self.assertNotIn('myapp_request_duration_seconds_count{route="ledger/"}', body)
+
+    def test_metrics_dir_sums_every_worker(self):
+        other_worker = MetricsRegistry()
+        for _ in range(2):
+            other_worker.count_request("ledger/", "GET", 200)
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "1.json"), "w", encoding="utf-8") as fh:
+                json.dump(other_worker.snapshot(), fh)
+            with self.settings(METRICS_DIR=directory, METRICS_SAMPLE_RATE=1.0):
+                self.client.get("/ledger/")
+                self.assertTrue(os.path.exists(os.path.join(directory, f"{os.getpid()}.json")))
+                body = metrics_registry.render()
+        self.assertIn('myapp_requests_total{route="ledger/",method="GET",status="200"} 3', body)
+        self.assertIn('myapp_request_duration_seconds_count{route="ledger/"} 1', body)
+
+
+class BenchmarkHarnessTests(TransactionTestCase):
+    def test_percentile_is_nearest_rank(self):
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_seed_is_deterministic_and_scenarios_run(self):
+        users = seed_users(2, 50, 8, seed=7, end=date(2025, 6, 1))
+        self.assertEqual(ExpenseCategory.objects.filter(user=users[0]).count(), 8)
+        self.assertEqual(ExpenseEntry.objects.filter(user__in=users).count(), 80)
+        self.assertEqual(IncomeEntry.objects.filter(user__in=users).count(), 20)
+        self.assertEqual(reconcile_rollups(fix=False), [])
+        self.assertEqual(reconcile_counters(fix=False), [])
+        amounts = list(ExpenseEntry.objects.order_by("id").values_list("amount", flat=True)[:5])
+
+        bench_users = bench_users_for(users, "bench-pass", 8, date(2025, 6, 1))
+        result = run_scenario(SCENARIOS["ledger"], users, bench_users, requests=6, concurrency=2)
+        self.assertEqual((result["requests"], result["errors"]), (6, 0))
+        self.assertGreater(result["queries"]["mean"], 0)
+        self.assertLessEqual(result["latency_ms"]["p50"], result["latency_ms"]["p99"])
+
+        User.objects.all().delete()
+        users = seed_users(2, 50, 8, seed=7, end=date(2025, 6, 1))
+        self.assertEqual(list(ExpenseEntry.objects.order_by("id").values_list("amount", flat=True)[:5]), amounts)
+
+
+class LoadDataTests(TestCase):
+    def entries(self, prefix):
+        return list(
+            ExpenseEntry.objects.filter(user__username__startswith=prefix)
+            .order_by("user__username", "id")
+            .values_list("category__name", "amount", "entry_date", "note")
+        )
+
+    def test_generation_is_deterministic_and_consistent(self):
+        stats = seed_load_data(3, 40, years=1, seed=5, prefix="a", batch_users=2, end=date(2025, 6, 15))
+        seed_load_data(3, 40, years=1, seed=5, prefix="b", batch_users=3, end=date(2025, 6, 15))
+        self.assertEqual(self.entries("a"), self.entries("b"))
+        self.assertEqual(stats.users, 3)
+        self.assertEqual(
+            stats.entries,
+            ExpenseEntry.objects.filter(user__username__startswith="a").count()
+            + IncomeEntry.objects.filter(user__username__startswith="a").count(),
+        )
+        # 2024-06 到 2025-05 共 12 個已結束的月份
+        self.assertEqual(MonthlyReport.objects.filter(user__username="a0000000").count(), 12)
+        self.assertTrue(FinancialGoal.objects.filter(user__username__startswith="a").exists())
+        self.assertTrue(IncomeEntry.objects.filter(user__username="a0000000", category__name="薪資").exists())
+        self.assertEqual(reconcile_rollups(fix=False), [])
+        self.assertEqual(reconcile_counters(fix=False), [])
+
+
+class SqliteProfileTests(TestCase):
+    def test_production_profile_sets_pragmas_and_immediate_transactions(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite only")
+        handle, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(lambda: [os.remove(path + s) for s in ("", "-wal", "-shm") if os.path.exists(path + s)])
+        wrapper = connections[DEFAULT_DB_ALIAS].__class__(
+            {**connection.settings_dict, "NAME": path, "OPTIONS": settings.SQLITE_PRODUCTION_OPTIONS},
+            alias=connection.alias,
+        )
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            pragmas = {}
+            for name in ("journal_mode", "synchronous", "busy_timeout", "temp_store"):
+                cursor.execute(f"PRAGMA {name}")
+                pragmas[name] = cursor.fetchone()[0]
+        self.assertEqual(pragmas["journal_mode"], "wal")
+        self.assertEqual(pragmas["synchronous"], 1)  # NORMAL
+        self.assertEqual(pragmas["busy_timeout"], settings.SQLITE_BUSY_TIMEOUT_MS)
+        self.assertEqual(pragmas["temp_store"], 2)  # MEMORY
+        self.assertEqual(wrapper.transaction_mode, "IMMEDIATE")
+
+
+class QuotaCounterTests(FinanceTestCase):
+    def counters(self):
+        return UserCounters.objects.values(
+            "expense_entries", "income_entries", "expense_categories", "income_categories"
+        ).get(user=self.user)
+
+    def test_counters_follow_creates_bulk_imports_and_cascades(self):
+        self.assertEqual(self.counters()["expense_categories"], 6)
+        entry_id = self.post_json(
+            "/expense/", {"type": "食", "amount": "10", "entry_date": "2025-07-01"}
+        ).json()["id"]
+        self.post_json("/expense/", {"type": "行", "amount": "20", "entry_date": "2025-07-02"})
+        self.post_json("/income/", {"type": "薪資", "amount": "900", "entry_date": "2025-07-05"})
+        self.post_json("/import/?kind=expense", [{"type": "行", "amount": 5, "date": "2025-08-01"}] * 3)
+        self.post_json("/income/types/", {"name": "紅利"})
+        self.assertEqual(self.counters(), {
+            "expense_entries": 5, "income_entries": 1, "expense_categories": 6, "income_categories": 5,
+        })
+
+        self.client.delete(f"/expense/{entry_id}/")
+        ExpenseCategory.objects.get(user=self.user, name="行").delete()  # cascade 刪除 4 筆
+        self.client.delete("/insights/?month=2025-07-01")
+        self.assertEqual(self.counters(), {
+            "expense_entries": 0, "income_entries": 0, "expense_categories": 5, "income_categories": 5,
+        })
+        self.assertEqual(reconcile_counters(fix=False), [])
+
+    def test_quota_is_checked_without_counting_rows(self):
+        UserCounters.objects.filter(user=self.user).update(expense_entries=10000, income_categories=50)
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.post_json("/expense/", {"type": "食", "amount": "10", "entry_date": "2025-07-01"})
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse([q for q in ctx.captured_queries if "COUNT(" in q["sql"].upper()])
+        self.assertEqual(self.post_json("/income/types/", {"name": "紅利"}).status_code, 400)
+
+        drifts = reconcile_counters()
+        self.assertEqual({(d.field, d.expected) for d in drifts}, {("expense_entries", 0), ("income_categories", 4)})
+        self.assertEqual(self.post_json(
+            "/expense/", {"type": "食", "amount": "10", "entry_date": "2025-07-01"}
+        ).status_code, 201)
+        self.assertEqual(reconcile_counters(fix=False), [])
+
+
+FAST_AUTH_SETTINGS = {
+    "SESSION_ENGINE": "django.contrib.sessions.backends.cached_db",
+    "MIDDLEWARE": [
+        middleware.replace(
+            "django.contrib.auth.middleware.AuthenticationMiddleware",
+            "myapp.middleware.CachedAuthenticationMiddleware",
+        )
+        for middleware in settings.MIDDLEWARE
+    ],
+}
+
+
+@override_settings(**FAST_AUTH_SETTINGS)
+class FastAuthTests(FinanceTestCase):
+    def me(self):
+        res = self.client.get("/me/")
+        return res.json()["data"]["user"]["username"] if res.status_code == 200 else res.status_code
+
+    def test_cached_session_and_user_need_no_queries(self):
+        self.assertEqual(self.me(), "alice")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.me(), "alice")
+
+    def test_user_changes_invalidate_the_cached_user(self):
+        self.me()
+        self.user.username = "alice2"
+        self.user.save()
+        self.assertEqual(self.me(), "alice2")
+
+        self.user.set_password("changed-pass")
+        self.user.save()
+        self.assertIn(self.me(), (401, 403))
+
+
+class LedgerSearchTests(FinanceTestCase):
+    def setUp(self):
+        super().setUp()
+        for day, note in enumerate(["Grocery run", "weekly groceries", "午餐便當", "", "grocery grocery store"], 1):
+            self.post_json("/expense/", {"type": "食", "amount": "10", "entry_date": f"2025-08-0{day}", "note": note})
+        self.post_json("/income/", {"type": "獎助金", "amount": "5", "entry_date": "2025-08-02", "note": "spring bonus"})
+
+    def search(self, query, **params):
+        params = "".join(f"&{key}={value}" for key, value in params.items())
+        return self.client.get(f"/ledger/?q={query}{params}").json()
+
+    def test_matches_notes_and_category_names_ranked(self):
+        body = self.search("GROCER")
+        self.assertEqual(body["total"], 3)
+        self.assertEqual(body["items"][0]["note"], "grocery grocery store")
+        self.assertEqual({item["note"] for item in self.search("獎助金")["items"]}, {"spring bonus"})
+        # 少於三個字元的詞不經全文索引，仍可比對
+        self.assertEqual([item["note"] for item in self.search("便當")["items"]], ["午餐便當"])
+        self.assertEqual(self.search("grocer weekly")["total"], 1)
+        self.assertEqual(self.search("grocer", kind="income")["total"], 0)
+        self.assertEqual(self.client.get("/ledger/?q=" + "x" * 101).status_code, 400)
+
+    def test_index_follows_updates_deletes_and_renames(self):
+        entry = ExpenseEntry.objects.get(note="weekly groceries")
+        entry.note = "hardware store"
+        entry.save()
+        self.assertEqual(self.search("hardware")["total"], 1)
+        self.assertEqual(self.search("groceries")["total"], 0)
+        ExpenseEntry.objects.filter(note="Grocery run").delete()
+        self.assertEqual(self.search("grocer")["total"], 1)
+        ExpenseCategory.objects.filter(user=self.user, name="食").update(name="Dining")
+        self.assertEqual(self.search("dining")["total"], 4)
+
+    def test_cursor_walk_matches_page_walk(self):
+        paged = [item["id"] for page in (1, 2, 3) for item in self.search("gro", page=page, page_size=1)["items"]]
+        walked, after = [], {}
+        while True:
+            body = self.search("gro", page_size=1, **after)
+            walked += [item["id"] for item in body["items"]]
+            if not body["next"]:
+                break
+            after = {"after": body["next"]}
+        self.assertEqual(walked, paged)
+        self.assertEqual(len(set(walked)), 3)
+
+    def test_export_filters_by_query(self):
+        res = self.client.get("/ledger/export/?format=ndjson&q=bonus")
+        items = [json.loads(line) for line in b"".join(res.streaming_content).splitlines()]
+        self.assertEqual([item["note"] for item in items], ["spring bonus"])
+
+    def test_postgres_filter_matches_like_the_scan(self):
+        # ILike 在 PostgreSQL 以外退回 icontains，結果應與掃描比對一致
+        entries = ExpenseEntry.objects.filter(user=self.user)
+        for terms in (("grocer",), ("食",), ("grocer", "store"), ("100%",)):
+            self.assertEqual(
+                set(entries.filter(PostgresSearch().filter(ExpenseEntry, terms))),
+                set(entries.filter(SearchBackend().filter(ExpenseEntry, terms))),
+                terms,
+            )
+
+    def test_postgres_search_uses_trigram_indexes(self):
+        if connection.vendor != "postgresql":
+            self.skipTest("pg_trgm indexes exist on PostgreSQL only")
+        with connection.cursor() as cursor:
+            # 測試資料量太小，關掉循序掃描才看得出索引能否使用
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = ExpenseEntry.objects.filter(PostgresSearch().filter(ExpenseEntry, ("grocer",))).explain()
+        self.assertIn("myapp_expenseentry_note_trgm", plan)
+        self.assertIn("myapp_expensecategory_name_trgm", plan)
+
+
+class LedgerFilterTests(FinanceTestCase):
+    def setUp(self):
+        super().setUp()
+        for kind, type_name, amount, day in [
+            ("expense", "食", "10", "2025-08-01"),
+            ("expense", "行", "250.50", "2025-08-05"),
+            ("expense", "樂", "99", "2025-09-10"),
+            ("expense", "食", "40", "2025-09-20"),
+            ("expense", "住", "40", "2025-09-21"),
+            ("income", "薪資", "5000", "2025-08-25"),
+        ]:
+            self.post_json(f"/{kind}/", {"type": type_name, "amount": amount, "entry_date": day})
+
+    def amounts(self, query):
+        return [item["amount"] for item in self.client.get(f"/ledger/?page_size=100&{query}").json()["items"]]
+
+    def test_combined_filters(self):
+        self.assertEqual(sorted(self.amounts("type=食&type=行")), [10, 40, 250.5])
+        self.assertEqual(sorted(self.amounts("amount_min=40&amount_max=250.5")), [40, 40, 99, 250.5])
+        self.assertEqual(sorted(self.amounts("date_from=2025-08-03&date_to=2025-09-15")), [99, 250.5, 5000])
+        self.assertEqual(self.amounts("kind=expense&type=食&type=住&amount_min=20&date_from=2025-09-01"), [40, 40])
+        body = self.client.get("/ledger/?type=食&type=樂&month=2025-09-01").json()
+        self.assertEqual(body["total"], 2)
+
+    def test_sort_keys(self):
+        self.assertEqual(self.amounts("sort=-amount"), [5000, 250.5, 99, 40, 40, 10])
+        self.assertEqual(self.amounts("sort=amount&kind=expense"), [10, 40, 40, 99, 250.5])
+        dates = [item["date"] for item in self.client.get("/ledger/?sort=date").json()["items"]]
+        self.assertEqual(dates, sorted(dates))
+
+    def test_cursor_walk_for_every_sort(self):
+        for sort in ("-amount", "amount", "date", "-date"):
+            expected = [
+                (item["kind"], item["id"])
+                for item in self.client.get(f"/ledger/?sort={sort}&amount_max=300&page_size=100").json()["items"]
+            ]
+            walked, after = [], ""
+            while True:
+                body = self.client.get(f"/ledger/?sort={sort}&amount_max=300&page_size=2{after}").json()
+                walked += [(item["kind"], item["id"]) for item in body["items"]]
+                if not body["next"]:
+                    break
+                after = f"&after={body['next']}"
+            self.assertEqual(walked, expected, sort)
+            self.assertEqual(len(walked), 5)
+
+    def test_invalid_parameters(self):
+        for query in ("sort=bogus", "sort=relevance", "amount_min=abc", "amount_max=NaN", "date_from=2025-13-01"):
+            self.assertEqual(self.client.get(f"/ledger/?{query}").status_code, 400, query)
+        first = self.client.get("/ledger/?page_size=1").json()
+        # 換了排序的游標不能沿用
+        self.assertEqual(self.client.get(f"/ledger/?sort=amount&after={first['next']}").status_code, 400)
+
+
+class ArchiveTests(FinanceTestCase):
+    def setUp(self):
+        super().setUp()
+        for kind, type_name, amount, day, note in [
+            ("expense", "食", "10", "2020-03-01", "old lunch box"),
+            ("expense", "行", "20", "2020-05-01", ""),
+            ("expense", "食", "30", "2025-08-01", "new lunch box"),
+            ("income", "薪資", "100", "2021-01-10", ""),
+            ("income", "薪資", "200", "2025-08-02", ""),
+        ]:
+            self.post_json(f"/{kind}/", {"type": type_name, "amount": amount, "entry_date": day, "note": note})
+
+    def ledger(self, query=""):
+        return self.client.get(f"/ledger/?page_size=100&{query}").json()
+
+    def test_archived_entries_stay_readable(self):
+        self.assertEqual(archive_cutoff(3, today=date(2025, 8, 1)), date(2022, 1, 1))
+        result = archive_entries(date(2022, 1, 1), batch_size=1)
+        self.assertEqual(result.moved, {"expense": 2, "income": 1})
+        self.assertEqual(ExpenseEntry.objects.count(), 1)
+        self.assertEqual(ArchivedExpenseEntry.objects.count(), 2)
+        self.assertIsNotNone(ArchiveRun.objects.get().finished_at)
+
+        body = self.ledger()
+        self.assertEqual(body["total"], 5)
+        self.assertEqual([item["date"][:4] for item in body["items"]], ["2025", "2025", "2021", "2020", "2020"])
+        self.assertEqual(self.ledger("month=2020-03-01")["total"], 1)
+        self.assertEqual([item["note"] for item in self.ledger("q=lunch")["items"]], ["new lunch box", "old lunch box"])
+        self.assertEqual(self.ledger("sort=amount&kind=expense")["items"][0]["amount"], 10)
+        walked, after = [], ""
+        while True:
+            page = self.client.get(f"/ledger/?page_size=2{after}").json()
+            walked += [(item["kind"], item["id"]) for item in page["items"]]
+            if not page["next"]:
+                break
+            after = f"&after={page['next']}"
+        self.assertEqual(walked, [(item["kind"], item["id"]) for item in body["items"]])
+        self.assertEqual([item["archived"] for item in body["items"]], [False, False, True, True, True])
+        export = self.client.get("/ledger/export/?format=ndjson")
+        self.assertEqual(len(b"".join(export.streaming_content).splitlines()), 5)
+
+        # 只查詢封存界線之後的範圍時不讀封存表
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.ledger("date_from=2025-01-01")["total"], 2)
+        self.assertFalse([q for q in ctx.captured_queries if "myapp_archived" in q["sql"]])
+
+        # 報表由彙總表計算，封存不影響；配額只計算熱資料表
+        self.assertEqual(self.client.get("/expense/total/").json()["total"], 60.0)
+        self.assertEqual(reconcile_rollups(fix=False), [])
+        self.assertEqual(reconcile_counters(fix=False), [])
+        self.assertEqual(UserCounters.objects.get(user=self.user).expense_entries, 1)
+
+    def test_archived_entries_are_read_only(self):
+        archive_entries(date(2022, 1, 1))
+        archived = {(item["kind"], item["id"]) for item in self.ledger()["items"] if item["archived"]}
+        expense_id = next(entry_id for kind, entry_id in archived if kind == "expense")
+        income_id = next(entry_id for kind, entry_id in archived if kind == "income")
+        for path in (f"/expense/{expense_id}/", f"/income/{income_id}/"):
+            with self.subTest(path=path):
+                self.assertEqual(self.patch_json(path, {"amount": "1"}).status_code, 409)
+                self.assertEqual(self.client.delete(path).status_code, 409)
+        self.assertEqual(self.client.delete("/expense/999999/").status_code, 404)
+
+        # 有封存記錄的月份整月不刪除；界線之後的月份照常刪除
+        res = self.client.delete("/insights/?month=2020-03-01")
+        self.assertEqual(res.status_code, 409)
+        self.assertIn("read-only", res.json()["error"])
+        self.assertEqual(self.ledger()["total"], 5)
+        self.assertEqual(self.client.delete("/insights/?month=2020-04-01").status_code, 200)
+        self.assertEqual(self.client.delete("/insights/?month=2025-08-01").json()["expense_count"], 1)
+        self.assertEqual(self.ledger()["total"], 3)
+
+    def test_entry_limit_is_configurable_and_archiving_frees_room(self):
+        payload = {"type": "食", "amount": "5", "entry_date": "2025-08-03"}
+        with self.settings(ENTRY_LIMIT_PER_KIND=3):
+            res = self.post_json("/expense/", payload)
+            self.assertEqual(res.status_code, 400)
+            self.assertIn("(3)", res.json()["error"])
+            archive_entries(date(2022, 1, 1))
+            self.assertEqual(self.post_json("/expense/", payload).status_code, 201)
+        with self.settings(ENTRY_LIMIT_PER_KIND=0):
+            UserCounters.objects.filter(user=self.user).update(income_entries=10**6)
+            self.assertEqual(self.post_json("/income/", {"type": "薪資", "amount": "1"}).status_code, 201)
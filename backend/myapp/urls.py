@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 
 from .views import (
@@ -10,26 +11,50 @@ from .views import (
     # Expense
     expense_types,
     expense_type_total,
+    expense_type_totals,
     expense_total,
     create_expense,
     expense_entry_detail,
     # Income
     income_types,
     income_type_total,
+    income_type_totals,
     income_total,
     create_income,
     income_entry_detail,
     # Goal
     purpose,
     purpose_detail,
+    goals_range,
     # Report
     report_overview,
     insights,
     report_status,
+    dashboard,
+    trend,
     # Ledger
     ledger,
+    export_ledger,
+    # Import
+    import_entries,
+    # Metrics
+    metrics_view,
 )
 
+if settings.ASYNC_VIEWS:
+    # ASGI 部署：讀取端點改用 async 版本，等待資料庫時不佔住 worker
+    from .views.async_views import (
+        expense_type_total,
+        expense_type_totals,
+        expense_total,
+        income_type_total,
+        income_type_totals,
+        income_total,
+        report_overview,
+        insights,
+        ledger,
+    )
+
 urlpatterns = [
     # CSRF cookie fetch
     path("csrf/", csrf_view),
@@ -37,6 +62,7 @@ urlpatterns = [
     path("expense/types/", expense_types),
     path("expense/types/<str:name>/", expense_type_total),
     path("expense/total/", expense_total),
+    path("expense/totals/", expense_type_totals),
     path("expense/", create_expense),
     path("expense/<int:entry_id>/", expense_entry_detail),
     
@@ -44,17 +70,21 @@ urlpatterns = [
     path("income/types/", income_types),
     path("income/types/<str:name>/", income_type_total),
     path("income/total/", income_total),
+    path("income/totals/", income_type_totals),
     path("income/", create_income),
     path("income/<int:entry_id>/", income_entry_detail),
     
     # Goal endpoints
     path("purpose/", purpose),
     path("purpose/<str:name>/", purpose_detail),
+    path("goals/", goals_range),
     
     # Report endpoints
     path("report/overview/", report_overview),
     path("report/status/", report_status),
+    path("report/trend/", trend),
     path("insights/", insights),
+    path("dashboard/", dashboard),
     
     # Auth endpoints
     path("signup/", signup_view),
@@ -64,4 +94,11 @@ urlpatterns = [
     
     # Ledger endpoint
     path("ledger/", ledger),
+    path("ledger/export/", export_ledger),
+
+    # Bulk import endpoint
+    path("import/", import_entries),
+
+    # Metrics endpoint (Prometheus)
+    path("metrics/", metrics_view),
 ]
@@ -6,6 +6,7 @@ from .auth_drf import signup_view, signin_view, signout_view, me_view, csrf_view
 from .expense_drf import (
     expense_types,
     expense_type_total,
+    expense_type_totals,
     expense_total,
     create_expense,
     expense_entry_detail,
@@ -13,13 +14,16 @@ from .expense_drf import (
 from .income import (
     income_types,
     income_type_total,
+    income_type_totals,
     income_total,
     create_income,
     income_entry_detail,
 )
-from .goal import purpose, purpose_detail
-from .report import report_overview, insights, report_status
-from .ledger import ledger
+from .goal import purpose, purpose_detail, goals_range
+from .report import report_overview, insights, report_status, dashboard, trend
+from .ledger import export_ledger, ledger
+from .imports import import_entries
+from .metrics import metrics_view
 
 __all__ = [
     # Auth
@@ -31,22 +35,32 @@ __all__ = [
     # Expense
     "expense_types",
     "expense_type_total",
+    "expense_type_totals",
     "expense_total",
     "create_expense",
     "expense_entry_detail",
     # Income
     "income_types",
     "income_type_total",
+    "income_type_totals",
     "income_total",
     "create_income",
     "income_entry_detail",
     # Goal
     "purpose",
     "purpose_detail",
+    "goals_range",
     # Report
     "report_overview",
     "insights",
     "report_status",
+    "dashboard",
+    "trend",
     # Ledger
     "ledger",
+    "export_ledger",
+    # Import
+    "import_entries",
+    # Metrics
+    "metrics_view",
 ]
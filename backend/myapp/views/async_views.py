@@ -0,0 +1,200 @@
+"""
+讀取端點的 async 版本（ASGI 部署時使用，見 settings.ASYNC_VIEWS）
+
+查詢在 worker 執行緒上等待時不佔用事件迴圈，同一個 worker 能同時處理多個請求；
+彼此獨立的收入與支出彙總同時執行。寫入（DELETE）交回原本的 sync 視圖。
+"""
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest, JsonResponse
+from django.views.decorators.http import require_http_methods
+from rest_framework.exceptions import NotAuthenticated
+
+from ..archiving import aarchive_boundary
+from ..concurrency import run_concurrently
+from ..rollups import KIND_EXPENSE, KIND_INCOME, akind_total, category_breakdown
+from ..services import asummarize_month, build_insights, month_bounds
+from . import report as sync_report
+from .ledger import _ledger_page_queryset, _ledger_payload, _ledger_querysets, _parse_ledger_page
+from .report import _overview_payload
+from .utils import _amount_response, _json_error, _json_success, user_data_conditional
+
+
+async def _require_auth(request: HttpRequest):
+    user = await request.auser()
+    if not user.is_authenticated:
+        raise PermissionError("Authentication required")
+    return user
+
+
+def _drf_not_authenticated() -> JsonResponse:
+    """被取代的 DRF 視圖對未登入請求的回應（SessionAuthentication 沒有 WWW-Authenticate，因此是 403）"""
+    return _json_success({"detail": str(NotAuthenticated.default_detail)}, status=403)
+
+
+def _target_month(request: HttpRequest) -> date:
+    month_value = request.GET.get("month")
+    if not month_value:
+        return date.today().replace(day=1)
+    try:
+        return date.fromisoformat(month_value).replace(day=1)
+    except ValueError as exc:
+        raise ValueError("month must be YYYY-MM or YYYY-MM-DD") from exc
+
+
+def _month_range(request: HttpRequest):
+    month_value = request.GET.get("month")
+    if not month_value:
+        return None, None
+    try:
+        return month_bounds(date.fromisoformat(month_value))
+    except ValueError as exc:
+        raise ValueError("month must be YYYY-MM or YYYY-MM-DD") from exc
+
+
+@require_http_methods(["GET", "DELETE"])
+@user_data_conditional
+async def report_overview(request: HttpRequest) -> JsonResponse:
+    """report.report_overview 的 async 版本"""
+    if request.method == "DELETE":
+        return await sync_to_async(sync_report.report_overview)(request)
+    try:
+        user = await _require_auth(request)
+    except PermissionError as exc:
+        return _json_error(str(exc), status=401)
+    try:
+        target_month = _target_month(request)
+    except ValueError as exc:
+        return _json_error(str(exc))
+
+    summary = await asummarize_month(user, target_month)
+    return _json_success(_overview_payload(target_month, summary))
+
+
+@require_http_methods(["GET", "DELETE"])
+@user_data_conditional
+async def insights(request: HttpRequest) -> JsonResponse:
+    """report.insights 的 async 版本"""
+    if request.method == "DELETE":
+        return await sync_to_async(sync_report.insights)(request)
+    try:
+        user = await _require_auth(request)
+    except PermissionError as exc:
+        return _json_error(str(exc), status=401)
+    try:
+        target_month = _target_month(request)
+    except ValueError as exc:
+        return _json_error(str(exc))
+
+    summary = await asummarize_month(user, target_month)
+    return _json_success({"insights": build_insights(summary)})
+
+
+@require_http_methods(["GET"])
+async def ledger(request: HttpRequest) -> JsonResponse:
+    """ledger.ledger 的 async 版本：分頁查詢與各表筆數同時執行"""
+    try:
+        user = await _require_auth(request)
+    except PermissionError as exc:
+        return _json_error(str(exc), status=401)
+    try:
+        params = _parse_ledger_page(request)
+    except ValueError as exc:
+        return _json_error(str(exc))
+
+    querysets = _ledger_querysets(user, params.filters, await aarchive_boundary())
+    calls = [(list, _ledger_page_queryset(querysets, params))]
+    if params.with_total:
+        calls += [(qs.count,) for _, qs in querysets]
+    rows, *counts = await run_concurrently(*calls)
+    total = sum(counts) if params.with_total else None
+    return _json_success(_ledger_payload(params, rows, total))
+
+
+@require_http_methods(["GET"])
+@user_data_conditional
+async def expense_total(request: HttpRequest) -> JsonResponse:
+    """expense_drf.expense_total 的 async 版本"""
+    try:
+        user = await _require_auth(request)
+    except PermissionError:
+        return _drf_not_authenticated()
+    total = await akind_total(KIND_EXPENSE, user)
+    return _json_success({"total": float(total)})
+
+
+@require_http_methods(["GET"])
+@user_data_conditional
+async def income_total(request: HttpRequest) -> JsonResponse:
+    """income.income_total 的 async 版本"""
+    try:
+        user = await _require_auth(request)
+    except PermissionError as exc:
+        return _json_error(str(exc), status=401)
+    try:
+        start, end = _month_range(request)
+    except ValueError as exc:
+        return _json_error(str(exc))
+    total = await akind_total(KIND_INCOME, user, start, end)
+    return _json_success({"total": float(total)})
+
+
+@require_http_methods(["GET"])
+@user_data_conditional
+async def expense_type_total(request: HttpRequest, name: str) -> JsonResponse:
+    """expense_drf.expense_type_total 的 async 版本"""
+    try:
+        user = await _require_auth(request)
+    except PermissionError:
+        return _drf_not_authenticated()
+    total = await akind_total(KIND_EXPENSE, user, category_name=name)
+    return _json_success({"type": name, "total": float(total)})
+
+
+@require_http_methods(["GET"])
+@user_data_conditional
+async def income_type_total(request: HttpRequest, name: str) -> JsonResponse:
+    """income.income_type_total 的 async 版本"""
+    try:
+        user = await _require_auth(request)
+    except PermissionError as exc:
+        return _json_error(str(exc), status=401)
+    try:
+        start, end = _month_range(request)
+    except ValueError as exc:
+        return _json_error(str(exc))
+    total = await akind_total(KIND_INCOME, user, start, end, category_name=name)
+    return _amount_response(name, total)
+
+
+async def _type_totals(request: HttpRequest, kind: str, drf: bool = False) -> JsonResponse:
+    try:
+        user = await _require_auth(request)
+    except PermissionError as exc:
+        return _drf_not_authenticated() if drf else _json_error(str(exc), status=401)
+    try:
+        start, end = _month_range(request)
+    except ValueError as exc:
+        return _json_error(str(exc))
+
+    totals, = await run_concurrently((category_breakdown, kind, user, start, end))
+    return _json_success({
+        "month": start.strftime("%Y-%m") if start else None,
+        "types": [{"name": name, "total": float(total)} for name, total in totals.items()],
+        "total": float(sum(totals.values())),
+    })
+
+
+@require_http_methods(["GET"])
+@user_data_conditional
+async def expense_type_totals(request: HttpRequest) -> JsonResponse:
+    """expense_drf.expense_type_totals 的 async 版本"""
+    return await _type_totals(request, KIND_EXPENSE, drf=True)
+
+
+@require_http_methods(["GET"])
+@user_data_conditional
+async def income_type_totals(request: HttpRequest) -> JsonResponse:
+    """income.income_type_totals 的 async 版本"""
+    return await _type_totals(request, KIND_INCOME)
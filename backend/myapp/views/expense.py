@@ -1,18 +1,23 @@
 """
 支出相關的視圖
 """
-from django.db.models import Sum
+from datetime import date
+
 from django.http import HttpRequest, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
+from ..archiving import ARCHIVED_READ_ONLY, is_archived
+from ..categories import resolve_category_id
 from ..models import ExpenseCategory, ExpenseEntry, FinancialGoal
+from ..rollups import KIND_EXPENSE, kind_total
 from ..services import parse_decimal, parse_entry_date, month_bounds
-from .utils import _json_error, _json_success, _parse_body, _require_auth, _amount_response
+from .utils import _json_error, _json_success, _parse_body, _require_auth, _amount_response, user_data_conditional
 
 
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@user_data_conditional
 def expense_types(request: HttpRequest) -> JsonResponse:
     """獲取或創建支出類別"""
     try:
@@ -39,50 +44,44 @@ def expense_types(request: HttpRequest) -> JsonResponse:
 
 
 @require_http_methods(["GET"])
+@user_data_conditional
 def expense_type_total(request: HttpRequest, name: str) -> JsonResponse:
     """獲取某個支出類別的總額（可選月份篩選）"""
     try:
         user = _require_auth(request)
         
         # 解析月份參數
-        queryset = ExpenseEntry.objects.filter(user=user, category__name=name)
+        start = end = None
         month_value = request.GET.get("month")
         if month_value:
             try:
-                from datetime import date
-                from calendar import monthrange
-                target_month = date.fromisoformat(month_value).replace(day=1)
-                last_day = target_month.replace(day=monthrange(target_month.year, target_month.month)[1])
-                queryset = queryset.filter(entry_date__gte=target_month, entry_date__lte=last_day)
+                start, end = month_bounds(date.fromisoformat(month_value))
             except ValueError:
                 return _json_error("month must be YYYY-MM or YYYY-MM-DD")
         
-        total = queryset.aggregate(total=Sum("amount")).get("total") or 0
+        total = kind_total(KIND_EXPENSE, user, start, end, category_name=name)
         return _amount_response(name, total)
     except PermissionError as exc:
         return _json_error(str(exc), status=401)
 
 
 @require_http_methods(["GET"])
+@user_data_conditional
 def expense_total(request: HttpRequest) -> JsonResponse:
     """獲取所有支出的總額（可選月份篩選）"""
     try:
         user = _require_auth(request)
         
         # 解析月份參數
-        queryset = ExpenseEntry.objects.filter(user=user)
+        start = end = None
         month_value = request.GET.get("month")
         if month_value:
             try:
-                from datetime import date
-                from calendar import monthrange
-                target_month = date.fromisoformat(month_value).replace(day=1)
-                last_day = target_month.replace(day=monthrange(target_month.year, target_month.month)[1])
-                queryset = queryset.filter(entry_date__gte=target_month, entry_date__lte=last_day)
+                start, end = month_bounds(date.fromisoformat(month_value))
             except ValueError:
                 return _json_error("month must be YYYY-MM or YYYY-MM-DD")
         
-        total = queryset.aggregate(total=Sum("amount")).get("total") or 0
+        total = kind_total(KIND_EXPENSE, user, start, end)
         return _json_success({"total": float(total)})
     except PermissionError as exc:
         return _json_error(str(exc), status=401)
@@ -106,18 +105,15 @@ def create_expense(request: HttpRequest) -> JsonResponse:
         amount = parse_decimal(data.get("amount"))
         if amount <= 0:
             raise ValueError("'amount' must be positive")
-        category = ExpenseCategory.objects.filter(user=user, name=category_name).first()
-        if not category:
+        category_id = resolve_category_id(KIND_EXPENSE, user, category_name, request)
+        if category_id is None:
             raise ValueError("Category does not exist")
         entry_date = parse_entry_date(data.get("entry_date"))
 
         # 軟性上限警告：檢查是否超過月度支出目標
         warning: str | None = None
         month_start, month_end = month_bounds(entry_date.replace(day=1))
-        month_total = (
-            ExpenseEntry.objects.filter(user=user, entry_date__range=(month_start, month_end))
-            .aggregate(total=Sum("amount")).get("total") or 0
-        )
+        month_total = kind_total(KIND_EXPENSE, user, month_start, month_end)
         goal = (
             FinancialGoal.objects.filter(
                 user=user, 
@@ -137,7 +133,7 @@ def create_expense(request: HttpRequest) -> JsonResponse:
 
         entry = ExpenseEntry.objects.create(
             user=user,
-            category=category,
+            category_id=category_id,
             amount=amount,
             note=data.get("note", ""),
             entry_date=entry_date,
@@ -168,6 +164,8 @@ def expense_entry_detail(request: HttpRequest, entry_id: int) -> JsonResponse:
         try:
             entry = ExpenseEntry.objects.get(user=user, id=entry_id)
         except ExpenseEntry.DoesNotExist:
+            if is_archived(KIND_EXPENSE, user, entry_id):
+                return _json_error(ARCHIVED_READ_ONLY, status=409)
             return _json_error("Entry not found", status=404)
 
         if request.method == "DELETE":
@@ -177,10 +175,10 @@ def expense_entry_detail(request: HttpRequest, entry_id: int) -> JsonResponse:
         data = _parse_body(request)
         if "type" in data:
             category_name = data.get("type")
-            category = ExpenseCategory.objects.filter(user=user, name=category_name).first()
-            if not category:
+            category_id = resolve_category_id(KIND_EXPENSE, user, category_name, request)
+            if category_id is None:
                 return _json_error("Category does not exist")
-            entry.category = category
+            entry.category_id = category_id
         if "amount" in data:
             amount = parse_decimal(data.get("amount"))
             if amount <= 0:
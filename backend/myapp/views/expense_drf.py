@@ -1,18 +1,26 @@
 """
 支出相關的視圖 (DRF 版本)
 """
-from django.db.models import Sum
+from datetime import date
+
+from django.conf import settings
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from ..archiving import ARCHIVED_READ_ONLY, is_archived
+from ..counters import category_count, entries_remaining
 from ..models import ExpenseCategory, ExpenseEntry
+from ..rollups import KIND_EXPENSE, category_breakdown, kind_total
+from ..services import month_bounds
 from ..serializers import ExpenseCategorySerializer, ExpenseEntrySerializer
+from .utils import user_data_conditional
 
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@user_data_conditional
 def expense_types(request):
     """獲取或創建支出類別"""
     if request.method == 'GET':
@@ -21,8 +29,7 @@ def expense_types(request):
         return Response({'types': [c['name'] for c in serializer.data]})
     
     # 限制每用戶最多 50 個類別
-    user_category_count = ExpenseCategory.objects.filter(user=request.user).count()
-    if user_category_count >= 50:
+    if category_count(KIND_EXPENSE, request.user.pk) >= 50:
         return Response(
             {'error': 'Maximum expense categories limit (50) reached'},
             status=status.HTTP_400_BAD_REQUEST
@@ -45,25 +52,43 @@ def expense_types(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@user_data_conditional
 def expense_type_total(request, name):
     """獲取某個支出類別的總額"""
-    total = (
-        ExpenseEntry.objects.filter(user=request.user, category__name=name)
-        .aggregate(total=Sum("amount"))
-        .get("total") or 0
-    )
+    total = kind_total(KIND_EXPENSE, request.user, category_name=name)
     return Response({'type': name, 'total': float(total)})
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@user_data_conditional
+def expense_type_totals(request):
+    """一次取得所有支出類別及其總額（可選月份篩選），沒有記錄的類別總額為 0"""
+    start = end = None
+    month_value = request.query_params.get("month")
+    if month_value:
+        try:
+            start, end = month_bounds(date.fromisoformat(month_value))
+        except ValueError:
+            return Response(
+                {'error': 'month must be YYYY-MM or YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    totals = category_breakdown(KIND_EXPENSE, request.user, start, end)
+    return Response({
+        'month': start.strftime("%Y-%m") if start else None,
+        'types': [{'name': name, 'total': float(total)} for name, total in totals.items()],
+        'total': float(sum(totals.values())),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@user_data_conditional
 def expense_total(request):
     """獲取所有支出的總額"""
-    total = (
-        ExpenseEntry.objects.filter(user=request.user)
-        .aggregate(total=Sum("amount"))
-        .get("total") or 0
-    )
+    total = kind_total(KIND_EXPENSE, request.user)
     return Response({'total': float(total)})
 
 
@@ -71,11 +96,10 @@ def expense_total(request):
 @permission_classes([IsAuthenticated])
 def create_expense(request):
     """創建支出記錄"""
-    # 限制每用戶最多 10000 筆記錄
-    user_expense_count = ExpenseEntry.objects.filter(user=request.user).count()
-    if user_expense_count >= 10000:
+    # 限制每用戶的記錄筆數（ENTRY_LIMIT_PER_KIND，封存的記錄不計）
+    if entries_remaining(KIND_EXPENSE, request.user.pk) == 0:
         return Response(
-            {'error': 'Maximum expense entries limit (10000) reached. Please delete old entries.'},
+            {'error': f'Maximum expense entries limit ({settings.ENTRY_LIMIT_PER_KIND}) reached. Please delete old entries.'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
@@ -96,6 +120,8 @@ def expense_entry_detail(request, entry_id):
     try:
         entry = ExpenseEntry.objects.get(user=request.user, id=entry_id)
     except ExpenseEntry.DoesNotExist:
+        if is_archived(KIND_EXPENSE, request.user, entry_id):
+            return Response({'error': ARCHIVED_READ_ONLY}, status=status.HTTP_409_CONFLICT)
         return Response({'error': 'Entry not found'}, status=status.HTTP_404_NOT_FOUND)
     
     if request.method == 'DELETE':
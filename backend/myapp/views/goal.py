@@ -6,9 +6,12 @@ from django.http import HttpRequest, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
+from ..goals import evaluate_goals, goals_progress
 from ..models import FinancialGoal
-from ..services import parse_decimal, summarize_month
-from .utils import _json_error, _json_success, _parse_body, _require_auth
+from ..services import iter_months, parse_decimal, parse_month
+from .utils import _json_error, _json_success, _parse_body, _require_auth, user_data_conditional
+
+MAX_GOAL_RANGE_MONTHS = 60
 
 
 @csrf_exempt
@@ -30,8 +33,7 @@ def purpose(request: HttpRequest) -> JsonResponse:
         else:
             target_month = date.today().replace(day=1)
         
-        summary = summarize_month(user, target_month)
-        return _json_success({"goals": summary.goal_progress})
+        return _json_success({"goals": goals_progress(user, target_month)})
 
     try:
         data = _parse_body(request)
@@ -122,15 +124,44 @@ def purpose_detail(request: HttpRequest, name: str) -> JsonResponse:
     if not goal:
         return _json_error("Goal not found", status=404)
     
-    summary = summarize_month(user, goal.target_month)
-    for progress in summary.goal_progress:
-        if progress["name"] == goal.name and progress["type"] == goal.goal_type:
-            return _json_success(progress)
-    
-    return _json_success({
-        "name": goal.name,
-        "type": goal.goal_type,
-        "target": float(goal.target_amount),
-        "progress": 0,
-        "percentage": 0,
-    })
+    return _json_success(evaluate_goals([goal])[0])
+
+
+@require_http_methods(["GET"])
+@user_data_conditional
+def goals_range(request: HttpRequest) -> JsonResponse:
+    """
+    多月份目標進度
+
+    每個目標只需要同月份同類型的總額，依類型各一次分組查詢計算所有月份。
+
+    Query參數:
+      - from: 起始月份 (格式: YYYY-MM，默認本月)
+      - to: 結束月份 (格式: YYYY-MM，默認與 from 相同)
+
+    返回:
+      {
+        "goals": [
+          {"name": "存錢", "type": "income", "target": 5000.0, "target_month": "2025-12-01",
+           "progress": 3000.0, "percentage": 60.0},
+          ...
+        ]
+      }
+    """
+    try:
+        user = _require_auth(request)
+    except PermissionError as exc:
+        return _json_error(str(exc), status=401)
+
+    try:
+        from_value, to_value = request.GET.get("from"), request.GET.get("to")
+        start = parse_month(from_value) if from_value else date.today().replace(day=1)
+        end = parse_month(to_value) if to_value else start
+    except ValueError:
+        return _json_error("from and to must be YYYY-MM or YYYY-MM-DD")
+    if start > end:
+        return _json_error("from must not be after to")
+    if len(list(iter_months(start, end))) > MAX_GOAL_RANGE_MONTHS:
+        return _json_error(f"range must not exceed {MAX_GOAL_RANGE_MONTHS} months")
+
+    return _json_success({"goals": goals_progress(user, start, end)})
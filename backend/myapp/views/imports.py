@@ -0,0 +1,52 @@
+"""
+批次匯入交易記錄的視圖
+"""
+from django.http import HttpRequest, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from ..importing import IMPORT_FORMATS, EntryImporter, iter_csv_rows, iter_json_rows
+from .utils import _json_error, _json_success, _require_auth
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def import_entries(request: HttpRequest) -> JsonResponse:
+    """
+    批次匯入收入/支出記錄
+
+    請求本體為 CSV（含標題列 kind,type,amount,entry_date,note）或 JSON 陣列，
+    以串流方式逐列解析；也可用 multipart 上傳欄位 file。
+
+    Query參數:
+      - format: 'csv' | 'json'（默認依 Content-Type 判斷）
+      - kind: 可選，'expense' | 'income'，指定後各列不需 kind 欄位
+
+    返回:
+      {"created": 120, "failed": 1, "errors": [{"row": 7, "error": "Category does not exist"}]}
+    """
+    try:
+        user = _require_auth(request)
+    except PermissionError as exc:
+        return _json_error(str(exc), status=401)
+
+    content_type = request.content_type or ""
+    fmt = request.GET.get("format") or ("csv" if "csv" in content_type else "json")
+    if fmt not in IMPORT_FORMATS:
+        return _json_error("format must be 'csv' or 'json'")
+
+    if content_type == "multipart/form-data":
+        stream = request.FILES.get("file")
+        if stream is None:
+            return _json_error("'file' is required")
+    else:
+        stream = request
+
+    try:
+        importer = EntryImporter(user, kind=request.GET.get("kind") or None)
+    except ValueError as exc:
+        return _json_error(str(exc))
+
+    rows = iter_csv_rows(stream) if fmt == "csv" else iter_json_rows(stream)
+    result = importer.run(rows)
+    return _json_success(result.as_dict(), status=201 if result.created else 400)
@@ -1,18 +1,25 @@
 """
 收入相關的視圖
 """
-from django.db.models import Sum
+from datetime import date
+
+from django.conf import settings
 from django.http import HttpRequest, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
+from ..archiving import ARCHIVED_READ_ONLY, is_archived
+from ..categories import resolve_category_id
+from ..counters import category_count, entries_remaining
 from ..models import IncomeCategory, IncomeEntry
-from ..services import parse_decimal, parse_entry_date
-from .utils import _json_error, _json_success, _parse_body, _require_auth, _amount_response
+from ..rollups import KIND_INCOME, category_breakdown, kind_total
+from ..services import month_bounds, parse_decimal, parse_entry_date
+from .utils import _json_error, _json_success, _parse_body, _require_auth, _amount_response, user_data_conditional
 
 
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@user_data_conditional
 def income_types(request: HttpRequest) -> JsonResponse:
     """獲取或創建收入類別"""
     try:
@@ -27,8 +34,7 @@ def income_types(request: HttpRequest) -> JsonResponse:
         return _json_success({"types": types})
 
     # 限制每用戶最多 50 個類別
-    user_category_count = IncomeCategory.objects.filter(user=user).count()
-    if user_category_count >= 50:
+    if category_count(KIND_INCOME, user.pk) >= 50:
         return _json_error("Maximum income categories limit (50) reached")
 
     try:
@@ -44,50 +50,69 @@ def income_types(request: HttpRequest) -> JsonResponse:
 
 
 @require_http_methods(["GET"])
+@user_data_conditional
 def income_type_total(request: HttpRequest, name: str) -> JsonResponse:
     """獲取某個收入類別的總額（可選月份篩選）"""
     try:
         user = _require_auth(request)
         
         # 解析月份參數
-        queryset = IncomeEntry.objects.filter(user=user, category__name=name)
+        start = end = None
         month_value = request.GET.get("month")
         if month_value:
             try:
-                from datetime import date
-                from calendar import monthrange
-                target_month = date.fromisoformat(month_value).replace(day=1)
-                last_day = target_month.replace(day=monthrange(target_month.year, target_month.month)[1])
-                queryset = queryset.filter(entry_date__gte=target_month, entry_date__lte=last_day)
+                start, end = month_bounds(date.fromisoformat(month_value))
             except ValueError:
                 return _json_error("month must be YYYY-MM or YYYY-MM-DD")
         
-        total = queryset.aggregate(total=Sum("amount")).get("total") or 0
+        total = kind_total(KIND_INCOME, user, start, end, category_name=name)
         return _amount_response(name, total)
     except PermissionError as exc:
         return _json_error(str(exc), status=401)
 
 
 @require_http_methods(["GET"])
+@user_data_conditional
+def income_type_totals(request: HttpRequest) -> JsonResponse:
+    """一次取得所有收入類別及其總額（可選月份篩選），沒有記錄的類別總額為 0"""
+    try:
+        user = _require_auth(request)
+    except PermissionError as exc:
+        return _json_error(str(exc), status=401)
+
+    start = end = None
+    month_value = request.GET.get("month")
+    if month_value:
+        try:
+            start, end = month_bounds(date.fromisoformat(month_value))
+        except ValueError:
+            return _json_error("month must be YYYY-MM or YYYY-MM-DD")
+
+    totals = category_breakdown(KIND_INCOME, user, start, end)
+    return _json_success({
+        "month": start.strftime("%Y-%m") if start else None,
+        "types": [{"name": name, "total": float(total)} for name, total in totals.items()],
+        "total": float(sum(totals.values())),
+    })
+
+
+@require_http_methods(["GET"])
+@user_data_conditional
 def income_total(request: HttpRequest) -> JsonResponse:
     """獲取所有收入的總額（可選月份篩選）"""
     try:
         user = _require_auth(request)
         
         # 解析月份參數
-        queryset = IncomeEntry.objects.filter(user=user)
+        start = end = None
         month_value = request.GET.get("month")
         if month_value:
             try:
-                from datetime import date
-                from calendar import monthrange
-                target_month = date.fromisoformat(month_value).replace(day=1)
-                last_day = target_month.replace(day=monthrange(target_month.year, target_month.month)[1])
-                queryset = queryset.filter(entry_date__gte=target_month, entry_date__lte=last_day)
+                start, end = month_bounds(date.fromisoformat(month_value))
             except ValueError:
                 return _json_error("month must be YYYY-MM or YYYY-MM-DD")
         
-        total = queryset.aggregate(total=Sum("amount")).get("total") or 0
+        total = kind_total(KIND_INCOME, user, start, end)
         return _json_success({"total": float(total)})
     except PermissionError as exc:
         return _json_error(str(exc), status=401)
@@ -100,10 +125,12 @@ def create_income(request: HttpRequest) -> JsonResponse:
     try:
         user = _require_auth(request)
         
-        # 限制每用戶最多 10000 筆記錄
-        user_income_count = IncomeEntry.objects.filter(user=user).count()
-        if user_income_count >= 10000:
-            return _json_error("Maximum income entries limit (10000) reached. Please delete old entries.")
+        # 限制每用戶的記錄筆數（ENTRY_LIMIT_PER_KIND，封存的記錄不計）
+        if entries_remaining(KIND_INCOME, user.pk) == 0:
+            return _json_error(
+                f"Maximum income entries limit ({settings.ENTRY_LIMIT_PER_KIND}) reached. "
+                "Please delete old entries."
+            )
         
         data = _parse_body(request)
         category_name = data.get("type")
@@ -112,14 +139,14 @@ def create_income(request: HttpRequest) -> JsonResponse:
         amount = parse_decimal(data.get("amount"))
         if amount <= 0:
             raise ValueError("'amount' must be positive")
-        category = IncomeCategory.objects.filter(user=user, name=category_name).first()
-        if not category:
+        category_id = resolve_category_id(KIND_INCOME, user, category_name, request)
+        if category_id is None:
             raise ValueError("Category does not exist")
         entry_date = parse_entry_date(data.get("entry_date"))
 
         entry = IncomeEntry.objects.create(
             user=user,
-            category=category,
+            category_id=category_id,
             amount=amount,
             note=data.get("note", ""),
             entry_date=entry_date,
@@ -141,6 +168,8 @@ def income_entry_detail(request: HttpRequest, entry_id: int) -> JsonResponse:
         try:
             entry = IncomeEntry.objects.get(user=user, id=entry_id)
         except IncomeEntry.DoesNotExist:
+            if is_archived(KIND_INCOME, user, entry_id):
+                return _json_error(ARCHIVED_READ_ONLY, status=409)
             return _json_error("Entry not found", status=404)
 
         if request.method == "DELETE":
@@ -150,10 +179,10 @@ def income_entry_detail(request: HttpRequest, entry_id: int) -> JsonResponse:
         data = _parse_body(request)
         if "type" in data:
             category_name = data.get("type")
-            category = IncomeCategory.objects.filter(user=user, name=category_name).first()
-            if not category:
+            category_id = resolve_category_id(KIND_INCOME, user, category_name, request)
+            if category_id is None:
                 return _json_error("Category does not exist")
-            entry.category = category
+            entry.category_id = category_id
         if "amount" in data:
             amount = parse_decimal(data.get("amount"))
             if amount <= 0:
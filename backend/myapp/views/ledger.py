@@ -1,33 +1,325 @@
 """
 交易記錄清單相關的視圖
 """
-from django.http import HttpRequest, JsonResponse
+import base64
+import csv
+import json
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+from typing import Tuple
+
+from django.db.models import BooleanField, CharField, Q, Value
+from django.http import HttpRequest, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 
+from ..archiving import archive_boundary, spans_archive
 from ..models import ExpenseEntry, IncomeEntry
+from ..rendering import dumps
+from ..rollups import ARCHIVE_MODELS
+from ..search import parse_query, search_backend
+from ..services import month_bounds, parse_decimal
 from .utils import _json_error, _json_success, _require_auth
 
+LEDGER_MODELS = (("expense", ExpenseEntry), ("income", IncomeEntry))
+LEDGER_FIELDS = ("id", "entry_date", "category__name", "amount", "note", "kind", "archived")
+# 排序鍵：日期由新到舊，同一天依 id 由小到大（與改版前的清單相同）；兩張表的 id 可能相同，再以 kind 區分
+LEDGER_ORDERING = ("-entry_date", "id", "kind")
+# sort 參數 -> 排序鍵；每種排序都有 (user, 欄位, id) 索引支援
+LEDGER_ORDERINGS = {
+    "-date": LEDGER_ORDERING,
+    "date": ("entry_date", "id", "kind"),
+    "-amount": ("-amount", "-id", "kind"),
+    "amount": ("amount", "id", "kind"),
+    # 有搜尋字詞時的預設：先依相關度排序
+    "relevance": ("-rank",) + LEDGER_ORDERING,
+}
+# 游標中各排序鍵的還原方式
+CURSOR_TYPES = {
+    "entry_date": date.fromisoformat,
+    "id": int,
+    "kind": str,
+    "rank": float,
+    "amount": Decimal,
+}
+EXPORT_COLUMNS = ("date", "kind", "type", "amount", "note", "id")
+EXPORT_CHUNK_SIZE = 2000
+
+
+@dataclass
+class LedgerFilters:
+    kind: str
+    type_names: Tuple[str, ...] = ()
+    month_filter: tuple | None = None
+    terms: Tuple[str, ...] = ()
+    date_from: date | None = None
+    date_to: date | None = None
+    amount_min: Decimal | None = None
+    amount_max: Decimal | None = None
+    sort: str = "-date"
+
+    @property
+    def ordering(self) -> Tuple[str, ...]:
+        return LEDGER_ORDERINGS[self.sort]
+
+    @property
+    def start(self) -> date | None:
+        """最早可能符合的日期，None 表示不限"""
+        starts = [value for value in (self.date_from, self.month_filter and self.month_filter[0]) if value]
+        return max(starts, default=None)
+
+
+def _cursor_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _encode_cursor(row: dict, ordering) -> str:
+    raw = json.dumps([_cursor_value(row[key.lstrip("-")]) for key in ordering])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(token: str, ordering):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise ValueError("cursor does not match the ordering")
+        return tuple(CURSOR_TYPES[key.lstrip("-")](value) for key, value in zip(ordering, values))
+    except (ValueError, TypeError, ArithmeticError) as exc:
+        raise ValueError("after must be a cursor returned by a previous page") from exc
+
+
+def _after_cursor(kind: str, cursor, ordering) -> Q:
+    """只保留依 ordering 排在游標之後的記錄（逐鍵的字典序比較）"""
+    conditions = []
+    prefix = Q()
+    for key, value in zip(ordering, cursor):
+        field, descending = key.lstrip("-"), key.startswith("-")
+        if field == "kind":
+            # kind 在每個子查詢中是常數，直接比較
+            if (kind < value) if descending else (kind > value):
+                conditions.append(prefix)
+            if kind != value:
+                break
+            continue
+        conditions.append(prefix & Q(**{f"{field}__{'lt' if descending else 'gt'}": value}))
+        prefix &= Q(**{field: value})
+    return reduce(or_, conditions) if conditions else Q(pk__in=[])
+
+
+def _ledger_querysets(user, filters: LedgerFilters, archive_before: date | None = None):
+    """各表篩選後的 (kind, queryset)；日期範圍可能涵蓋封存資料時一併查詢封存表
+
+    archive_before 為 archive_boundary() 的結果。
+    """
+    tables = list(LEDGER_MODELS)
+    if spans_archive(filters.start, archive_before):
+        tables += [(model_kind, ARCHIVE_MODELS[model_kind]) for model_kind, _ in LEDGER_MODELS]
+    querysets = []
+    backend = search_backend()
+    for model_kind, model in tables:
+        if filters.kind not in {model_kind, "all"}:
+            continue
+        qs = model.objects.filter(user=user)
+        if filters.type_names:
+            qs = qs.filter(category__name__in=filters.type_names)
+        if filters.month_filter:
+            qs = qs.filter(entry_date__gte=filters.month_filter[0], entry_date__lte=filters.month_filter[1])
+        if filters.date_from:
+            qs = qs.filter(entry_date__gte=filters.date_from)
+        if filters.date_to:
+            qs = qs.filter(entry_date__lte=filters.date_to)
+        if filters.amount_min is not None:
+            qs = qs.filter(amount__gte=filters.amount_min)
+        if filters.amount_max is not None:
+            qs = qs.filter(amount__lte=filters.amount_max)
+        if filters.terms:
+            qs = qs.filter(backend.filter(model, filters.terms))
+        querysets.append((model_kind, qs))
+    return querysets
+
+
+def _ledger_union(querysets, filters: LedgerFilters, cursor=None):
+    selects = []
+    ranked = "-rank" in filters.ordering
+    fields = LEDGER_FIELDS + ("rank",) if ranked else LEDGER_FIELDS
+    backend = search_backend()
+    for model_kind, qs in querysets:
+        if ranked:
+            qs = qs.annotate(rank=backend.rank(qs.model, filters.terms))
+        if cursor:
+            qs = qs.filter(_after_cursor(model_kind, cursor, filters.ordering))
+        selects.append(
+            qs.annotate(
+                kind=Value(model_kind, output_field=CharField()),
+                archived=Value(qs.model is ARCHIVE_MODELS[model_kind], output_field=BooleanField()),
+            )
+            .values(*fields)
+            .order_by()
+        )
+    combined = selects[0]
+    if len(selects) > 1:
+        combined = combined.union(*selects[1:], all=True)
+    return combined.order_by(*filters.ordering)
+
+
+def _ledger_item(row: dict) -> dict:
+    return {
+        "id": row["id"],
+        "kind": row["kind"],
+        "type": row["category__name"],
+        "amount": float(row["amount"]),
+        "date": row["entry_date"].strftime("%Y-%m-%d"),
+        "note": row["note"],
+        "archived": bool(row["archived"]),
+    }
+
+
+def _parse_date_param(request: HttpRequest, name: str) -> date | None:
+    value = request.GET.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError as exc:
+        raise ValueError(f"{name} must be YYYY-MM-DD") from exc
+
+
+def _parse_amount_param(request: HttpRequest, name: str) -> Decimal | None:
+    value = request.GET.get(name)
+    if not value:
+        return None
+    try:
+        amount = parse_decimal(value)
+    except ValueError as exc:
+        raise ValueError(f"{name} must be a number") from exc
+    if not amount.is_finite():
+        raise ValueError(f"{name} must be a number")
+    return amount
+
+
+def _parse_ledger_filters(request: HttpRequest) -> LedgerFilters:
+    """解析篩選與排序參數，格式錯誤時拋出 ValueError"""
+    kind = (request.GET.get("kind") or "all").lower()
+    if kind not in {"expense", "income", "all"}:
+        raise ValueError("kind must be 'expense', 'income' or 'all'")
+
+    # type 可重複，任一類別符合即可
+    type_names = tuple(dict.fromkeys(name for name in request.GET.getlist("type") if name))
+
+    # 解析月份參數
+    month_filter = None
+    month_value = request.GET.get("month")
+    if month_value:
+        try:
+            month_filter = month_bounds(date.fromisoformat(month_value))
+        except ValueError as exc:
+            raise ValueError("month must be YYYY-MM or YYYY-MM-DD") from exc
+
+    terms = parse_query(request.GET.get("q"))
+    sort = request.GET.get("sort") or ("relevance" if terms else "-date")
+    if sort not in LEDGER_ORDERINGS:
+        raise ValueError("sort must be one of " + ", ".join(LEDGER_ORDERINGS))
+    if sort == "relevance" and not terms:
+        raise ValueError("sort=relevance needs q")
+    return LedgerFilters(
+        kind,
+        type_names,
+        month_filter,
+        terms,
+        date_from=_parse_date_param(request, "date_from"),
+        date_to=_parse_date_param(request, "date_to"),
+        amount_min=_parse_amount_param(request, "amount_min"),
+        amount_max=_parse_amount_param(request, "amount_max"),
+        sort=sort,
+    )
+
+
+@dataclass
+class LedgerPage:
+    filters: LedgerFilters
+    page: int
+    page_size: int
+    cursor: tuple | None
+    with_total: bool
+
+
+def _parse_ledger_page(request: HttpRequest) -> LedgerPage:
+    filters = _parse_ledger_filters(request)
+    try:
+        page = max(1, int(request.GET.get("page") or 1))
+        page_size = min(100, max(1, int(request.GET.get("page_size") or 10)))
+    except ValueError as exc:
+        raise ValueError("page and page_size must be integers") from exc
+
+    cursor = None
+    after = request.GET.get("after")
+    if after:
+        cursor = _decode_cursor(after, filters.ordering)
+    with_total = request.GET.get("with_total", "0" if cursor else "1") not in {"0", "false"}
+    return LedgerPage(filters, page, page_size, cursor, with_total)
+
+
+def _ledger_page_queryset(querysets, params: LedgerPage):
+    # 多取一列判斷是否還有下一頁
+    offset = 0 if params.cursor else (params.page - 1) * params.page_size
+    return _ledger_union(querysets, params.filters, params.cursor)[offset : offset + params.page_size + 1]
+
+
+def _ledger_payload(params: LedgerPage, rows: list, total: int | None) -> dict:
+    has_more = len(rows) > params.page_size
+    rows = rows[: params.page_size]
+    payload = {
+        "items": [_ledger_item(row) for row in rows],
+        "page_size": params.page_size,
+        "next": _encode_cursor(rows[-1], params.filters.ordering) if has_more else None,
+    }
+    if not params.cursor:
+        payload["page"] = params.page
+    if total is not None:
+        payload["total"] = total
+    return payload
+
 
 @require_http_methods(["GET"])
 def ledger(request: HttpRequest) -> JsonResponse:
     """
     綜合交易記錄清單
-    
+
+    兩張表在資料庫端以 UNION ALL 合併、排序並分頁，每頁只讀取需要的列。
+    查詢的日期範圍涵蓋已封存的年份時，封存表也一併合併；封存的記錄標記
+    archived: true，為唯讀，無法修改或刪除。
+
     Query參數:
       - kind: 'expense' | 'income' | 'all' (默認 'all')
-      - type: 可選的類別名稱過濾
+      - type: 可選的類別名稱過濾，可重複指定多個類別
       - month: 可選的月份篩選 (格式: YYYY-MM 或 YYYY-MM-DD)
+      - date_from / date_to: 可選的日期區間（含兩端，格式: YYYY-MM-DD）
+      - amount_min / amount_max: 可選的金額區間（含兩端）
+      - sort: '-date'（默認）| 'date' | '-amount' | 'amount' | 'relevance'（有 q 時默認）
+      - q: 可選的搜尋字詞，比對備註與類別名稱（以空白分隔，全部需命中）；
+           使用全文索引，結果依相關度排序，可與其他篩選及分頁併用
+      - after: 上一頁回傳的 next 游標；提供時忽略 page（建議用於深層分頁）
       - page: 頁碼，從1開始 (默認 1)
       - page_size: 每頁條數 (默認 10, 最大 100)
-    
+      - with_total: 是否計算 total，頁碼模式默認 1，游標模式默認 0
+
     返回:
       {
         "items": [
-          {"id": 1, "kind": "expense", "type": "餐飲", "amount": 120.0, "date": "2025-12-01", "note": "..."},
+          {"id": 1, "kind": "expense", "type": "餐飲", "amount": 120.0, "date": "2025-12-01", "note": "...",
+           "archived": false},
           ...
         ],
         "page": 1,
         "page_size": 10,
+        "next": "WyIyMDI1LTEyLTAxIiwgMSwgImV4cGVuc2UiXQ",
         "total": 123
       }
     """
@@ -36,84 +328,73 @@ def ledger(request: HttpRequest) -> JsonResponse:
     except PermissionError as exc:
         return _json_error(str(exc), status=401)
 
-    kind = (request.GET.get("kind") or "all").lower()
-    if kind not in {"expense", "income", "all"}:
-        return _json_error("kind must be 'expense', 'income' or 'all'")
-    
-    type_name = request.GET.get("type") or None
-    
-    # 解析月份參數
-    month_filter = None
-    month_value = request.GET.get("month")
-    if month_value:
-        try:
-            from datetime import date
-            from calendar import monthrange
-            target_month = date.fromisoformat(month_value).replace(day=1)
-            last_day = target_month.replace(day=monthrange(target_month.year, target_month.month)[1])
-            month_filter = (target_month, last_day)
-        except ValueError:
-            return _json_error("month must be YYYY-MM or YYYY-MM-DD")
-    
     try:
-        page = max(1, int(request.GET.get("page") or 1))
-        page_size = min(100, max(1, int(request.GET.get("page_size") or 10)))
-    except ValueError:
-        return _json_error("page and page_size must be integers")
-
-    # 收集支出和收入記錄
-    expense_entries = []
-    income_entries = []
-
-    if kind in {"expense", "all"}:
-        expense_qs = ExpenseEntry.objects.filter(user=user)
-        if type_name:
-            expense_qs = expense_qs.filter(category__name=type_name)
-        if month_filter:
-            expense_qs = expense_qs.filter(entry_date__gte=month_filter[0], entry_date__lte=month_filter[1])
-        expense_entries = list(
-            expense_qs.values(
-                "id", "entry_date", "category__name", "amount", "note"
-            ).order_by("-entry_date", "-id")
-        )
-        for e in expense_entries:
-            e["kind"] = "expense"
-            e["type"] = e.pop("category__name")
-            e["date"] = e.pop("entry_date").strftime("%Y-%m-%d")
-            e["amount"] = float(e["amount"])
-
-    if kind in {"income", "all"}:
-        income_qs = IncomeEntry.objects.filter(user=user)
-        if type_name:
-            income_qs = income_qs.filter(category__name=type_name)
-        if month_filter:
-            income_qs = income_qs.filter(entry_date__gte=month_filter[0], entry_date__lte=month_filter[1])
-        income_entries = list(
-            income_qs.values(
-                "id", "entry_date", "category__name", "amount", "note"
-            ).order_by("-entry_date", "-id")
-        )
-        for e in income_entries:
-            e["kind"] = "income"
-            e["type"] = e.pop("category__name")
-            e["date"] = e.pop("entry_date").strftime("%Y-%m-%d")
-            e["amount"] = float(e["amount"])
-
-    # 合併並按日期排序
-    combined = expense_entries + income_entries
-    combined.sort(
-        key=lambda x: (x["date"], -x["id"]),
-        reverse=True
-    )
+        params = _parse_ledger_page(request)
+    except ValueError as exc:
+        return _json_error(str(exc))
+
+    querysets = _ledger_querysets(user, params.filters, archive_boundary())
+    rows = list(_ledger_page_queryset(querysets, params))
+    total = sum(qs.count() for _, qs in querysets) if params.with_total else None
+    return _json_success(_ledger_payload(params, rows, total))
+
+
+class _Echo:
+
+
+    """csv.writer 的輸出目標：直接回傳寫入的字串，讓每列都能被串流送出"""
+
+    def write(self, value):
+        return value
+
+
+def _export_csv(rows):
+    writer = csv.writer(_Echo())
+    yield "\ufeff" + writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        item = _ledger_item(row)
+        yield writer.writerow([item[column] for column in EXPORT_COLUMNS])
+
+
+def _export_ndjson(rows):
+    for row in rows:
+        yield dumps(_ledger_item(row)) + b"\n"
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", _export_csv),
+    "ndjson": ("application/x-ndjson; charset=utf-8", _export_ndjson),
+}
+
+
+@require_http_methods(["GET"])
+def export_ledger(request: HttpRequest):
+    """
+    串流匯出交易記錄
+
+    以資料庫端的分塊迭代逐列輸出，記憶體用量與筆數無關。
+
+    Query參數:
+      - format: 'csv' | 'ndjson' (默認 'csv')
+      - kind / type / month / q / date_from / date_to / amount_min / amount_max / sort:
+        與 ledger 相同的篩選與排序條件
+    """
+    try:
+        user = _require_auth(request)
+    except PermissionError as exc:
+        return _json_error(str(exc), status=401)
+
+    fmt = (request.GET.get("format") or "csv").lower()
+    if fmt not in EXPORT_FORMATS:
+        return _json_error("format must be 'csv' or 'ndjson'")
+    try:
+        filters = _parse_ledger_filters(request)
+    except ValueError as exc:
+        return _json_error(str(exc))
 
-    # 分頁
-    total = len(combined)
-    offset = (page - 1) * page_size
-    paginated = combined[offset : offset + page_size]
-
-    return _json_success({
-        "items": paginated,
-        "page": page,
-        "page_size": page_size,
-        "total": total,
-    })
+    querysets = _ledger_querysets(user, filters, archive_boundary())
+    rows = _ledger_union(querysets, filters).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    content_type, stream = EXPORT_FORMATS[fmt]
+    response = StreamingHttpResponse(stream(rows), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="ledger.{fmt}"'
+    return response
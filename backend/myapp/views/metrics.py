@@ -0,0 +1,35 @@
+"""
+Prometheus 指標端點
+"""
+import hmac
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.views.decorators.http import require_http_methods
+
+from ..metrics import registry
+from .utils import _json_error
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _authorized(request: HttpRequest) -> bool:
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    header = request.headers.get("Authorization", "")
+    return bool(token) and hmac.compare_digest(header, f"Bearer {token}")
+
+
+@require_http_methods(["GET"])
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """
+    請求指標（Prometheus text format），需 staff 或 METRICS_TOKEN
+
+    指標按 worker process 分開記錄：設定 METRICS_DIR 時回傳所有 worker 的合計
+    （最多落後 METRICS_FLUSH_INTERVAL 秒）；未設定時只有處理這次請求的 worker 的數字，
+    多個 worker 時每次抓取的結果會跳動。
+    """
+    if not _authorized(request):
+        return _json_error("Forbidden", status=403)
+    return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
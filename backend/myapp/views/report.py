@@ -5,12 +5,16 @@ from datetime import date
 from django.http import HttpRequest, JsonResponse
 from django.views.decorators.http import require_http_methods
 
+from ..archiving import ARCHIVED_READ_ONLY, archived_in_range
 from ..models import MonthlyReport
-from ..services import summarize_month, build_insights
-from .utils import _json_error, _json_success, _require_auth
+from ..services import build_dashboard, build_trend, iter_months, parse_month, summarize_month, build_insights
+from .utils import _json_error, _json_success, _require_auth, user_data_conditional
+
+MAX_TREND_MONTHS = 60
 
 
 @require_http_methods(["GET", "DELETE"])
+@user_data_conditional
 def report_overview(request: HttpRequest) -> JsonResponse:
     """獲取或刪除月度財務報表概覽"""
     try:
@@ -40,7 +44,11 @@ def report_overview(request: HttpRequest) -> JsonResponse:
         })
     
     summary = summarize_month(user, target_month)
-    payload = {
+    return _json_success(_overview_payload(target_month, summary))
+
+
+def _overview_payload(target_month: date, summary) -> dict:
+    return {
         "month": target_month.strftime("%Y-%m"),
         "income": {k: float(v) for k, v in summary.income_by_category.items()},
         "expense": {k: float(v) for k, v in summary.expense_by_category.items()},
@@ -49,10 +57,10 @@ def report_overview(request: HttpRequest) -> JsonResponse:
         "net": float(summary.net),
         "goals": summary.goal_progress,
     }
-    return _json_success(payload)
 
 
 @require_http_methods(["GET", "DELETE"])
+@user_data_conditional
 def insights(request: HttpRequest) -> JsonResponse:
     """獲取指定月份財務洞察建議或清除指定月份所有數據"""
     try:
@@ -78,6 +86,10 @@ def insights(request: HttpRequest) -> JsonResponse:
         # 獲取指定月份的第一天和最後一天
         first_day = target_month
         last_day = target_month.replace(day=monthrange(target_month.year, target_month.month)[1])
+
+        # 封存的記錄為唯讀：該月有封存記錄時整月都不刪除
+        if archived_in_range(user, first_day, last_day):
+            return _json_error(ARCHIVED_READ_ONLY, status=409)
         
         # 刪除該月的收入和支出記錄
         expense_deleted = ExpenseEntry.objects.filter(
@@ -113,11 +125,122 @@ def report_status(request: HttpRequest) -> JsonResponse:
         return _json_error(str(exc), status=401)
 
     latest = MonthlyReport.objects.filter(user=user).order_by("-month").first()
+    return _json_success(_report_status_payload(latest))
+
+
+def _report_status_payload(latest) -> dict:
     if not latest:
-        return _json_success({"month": None, "delivered": False})
-    
-    return _json_success({
+        return {"month": None, "delivered": False}
+    return {
         "month": latest.month.strftime("%Y-%m"),
         "delivered": latest.delivered,
         "generated_at": latest.updated_at.isoformat(),
+    }
+
+
+@require_http_methods(["GET"])
+def dashboard(request: HttpRequest) -> JsonResponse:
+    """
+    儀表板所需資料一次取得
+
+    月度摘要只計算一次，合計、類別明細、目標進度與洞察共用同一份結果。
+
+    Query參數:
+      - month: 月份 (格式: YYYY-MM-DD，默認本月)
+
+    返回:
+      {
+        "month": "2025-12",
+        "totals": {"income": 30000.0, "expense": 1200.0, "net": 28800.0},
+        "expense": {"食": 1200.0, "衣": 0.0, ...},
+        "income": {"薪資": 30000.0, ...},
+        "goals": [...],
+        "insights": ["..."],
+        "report_status": {"month": "2025-11", "delivered": true, "generated_at": "..."}
+      }
+    """
+    try:
+        user = _require_auth(request)
+    except PermissionError as exc:
+        return _json_error(str(exc), status=401)
+
+    month_value = request.GET.get("month")
+    target_month = None
+    if month_value:
+        try:
+            target_month = date.fromisoformat(month_value).replace(day=1)
+        except ValueError:
+            return _json_error("month must be YYYY-MM or YYYY-MM-DD")
+
+    data = build_dashboard(user, target_month)
+    summary = data.summary
+    return _json_success({
+        "month": data.month.strftime("%Y-%m"),
+        "totals": {
+            "income": float(summary.total_income),
+            "expense": float(summary.total_expense),
+            "net": float(summary.net),
+        },
+        "expense": {k: float(v) for k, v in data.breakdown["expense"].items()},
+        "income": {k: float(v) for k, v in data.breakdown["income"].items()},
+        "goals": summary.goal_progress,
+        "insights": data.insights,
+        "report_status": _report_status_payload(data.latest_report),
     })
+
+
+@require_http_methods(["GET"])
+@user_data_conditional
+def trend(request: HttpRequest) -> JsonResponse:
+    """
+    多月份收支趨勢
+
+    每種類型只用一次分組查詢，沒有記錄的月份補 0，查詢數與月份數無關。
+
+    Query參數:
+      - from: 起始月份 (格式: YYYY-MM，默認為 to 往前 11 個月)
+      - to: 結束月份 (格式: YYYY-MM，默認本月)
+
+    返回:
+      {
+        "months": ["2025-01", ..., "2025-12"],
+        "income": {"total": [30000.0, ...], "by_category": {"薪資": [30000.0, ...]}},
+        "expense": {"total": [1200.0, ...], "by_category": {"食": [1200.0, ...]}},
+        "net": [28800.0, ...]
+      }
+    """
+    try:
+        user = _require_auth(request)
+    except PermissionError as exc:
+        return _json_error(str(exc), status=401)
+
+    try:
+        to_value, from_value = request.GET.get("to"), request.GET.get("from")
+        end = parse_month(to_value) if to_value else date.today().replace(day=1)
+        if from_value:
+            start = parse_month(from_value)
+        else:
+            # 默認含 to 在內的 12 個月
+            start = date(end.year - (end.month < 12), end.month % 12 + 1, 1)
+    except ValueError:
+        return _json_error("from and to must be YYYY-MM or YYYY-MM-DD")
+    if start > end:
+        return _json_error("from must not be after to")
+    if len(list(iter_months(start, end))) > MAX_TREND_MONTHS:
+        return _json_error(f"range must not exceed {MAX_TREND_MONTHS} months")
+
+    data = build_trend(user, start, end)
+    payload = {"months": [month.strftime("%Y-%m") for month in data.months]}
+    for kind in ("income", "expense"):
+        payload[kind] = {
+            "total": [float(value) for value in data.totals[kind]],
+            "by_category": {
+                name: [float(value) for value in values]
+                for name, values in data.by_category[kind].items()
+            },
+        }
+    payload["net"] = [
+        float(income - expense)
+        for income, expense in zip(data.totals["income"], data.totals["expense"])
+    ]
+    return _json_success(payload)
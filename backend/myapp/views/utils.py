@@ -2,16 +2,25 @@
 通用的工具函數和裝飾器
 """
 import json
+from datetime import date
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
 from django.http import HttpRequest, JsonResponse
 from django.contrib.auth.models import User
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import condition
+
+from ..counters import adata_version, data_version
+from ..rendering import FastJsonResponse
 
 
 def _json_error(message: str, status: int = 400) -> JsonResponse:
-    return JsonResponse({"error": message}, status=status)
+    return FastJsonResponse({"error": message}, status=status)
 
 
 def _json_success(payload: dict, status: int = 200) -> JsonResponse:
-    return JsonResponse(payload, status=status)
+    return FastJsonResponse(payload, status=status)
 
 
 def _parse_body(request: HttpRequest) -> dict:
@@ -32,3 +41,46 @@ def _require_auth(request: HttpRequest) -> User:
 
 def _amount_response(name: str, total) -> JsonResponse:
     return _json_success({"name": name, "total": float(total)})
+
+
+def _user_data_etag(request: HttpRequest, *args, **kwargs) -> str | None:
+    """
+    以使用者的資料版本產生強 ETag
+
+    任何記錄、類別或目標寫入都會改變版本；未指定月份時回應取決於今天，
+    所以也把當月放進去。只對已登入的 GET/HEAD 產生。
+    """
+    if request.method not in ("GET", "HEAD") or not request.user.is_authenticated:
+        return None
+    return _format_etag(request.user.pk, data_version(request.user.pk))
+
+
+async def _auser_data_etag(request: HttpRequest) -> str | None:
+    if request.method not in ("GET", "HEAD"):
+        return None
+    user = await request.auser()
+    if not user.is_authenticated:
+        return None
+    return _format_etag(user.pk, await adata_version(user.pk))
+
+
+def _format_etag(user_id: int, version: int) -> str:
+    return f'"{user_id}-{version}-{date.today():%Y%m}"'
+
+
+def user_data_conditional(view):
+    """資料未變時直接回 304，不執行彙總；同時支援 sync 與 async 視圖"""
+    if not iscoroutinefunction(view):
+        return condition(etag_func=_user_data_etag)(view)
+
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        etag = await _auser_data_etag(request)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = await view(request, *args, **kwargs)
+        if etag:
+            response.headers.setdefault("ETag", etag)
+        return response
+
+    return inner
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'myapp.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -103,6 +104,28 @@ else:
         }
     }
 
+# Opt-in SQLite production profile (SQLITE_PRODUCTION=True): WAL lets readers run
+# alongside the single writer, and BEGIN IMMEDIATE takes the write lock when a
+# transaction starts, so concurrent writers wait on busy_timeout instead of
+# failing with "database is locked" when a read lock cannot be upgraded
+SQLITE_PRODUCTION = os.environ.get('SQLITE_PRODUCTION', 'False') == 'True'
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '10000'))
+SQLITE_PRODUCTION_OPTIONS = {
+    'init_command': ';'.join([
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', str(128 * 1024 * 1024)))}",
+        # 負值代表 KiB
+        f"PRAGMA cache_size={int(os.environ.get('SQLITE_CACHE_SIZE', '-32000'))}",
+        f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}',
+        'PRAGMA temp_store=MEMORY',
+    ]),
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000,
+}
+if SQLITE_PRODUCTION and DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default'].setdefault('OPTIONS', {}).update(SQLITE_PRODUCTION_OPTIONS)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -146,6 +169,65 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'finance-tracker@example.com'
 
+# Monthly report delivery: messages per SMTP connection, send attempts and retry backoff (seconds)
+REPORT_EMAIL_BATCH_SIZE = int(os.environ.get('REPORT_EMAIL_BATCH_SIZE', '100'))
+REPORT_EMAIL_MAX_ATTEMPTS = int(os.environ.get('REPORT_EMAIL_MAX_ATTEMPTS', '3'))
+REPORT_EMAIL_RETRY_BACKOFF = float(os.environ.get('REPORT_EMAIL_RETRY_BACKOFF', '2'))
+
+# Cache framework: locmem by default; point at a shared backend (file-based, Redis) when running
+# several worker processes so cached summaries are invalidated everywhere
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND') or 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Monthly summary cache: cache alias and seconds a summary is kept (0 disables the cache).
+# Off by default unless CACHE_BACKEND is set: with the per-process locmem cache a write
+# handled by one worker would not invalidate the summaries cached by the others
+SUMMARY_CACHE_ALIAS = os.environ.get('SUMMARY_CACHE_ALIAS', 'default')
+SUMMARY_CACHE_TIMEOUT = int(
+    os.environ.get('SUMMARY_CACHE_TIMEOUT', '3600' if os.environ.get('CACHE_BACKEND') else '0')
+)
+
+# JSON encoder for API responses: 'auto' (orjson when installed), 'orjson' or 'stdlib'
+JSON_BACKEND = os.environ.get('JSON_BACKEND', 'auto')
+
+# Route the read endpoints (report, insights, ledger, totals) to their async views;
+# only useful when served by an ASGI server such as uvicorn
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False') == 'True'
+
+# Request metrics (/metrics/): share of requests timed for the histograms, whether every
+# response gets a Server-Timing header, and the bearer token a scraper must send
+# (staff sessions may always read it)
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', '0.1'))
+METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', 'False') == 'True'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Metrics are kept per worker process. With METRICS_DIR set, every worker writes a snapshot
+# there every METRICS_FLUSH_INTERVAL seconds and /metrics/ reports the sum over all workers;
+# clear the directory when the server (re)starts
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '5'))
+
+# Entries per kind and user allowed in the hot tables (0: unlimited); archived entries do not count
+ENTRY_LIMIT_PER_KIND = int(os.environ.get('ENTRY_LIMIT_PER_KIND', '10000'))
+
+# Archiving (manage.py archive_entries): whole years older than ARCHIVE_AFTER_YEARS move to the
+# archive tables; readers cache the archive boundary for ARCHIVE_BOUNDARY_TTL seconds, so with
+# several worker processes ARCHIVE_CACHE_ALIAS must be a shared cache
+ARCHIVE_AFTER_YEARS = int(os.environ.get('ARCHIVE_AFTER_YEARS', '3'))
+ARCHIVE_CACHE_ALIAS = os.environ.get('ARCHIVE_CACHE_ALIAS', 'default')
+ARCHIVE_BOUNDARY_TTL = int(os.environ.get('ARCHIVE_BOUNDARY_TTL', '300'))
+
+# Category name -> id cache: cache alias and seconds before a user's map is re-read (0 disables the
+# cache). Off by default unless CACHE_BACKEND is set, like the summary cache: renames and deletes
+# clear the map through the cache, which the per-process locmem cache cannot do across workers
+CATEGORY_CACHE_ALIAS = os.environ.get('CATEGORY_CACHE_ALIAS', 'default')
+CATEGORY_CACHE_TTL = int(
+    os.environ.get('CATEGORY_CACHE_TTL', '300' if os.environ.get('CACHE_BACKEND') else '0')
+)
+
 # Session settings
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = 'Lax'
@@ -153,6 +235,20 @@ SESSION_COOKIE_SECURE = os.environ.get('USE_HTTPS', 'False') == 'True'  # Set to
 SESSION_COOKIE_NAME = 'sessionid'
 SESSION_COOKIE_AGE = 1209600  # 2 weeks in seconds
 
+# Fast-auth mode (FAST_AUTH=True): sessions read through the cache (cached_db) and the
+# logged-in user cached for FAST_AUTH_USER_TTL seconds, invalidated when the user is saved.
+# With several worker processes the cache must be shared (see CACHE_BACKEND), or a
+# logout in one worker is not seen by the others
+FAST_AUTH = os.environ.get('FAST_AUTH', 'False') == 'True'
+FAST_AUTH_CACHE_ALIAS = os.environ.get('FAST_AUTH_CACHE_ALIAS', 'default')
+FAST_AUTH_USER_TTL = int(os.environ.get('FAST_AUTH_USER_TTL', '60'))
+if FAST_AUTH:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    SESSION_CACHE_ALIAS = FAST_AUTH_CACHE_ALIAS
+    MIDDLEWARE[MIDDLEWARE.index('django.contrib.auth.middleware.AuthenticationMiddleware')] = (
+        'myapp.middleware.CachedAuthenticationMiddleware'
+    )
+
 # CSRF settings
 CSRF_COOKIE_HTTPONLY = False
 CSRF_COOKIE_SAMESITE = 'Lax'
@@ -213,7 +309,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'myapp.rendering.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -20,6 +20,10 @@ type GoalsListResponse = {
   goals: { name: string; type: 'expense' | 'income'; target: number; target_month: string }[]
 }
 
+type GoalsRangeResponse = {
+  goals: { name: string; type: 'expense' | 'income'; target: number; target_month: string; progress: number; percentage: number }[]
+}
+
 type GoalProgressResponse = {
   name: string
   type: 'expense' | 'income'
@@ -35,10 +39,31 @@ type ReportStatusResponse = {
   generated_at?: string
 }
 
+// Dashboard: every section of one month in a single response
+export type DashboardResponse = {
+  month: string
+  totals: { income: number; expense: number; net: number }
+  expense: Record<string, number>
+  income: Record<string, number>
+  goals: { name: string; type: 'expense' | 'income'; target: number; target_month: string; progress: number; percentage: number }[]
+  insights: string[]
+  report_status: ReportStatusResponse
+}
+
+// Trend: per-month series, zero-filled, aligned with `months`
+type TrendSeries = { total: number[]; by_category: Record<string, number[]> }
+export type TrendResponse = {
+  months: string[]
+  income: TrendSeries
+  expense: TrendSeries
+  net: number[]
+}
+
 // Map backend shapes to frontend types
 type TypesResponse = { types: string[] }
 type TotalByNameResponse = { name: string; total: number }
 type TotalResponse = { total: number }
+type TypeTotalsResponse = { month: string | null; types: { name: string; total: number }[]; total: number }
 type PurposeListResponse = { goals: { name: string; type: 'expense' | 'income'; target: number; target_month: string }[] }
 type ReportOverviewResponse = {
   month: string
@@ -82,6 +107,28 @@ export const getIncomeByType = async (name: string): Promise<number> => {
   return res.total
 }
 
+export type TypeTotals = {
+  types: FinanceType[]
+  amounts: Record<string, number>
+  total: number
+}
+
+// One request returns every category with its total (zero when empty) plus the overall total
+const getTypeTotals = async (kind: 'expense' | 'income', month?: string): Promise<TypeTotals> => {
+  const query = month ? `?month=${month}` : ''
+  const res = await request<TypeTotalsResponse>(`/api/${kind}/totals/${query}`)
+  const amounts: Record<string, number> = {}
+  res.types.forEach(t => { amounts[t.name] = t.total })
+  return {
+    types: res.types.map(t => ({ id: t.name, name: t.name })),
+    amounts,
+    total: res.total
+  }
+}
+
+export const getExpenseTypeTotals = (month?: string) => getTypeTotals('expense', month)
+export const getIncomeTypeTotals = (month?: string) => getTypeTotals('income', month)
+
 export const getExpenseTotal = async (): Promise<number> => {
   const res = await request<TotalResponse>('/api/expense/total/')
   return res.total
@@ -98,6 +145,13 @@ export const listGoals = (params?: { month?: string }) => {
   return request<GoalsListResponse>(`/api/purpose/${query}`)
 }
 
+// Goal progress for every goal targeting a month in [from, to] (YYYY-MM)
+export const listGoalsRange = (params: { from: string; to?: string }) => {
+  const query = new URLSearchParams({ from: params.from })
+  if (params.to) query.set('to', params.to)
+  return request<GoalsRangeResponse>(`/api/goals/?${query.toString()}`)
+}
+
 export const createGoal = (payload: { name: string; type: 'expense' | 'income'; target_amount: number; target_month?: string }) =>
   request<void>('/api/purpose/', {
     method: 'POST',
@@ -131,6 +185,20 @@ export const getInsights = (params?: { month?: string }) => {
 // Report status
 export const getReportStatus = () => request<ReportStatusResponse>('/api/report/status/')
 
+// Trend (from/to as YYYY-MM)
+export const getTrend = (params?: { from?: string; to?: string }) => {
+  const query = new URLSearchParams()
+  if (params?.from) query.set('from', params.from)
+  if (params?.to) query.set('to', params.to)
+  return request<TrendResponse>(`/api/report/trend/${query.toString() ? `?${query.toString()}` : ''}`)
+}
+
+// Dashboard
+export const getDashboard = (params?: { month?: string }) => {
+  const query = params?.month ? `?month=${params.month}` : ''
+  return request<DashboardResponse>(`/api/dashboard/${query}`)
+}
+
 export const createExpenseType = (payload: CreateTypePayload) =>
   request<void>('/api/expense/types/', {
     method: 'POST',
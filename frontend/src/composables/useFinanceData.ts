@@ -1,12 +1,10 @@
 import { ref, computed } from 'vue'
 import {
-  getExpenseTypes,
-  getIncomeTypes,
-  getExpenseByType,
-  getIncomeByType,
-  getExpenseTotal,
-  getIncomeTotal,
-  listGoals,
+  getExpenseTypeTotals,
+  getIncomeTypeTotals,
+  listGoalsRange,
+  getDashboard,
+  getTrend,
   createGoal,
   createExpenseType,
   createIncomeType,
@@ -14,6 +12,7 @@ import {
   createIncomeEntry
 } from '@/api/finance'
 import type { FinanceType } from '@/types/finance'
+import type { TrendResponse } from '@/api/finance'
 
 export function useFinanceData() {
   const expenseTypes = ref<FinanceType[] | null>(null)
@@ -34,90 +33,110 @@ export function useFinanceData() {
     percentage?: number
   }[]>([])
 
+  // 目標與洞察所屬月份 (YYYY-MM)
+  const goalsMonth = ref(new Date().toISOString().slice(0, 7))
+  const insights = ref<string[]>([])
+  // 近 12 個月收支趨勢
+  const trend = ref<TrendResponse | null>(null)
+
   const loadingExpense = ref(false)
   const loadingIncome = ref(false)
   const loadingGoals = ref(false)
+  const loadingInsights = ref(false)
+  const loadingTrend = ref(false)
   const loadingExpenseTotal = ref(false)
   const loadingIncomeTotal = ref(false)
 
   const errorExpense = ref<string | null>(null)
   const errorIncome = ref<string | null>(null)
   const errorGoals = ref<string | null>(null)
+  const errorInsights = ref<string | null>(null)
 
   const balance = computed(() => incomeTotal.value - expenseTotal.value)
 
   async function loadExpense() {
     loadingExpense.value = true
+    loadingExpenseTotal.value = true
     errorExpense.value = null
     try {
-      const types = await getExpenseTypes()
-      expenseTypes.value = types
-      const names = (types || []).map(t => t.name)
-      const amounts = await Promise.all(names.map(n => getExpenseByType(n)))
-      const next: Record<string, number> = {}
-      names.forEach((n, i) => { next[n] = amounts[i] || 0 })
-      expenseAmounts.value = next
+      const res = await getExpenseTypeTotals()
+      expenseTypes.value = res.types
+      expenseAmounts.value = res.amounts
+      expenseTotal.value = res.total
     } catch (err) {
       errorExpense.value = err instanceof Error ? err.message : '載入支出資料失敗'
     } finally {
       loadingExpense.value = false
-    }
-
-    loadingExpenseTotal.value = true
-    try {
-      expenseTotal.value = await getExpenseTotal()
-    } finally {
       loadingExpenseTotal.value = false
     }
   }
 
   async function loadIncome() {
     loadingIncome.value = true
+    loadingIncomeTotal.value = true
     errorIncome.value = null
     try {
-      const types = await getIncomeTypes()
-      incomeTypes.value = types
-      const names = (types || []).map(t => t.name)
-      const amounts = await Promise.all(names.map(n => getIncomeByType(n)))
-      const next: Record<string, number> = {}
-      names.forEach((n, i) => { next[n] = amounts[i] || 0 })
-      incomeAmounts.value = next
+      const res = await getIncomeTypeTotals()
+      incomeTypes.value = res.types
+      incomeAmounts.value = res.amounts
+      incomeTotal.value = res.total
     } catch (err) {
       errorIncome.value = err instanceof Error ? err.message : '載入收入資料失敗'
     } finally {
       loadingIncome.value = false
+      loadingIncomeTotal.value = false
     }
+  }
 
-    loadingIncomeTotal.value = true
+  // 只需要目標進度時使用，後端只加總目標所需的類型總額
+  async function loadGoals(month = goalsMonth.value) {
+    loadingGoals.value = true
+    errorGoals.value = null
     try {
-      incomeTotal.value = await getIncomeTotal()
+      const res = await listGoalsRange({ from: month })
+      goals.value = res.goals ?? []
+    } catch (err) {
+      errorGoals.value = err instanceof Error ? err.message : '無法載入目標'
     } finally {
-      loadingIncomeTotal.value = false
+      loadingGoals.value = false
     }
   }
 
-  async function loadGoals(month?: string) {
+  // 一次請求取得該月目標進度與洞察，後端只計算一次月度摘要
+  async function loadDashboard(month?: string) {
+    goalsMonth.value = month || new Date().toISOString().slice(0, 7)
     loadingGoals.value = true
+    loadingInsights.value = true
     errorGoals.value = null
+    errorInsights.value = null
     try {
-      const res = await listGoals(month ? { month } : undefined)
-      goals.value = res.goals?.map(g => ({
-        name: g.name,
-        type: g.type,
-        target: g.target,
-        target_month: g.target_month,
-        progress: (g as any).progress,
-        percentage: (g as any).percentage
-      })) || []
+      const res = await getDashboard({ month: `${goalsMonth.value}-01` })
+      goals.value = res.goals
+      insights.value = res.insights ?? []
     } catch (err) {
-      errorGoals.value = err instanceof Error ? err.message : '無法載入目標'
+      const message = err instanceof Error ? err.message : '無法載入目標'
+      errorGoals.value = message
+      errorInsights.value = message
     } finally {
       loadingGoals.value = false
+      loadingInsights.value = false
+    }
+  }
+
+  // 後端每種類型一次分組查詢，月份數不影響請求與查詢次數
+  async function loadTrend() {
+    loadingTrend.value = true
+    try {
+      trend.value = await getTrend()
+    } catch (err) {
+      console.error('Failed to load trend', err)
+    } finally {
+      loadingTrend.value = false
     }
   }
 
   async function refreshAll() {
-    await Promise.all([loadExpense(), loadIncome(), loadGoals()])
+    await Promise.all([loadExpense(), loadIncome(), loadDashboard(goalsMonth.value), loadTrend()])
   }
 
   async function addGoal(payload: { name: string; type: 'expense' | 'income'; target_amount: number; target_month?: string }) {
@@ -137,13 +156,13 @@ export function useFinanceData() {
 
   async function addExpenseEntry(payload: { type: string; amount: number; date?: string }) {
     const res = await createExpenseEntry(payload)
-    await Promise.all([loadExpense(), loadGoals()])
+    await Promise.all([loadExpense(), loadDashboard(goalsMonth.value)])
     return res
   }
 
   async function addIncomeEntry(payload: { type: string; amount: number; date?: string }) {
     const res = await createIncomeEntry(payload)
-    await Promise.all([loadIncome(), loadGoals()])
+    await Promise.all([loadIncome(), loadDashboard(goalsMonth.value)])
     return res
   }
 
@@ -155,17 +174,24 @@ export function useFinanceData() {
     expenseTotal,
     incomeTotal,
     goals,
+    goalsMonth,
+    insights,
+    trend,
     loadingExpense,
     loadingIncome,
     loadingGoals,
+    loadingInsights,
+    loadingTrend,
     loadingExpenseTotal,
     loadingIncomeTotal,
     errorExpense,
     errorIncome,
     errorGoals,
+    errorInsights,
     balance,
     refreshAll,
     loadGoals,
+    loadDashboard,
     addGoal,
     addExpenseType,
     addIncomeType,
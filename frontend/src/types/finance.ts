@@ -62,6 +62,8 @@ export type LedgerResponse = {
   page: number
   page_size: number
   total: number
+  // Opaque keyset cursor for the following page (pass as `after`), null on the last page
+  next: string | null
 }
 
 export type PurposeType = 'expense' | 'income'